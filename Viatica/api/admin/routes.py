@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify
+import database.db_connection as db
+import database.slot_index as slot_index
+import database.cache as cache
+import database.qr_store as qr_store
+import database.db_visit as visits
+import database.db_analytics as analytics
+import database.query_log as query_log
+import backend.qr_queue as qr_queue
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+@admin_bp.route("/pool", methods = ["GET"])
+def pool_stats():
+    return jsonify({"status": "success", "pools": db.pool_stats()}), 200
+
+@admin_bp.route("/slot-index", methods = ["GET"])
+def slot_index_stats():
+    return jsonify({"status": "success", "slot_index": slot_index.index.stats()}), 200
+
+@admin_bp.route("/cache", methods = ["GET"])
+def cache_stats():
+    return jsonify({"status": "success", "caches": cache.cache_stats()}), 200
+
+@admin_bp.route("/qr-queue", methods = ["GET"])
+def qr_queue_stats():
+    return jsonify({"status": "success", "qr_queue": qr_queue.stats()}), 200
+
+@admin_bp.route("/qr-queue/regenerate", methods = ["POST"])
+def regenerate_qr_codes():
+    # ✅ ?missing_only=1 only issues missing QR records; default re-renders every stored image
+    missing_only = request.args.get("missing_only", "").lower() in ("1", "true", "yes")
+    queued = qr_queue.regenerate_all(force=not missing_only)
+    return jsonify({"status": "success", "queued": queued}), 202
+
+@admin_bp.route("/qr-queue/retry", methods = ["POST"])
+def retry_failed_qr_jobs():
+    return jsonify({"status": "success", "requeued": qr_queue.retry_failed()}), 202
+
+@admin_bp.route("/qr-store", methods = ["GET"])
+def qr_store_stats():
+    return jsonify({"status": "success", "qr_store": qr_store.store.stats()}), 200
+
+@admin_bp.route("/visit-writer", methods = ["GET"])
+def visit_writer_stats():
+    return jsonify({"status": "success", "visit_writer": visits.visit_writer().stats()}), 200
+
+@admin_bp.route("/analytics/rebuild", methods = ["POST"])
+def rebuild_visit_rollups():
+    # ✅ Recounts every rollup from visit_log; for repairs, not routine use
+    folded = analytics.rebuild_rollups()
+    if folded is None:
+        return jsonify({"status": "error", "message": "Failed to rebuild visit rollups"}), 500
+    return jsonify({"status": "success", "folded": folded}), 200
+
+@admin_bp.route("/queries", methods = ["GET"])
+def top_queries():
+    # ✅ ?top=20&sort=total|count|mean|p95|max ; heaviest statement fingerprints since start or last reset
+    sort = request.args.get("sort", "total").lower()
+    if sort not in query_log.SORTS:
+        return jsonify({"status": "error", "message": f"sort must be one of {', '.join(query_log.SORTS)}"}), 400
+    top = min(max(request.args.get("top", 20, type=int), 1), 500)
+    return jsonify({
+        "status": "success",
+        "profiler": query_log.profiler.stats(),
+        "queries": query_log.profiler.top(top, sort)
+    }), 200
+
+@admin_bp.route("/queries", methods = ["DELETE"])
+def reset_query_stats():
+    query_log.profiler.reset()
+    return jsonify({"status": "success", "message": "Query statistics reset"}), 200
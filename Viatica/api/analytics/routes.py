@@ -0,0 +1,27 @@
+from flask import Blueprint, request, jsonify
+import backend.analytics as analytics
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
+
+@analytics_bp.route("/visits", methods = ["GET"])
+def visit_analytics():
+    # ✅ ?group=hour|day|department|doctor&since=&until=&department_id=&doctor_id= ; reads the rollups only
+    success, result = analytics.visit_report(
+        request.args.get("group", "day").lower(),
+        since=request.args.get("since"),
+        until=request.args.get("until"),
+        department_id=request.args.get("department_id"),
+        doctor_id=request.args.get("doctor_id")
+    )
+
+    if not success:
+        code = 400 if result["outcome"] == "invalid" else 500
+        return jsonify({"status": "error", "message": result["message"]}), code
+    return jsonify({"status": "success", **result}), 200
+
+@analytics_bp.route("/status", methods = ["GET"])
+def analytics_status():
+    status = analytics.rollup_status()
+    if status is None:
+        return jsonify({"status": "error", "message": "Failed to read rollup status"}), 500
+    return jsonify({"status": "success", "rollups": status}), 200
@@ -1,14 +1,51 @@
 from flask import Blueprint, request, jsonify
-import backend.appointment as appo_logic
-import backend.patient as pt
-import backend.doctor as doc
+import backend.booking as booking
 import backend.qr as qr
 
 appointment_bp = Blueprint("appointment", __name__, url_prefix="/appointment")
 
+# ✅ Booking outcome -> (HTTP status, message)
+BOOKING_ERRORS = {
+    "invalid": (400, None),
+    "patient_missing": (400, "Patient not found — please provide name, gender, age, and blood group to register new patient."),
+    "doctor_missing": (404, "Doctor not found"),
+    "duplicate": (409, "Appointment already exists for this patient at that time"),
+    "slot_taken": (409, "Requested slot is already booked"),
+    "error": (500, "Internal error creating appointment"),
+}
+
+@appointment_bp.route("/batch", methods = ["POST"])
+def add_appointment_batch():
+    # ✅ {"bookings": [{contact, doc_id, date, time?, reason}, ...]} booked in one transaction
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("bookings"), list):
+        return jsonify({"status": "error", "message": "Send {\"bookings\": [...]} as a JSON object"}), 400
+    success, result = booking.book_batch(data["bookings"])
+    if not success:
+        return jsonify({"status": "error", "message": result["message"]}), 400
+
+    # Patients booked in this batch get one QR job each, not one per appointment
+    for patient_id in {r["patient_id"] for r in result["results"] if r["outcome"] == "booked"}:
+        try:
+            qr.request_qr(patient_id)
+        except Exception as e:
+            print(f"❌ Error queueing QR: {e}")
+
+    for r in result["results"]:
+        if r["outcome"] not in ("booked", "invalid"):
+            r["message"] = BOOKING_ERRORS.get(r["outcome"], BOOKING_ERRORS["error"])[1]
+    return jsonify({
+        "status": "success",
+        "booked": result["booked"],
+        "failed": len(result["results"]) - result["booked"],
+        "results": result["results"]
+    }), 200
+
 @appointment_bp.route("/add", methods = ["POST"])
 def add_appointment():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Send the appointment as a JSON object"}), 400
     # required details
     contact = data.get("contact")
     doc_id = data.get("doc_id")
@@ -16,60 +53,35 @@ def add_appointment():
     time = data.get("time") 
     reason = data.get("reason")
 
-    if not contact or not doc_id or not date or not time or not reason:
+    # time is optional: without it the doctor's earliest free slot that day is booked
+    if not contact or not doc_id or not date or not reason:
         return jsonify({"status": "error", "message": "Missing required fields"}), 400
-    try:    
-        search_result, patient_details = pt.search_patient_contact(contact)
-        if search_result:
-            patient_id = patient_details["id"]
-            print(f"Existing patient found: {patient_id}")
-        else:
-            print(f"New patient detected — adding...")
-            name = data.get("name")          
-            gender = data.get("gender")      
-            age = data.get("age")            
-            blood_grp = data.get("blood_grp")
-            if not all([name, gender, age, blood_grp]):
-                return jsonify({
-                    "status": "error",
-                    "message": "Patient not found — please provide name, gender, age, and blood group to register new patient."
-                }), 400
-            
-            success = pt.add_patient(name, gender, age, blood_grp, contact)
 
-            if not success:
-                return jsonify({"status": "error", "message": "Failed to register new patient"}), 400
-            
-            patient_exists, patient_details = pt.search_patient_contact(contact)
-            if not patient_exists:
-                return jsonify({"status": "error", "message": "Patient registration failed"}), 400
-
-            patient_id = patient_details["id"]
-            print(f"New patient added: {patient_id}")
-
-    except Exception as e:
-        print(f"❌ Error handling patient: {e}")
-        return jsonify({"status": "error", "message": "Internal error processing patient"}), 500
-    
+    # ✅ Patient upsert, doctor check, duplicate check, slot claim and insert run in one transaction
     try:
-        search_result, doc_details = doc.view_one_doc(doc_id)
-        if not search_result:
-            return jsonify({"status": "error", "message": "Doctor not found"}), 404
-        doc_id = doc_details["id"]
-
-    except Exception as e:
-        print(f"❌ Error fetching doctor: {e}")
-        return jsonify({"status": "error", "message": "Internal error fetching doctor"}), 500   
-    
-    try:
-        success = appo_logic.add_appointment(patient_id, doc_id, date, time, reason)
-        qr.generating_qr(patient_id)
-        if success:
-            return jsonify({"status": "success", "message": "Appointment scheduled successfully"}), 201
-        else:
-            return jsonify({"status": "error", "message": "Failed to create appointment"}), 500
-        
+        success, result = booking.book_appointment(
+            contact, doc_id, date, time, reason,
+            name=data.get("name"),
+            gender=data.get("gender"),
+            age=data.get("age"),
+            blood_grp=data.get("blood_grp")
+        )
     except Exception as e:
         print(f"❌ Error adding appointment: {e}")
         return jsonify({"status": "error", "message": "Internal error creating appointment"}), 500
-    
+
+    if not success:
+        code, message = BOOKING_ERRORS.get(result["outcome"], BOOKING_ERRORS["error"])
+        return jsonify({"status": "error", "message": message or result.get("message")}), code
+
+    try:
+        qr.request_qr(result["patient_id"])
+    except Exception as e:
+        print(f"❌ Error queueing QR: {e}")
+
+    return jsonify({
+        "status": "success",
+        "message": "Appointment scheduled successfully",
+        "appointment_id": result["appointment_id"],
+        "patient_id": result["patient_id"]
+    }), 201
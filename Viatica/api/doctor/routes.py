@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 import backend.doctor as doc_logic
+import backend.availablity as avail_logic
+import backend.imports as imports
 
 doctors_bp = Blueprint("doctors", __name__, url_prefix="/doctors")
 
@@ -22,4 +24,76 @@ def add_doc():
     if success:
         return jsonify({"status": "success", "message": f"Doctor {fname} added successfully"}), 201
     else:
-        return jsonify({"status": "error", "message": "Failed to add doctor"}), 400
\ No newline at end of file
+        return jsonify({"status": "error", "message": "Failed to add doctor"}), 400
+
+@doctors_bp.route("/<doc_id>/schedule", methods = ["POST"])
+def add_schedule(doc_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Send the schedule template as a JSON object"}), 400
+    success, result = avail_logic.generate_schedule(doc_id, data, incremental=bool(data.get("incremental")))
+
+    if success:
+        return jsonify({"status": "success", "slots_added": result["inserted"]}), 201
+    else:
+        return jsonify({"status": "error", "message": "Failed to generate schedule"}), 400
+
+@doctors_bp.route("/import", methods = ["POST"])
+def import_roster():
+    # ✅ Raw CSV/NDJSON body, read as a stream: ?format=csv|ndjson&batch_size=
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "ndjson" if "ndjson" in (request.content_type or "") else "csv"
+    success, report = doc_logic.import_doctors(
+        imports.text_stream(request.stream),
+        fmt.lower(),
+        batch_size=request.args.get("batch_size", 500)     # parsed and clamped in backend/imports.py
+    )
+
+    if success:
+        return jsonify({"status": "success", **report}), 201
+    else:
+        return jsonify({"status": "error", "message": "Import finished with errors", **report}), 400
+
+@doctors_bp.route("/schedules", methods = ["POST"])
+def roll_out_schedules():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("templates") or {}, dict):
+        return jsonify({"status": "error", "message": "Send {\"templates\": {doctor_id: template}} as JSON"}), 400
+    success, result = avail_logic.roll_out_schedules(
+        data.get("templates") or {},
+        incremental=bool(data.get("incremental")),
+        batch_size=data.get("batch_size", 1000)     # parsed and clamped in the backend
+    )
+
+    if success:
+        return jsonify({"status": "success", **result}), 201
+    else:
+        return jsonify({"status": "error", "message": "Failed to roll out schedules", **result}), 500
+
+@doctors_bp.route("/<doc_id>/slots", methods = ["GET"])
+def day_slots(doc_id):
+    date = request.args.get("date")
+    free_only = request.args.get("free", "").lower() in ("1", "true", "yes")
+    view = avail_logic.view_free_slots if free_only else avail_logic.view_day_slots
+    result = view(doc_id, date)
+
+    if result and result[0]:
+        return jsonify({"status": "success", "slots": result[1]["availabilities"]}), 200
+    else:
+        return jsonify({"status": "error", "message": "Enter valid doctor id and date (dd/mm/YYYY)"}), 400
+
+@doctors_bp.route("/slots/next", methods = ["GET"])
+def next_free_slots():
+    success, result = avail_logic.next_free_slots(
+        doc_id=request.args.get("doc_id"),
+        dept_id=request.args.get("dept_id"),
+        specialization=request.args.get("specialization"),
+        n=request.args.get("n", 5, type=int),
+        start=request.args.get("from")
+    )
+
+    if success:
+        return jsonify({"status": "success", **result}), 200
+    else:
+        return jsonify({"status": "error", "message": "Give doc_id, dept_id or specialization"}), 400
@@ -0,0 +1,18 @@
+from flask import Blueprint, Response, request, jsonify
+import backend.export as export_logic
+
+exports_bp = Blueprint("exports", __name__, url_prefix="/exports")
+
+@exports_bp.route("/<table>", methods = ["GET"])
+def export_table(table):
+    # ✅ ?format=ndjson|csv&since=&until= ; rows are streamed, never built into one list
+    fmt = request.args.get("format", "ndjson").lower()
+    success, result = export_logic.export_table(table, fmt, request.args.get("since"), request.args.get("until"))
+
+    if not success:
+        return jsonify({"status": "error", "message": result["message"]}), 400
+    return Response(
+        result["body"],
+        mimetype=result["mimetype"],
+        headers={"Content-Disposition": f"attachment; filename={table}.{fmt}"}
+    )
@@ -0,0 +1,24 @@
+from flask import Blueprint, Response
+import database.db_connection as db
+import database.metrics as metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Pool stats exported at scrape time: stats key -> (metric name, type, help)
+POOL_SERIES = {
+    "size": ("db_pool_size", "gauge", "Connections open in the pool."),
+    "in_use": ("db_pool_in_use", "gauge", "Connections checked out of the pool."),
+    "idle": ("db_pool_idle", "gauge", "Idle connections in the pool."),
+    "waits": ("db_pool_waits_total", "counter", "Checkouts that had to wait for a free connection."),
+    "timeouts": ("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting."),
+}
+
+@metrics_bp.route("/metrics", methods = ["GET"])
+def prometheus_metrics():
+    # ✅ Prometheus text format; per-endpoint request, query and connection series plus pool state
+    pools = db.pool_stats()
+    pool_series = [
+        metrics.sample_lines(name, help, kind, ("pool",), {(pool,): stats[key] for pool, stats in pools.items()})
+        for key, (name, kind, help) in POOL_SERIES.items()
+    ]
+    return Response(metrics.render(pool_series), mimetype="text/plain; version=0.0.4")
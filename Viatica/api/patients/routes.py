@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import backend.patient as patient_logic
+import backend.imports as imports
+import backend.qr as qr_logic
 
 patients_bp = Blueprint("patients", __name__, url_prefix="/patients")
 
+# ✅ update outcome -> (HTTP status, message)
+UPDATE_ERRORS = {
+    "not_found": (404, "Patient not found"),
+    "conflict": (409, "Patient was changed by someone else; reload and retry"),
+    "error": (500, "Failed to update patient"),
+}
+
 @patients_bp.route("/add", methods=["POST"])
 def add_patient():
     data = request.get_json()
@@ -19,6 +28,37 @@ def add_patient():
     else:
         return jsonify({"status": "error", "message": "Failed to add patient"}), 400
 
+@patients_bp.route("/import", methods = ["POST"])
+def import_patients():
+    # ✅ Raw CSV/NDJSON body, read as a stream: ?format=csv|ndjson&batch_size=
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "ndjson" if "ndjson" in (request.content_type or "") else "csv"
+    success, report = patient_logic.import_patients(
+        imports.text_stream(request.stream),
+        fmt.lower(),
+        batch_size=request.args.get("batch_size", 1000)     # parsed and clamped in backend/imports.py
+    )
+
+    if success:
+        return jsonify({"status": "success", **report}), 201
+    else:
+        return jsonify({"status": "error", "message": "Import finished with errors", **report}), 400
+
+@patients_bp.route("/<patient_id>/qr", methods = ["GET"])
+def get_patient_qr(patient_id):
+    # ✅ ?format=png|svg ; rendered on first request, then served from the image store
+    success, result = qr_logic.qr_image(patient_id, request.args.get("format", "png").lower())
+    if not success:
+        code = {"invalid": 400, "not_found": 404}.get(result["outcome"], 500)
+        return jsonify({"status": "error", "message": "QR not available"}), code
+
+    # The ETag is the content address, so an unchanged QR costs a 304 and no bytes
+    headers = {"ETag": f'"{result["etag"]}"', "Cache-Control": "private, max-age=300"}
+    if request.if_none_match.contains(result["etag"]):
+        return Response(status=304, headers=headers)
+    return Response(result["data"], mimetype=result["mimetype"], headers=headers)
+
 @patients_bp.route("/delete/<patient_id>", methods = ["DELETE"])
 def delete_patient(patient_id):
     success = patient_logic.delete_patient(patient_id)
@@ -30,18 +70,19 @@ def delete_patient(patient_id):
 @patients_bp.route("/update/<patient_id>", methods = ["PUT"])
 def update_patient(patient_id):
     data = request.get_json()
-    success = patient_logic.update_patient_details(
+    success, result = patient_logic.update_patient_details(
         patient_id,
         name=data.get("name"),
         gender=data.get("gender"),
         age=data.get("age"),
         blood_grp=data.get("blood_grp"),
-        contact=data.get("contact")
+        contact=data.get("contact"),
+        version=data.get("version")
     )
     if success:
-        return jsonify({"status": "success", "message": f"Patient {patient_id} updated successfully"}), 200
-    else:
-        return jsonify({"status": "error", "message": "Failed to update patient"}), 400
+        return jsonify({"status": "success", "message": f"Patient {patient_id} updated successfully", "version": result["version"]}), 200
+    code, message = UPDATE_ERRORS.get(result["outcome"], (400, "Failed to update patient"))
+    return jsonify({"status": "error", "message": message, "version": result.get("version")}), code
 
 @patients_bp.route("/<patient_id>", methods = ["GET"])
 def get_patient(patient_id):
@@ -53,9 +94,13 @@ def get_patient(patient_id):
     
 @patients_bp.route("/all", methods = ["GET"])
 def get_all():
-    success, result = patient_logic.view_all_patient()
+    # ✅ ?limit=&cursor= ; pass back next_cursor to get the following page
+    success, result = patient_logic.view_all_patient(
+        limit=request.args.get("limit", 100, type=int),
+        cursor=request.args.get("cursor")
+    )
     if success:
-        return jsonify({"status": "success", "patients": result["patients"]}), 200
+        return jsonify({"status": "success", "patients": result["patients"], "next_cursor": result["next_cursor"]}), 200
     else:
         return jsonify({"status": "error", "patients": []}), 400
     
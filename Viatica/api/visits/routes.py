@@ -0,0 +1,26 @@
+from flask import Blueprint, request, jsonify
+import backend.qr_scanner as scanner
+
+visits_bp = Blueprint("visits", __name__, url_prefix="/visits")
+
+# ✅ check-in outcome -> (HTTP status, message)
+CHECKIN_ERRORS = {
+    "invalid": (400, "Enter valid QR code, doctor, department and service ids"),
+    "unknown_qr": (404, "Invalid or inactive QR code"),
+    "error": (500, "Failed to log visit"),
+}
+
+@visits_bp.route("/checkin", methods = ["POST"])
+def check_in():
+    data = request.get_json(silent=True) or {}
+    success, result = scanner.check_in(
+        data.get("qr_id"),
+        doctor_id=data.get("doctor_id"),
+        department_id=data.get("department_id"),
+        service_id=data.get("service_id")
+    )
+
+    if success:
+        return jsonify({"status": "success", **result}), 201
+    code, message = CHECKIN_ERRORS.get(result["outcome"], CHECKIN_ERRORS["error"])
+    return jsonify({"status": "error", "message": message}), code
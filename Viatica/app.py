@@ -1,12 +1,55 @@
-from flask import Flask
+from flask import Flask, request
 from api.patients.routes import patients_bp
 from api.doctor.routes import doctors_bp
+from api.appointments.routes import appointment_bp
+from api.admin.routes import admin_bp
+from api.exports.routes import exports_bp
+from api.visits.routes import visits_bp
+from api.analytics.routes import analytics_bp
+from api.metrics.routes import metrics_bp
+import database.db_connection as db
+import database.db_visit as visits
+import backend.analytics as analytics
+import backend.ids as ids
+import database.metrics as metrics
 
 
 app = Flask(__name__)
 app.register_blueprint(patients_bp)
 app.register_blueprint(doctors_bp)
+app.register_blueprint(appointment_bp)
+app.register_blueprint(admin_bp)
+app.register_blueprint(exports_bp)
+app.register_blueprint(visits_bp)
+app.register_blueprint(analytics_bp)
+app.register_blueprint(metrics_bp)
 print(app.url_map)
+if ids.startup_warning():
+    print(ids.startup_warning())
+
+# ✅ Start the visit writer now so check-ins spooled before a restart are written straight away
+visits.visit_writer().start()
+analytics.start_refresher()
+
+# ✅ One pooled connection per request, handed back when the request ends
+@app.before_request
+def checkout_connection():
+    # Labelled by route pattern, not path, so /patients/<id> is one series
+    metrics.begin_request(request.url_rule.rule if request.url_rule else "unmatched")
+    db.begin_request()
+    # A pre-forked worker builds its own writer and spool, and starts its rollup refresh, on its first request
+    visits.visit_writer().start()
+    analytics.start_refresher()
+
+@app.after_request
+def record_status(response):
+    request.environ["metrics.status"] = response.status_code
+    return response
+
+@app.teardown_request
+def release_connection(exc):
+    db.end_request()
+    metrics.end_request(request.method, request.environ.get("metrics.status", 500))
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+import database.db_analytics as an
+import backend.utils as util
+from config import analytics_config
+
+# Range used when the caller gives none: today for hourly figures, the last 30 days otherwise
+DEFAULT_DAYS = {"hour": 1, "day": 30, "department": 30, "doctor": 30}
+
+_refresher_pid = None
+_refresher_lock = threading.Lock()
+_last_refresh = {"at": None, "folded": None}
+
+
+def _refresh_forever(interval):
+    while True:
+        folded = an.refresh_rollups(analytics_config["batch_size"])
+        _last_refresh.update(at=time.strftime("%Y-%m-%dT%H:%M:%S"), folded=folded)
+        time.sleep(interval)
+
+def start_refresher():
+    """
+    Folds new visits into the rollups every refresh_interval seconds from
+    a daemon thread, one per process; the locked watermark row keeps
+    processes from refreshing at once. With refresh_interval 0 nothing
+    starts here and cron runs: python -m database.db_analytics refresh
+    """
+    global _refresher_pid
+    interval = analytics_config["refresh_interval"]
+    # Checked by pid, so a pre-forked worker starts its own instead of trusting the parent's dead thread
+    if interval <= 0 or _refresher_pid == os.getpid():
+        return
+    with _refresher_lock:
+        if _refresher_pid == os.getpid():
+            return
+        threading.Thread(target=_refresh_forever, args=(interval,), name="rollup-refresh", daemon=True).start()
+        _refresher_pid = os.getpid()
+
+def visit_report(group = "day", since = None, until = None, department_id = None, doctor_id = None):
+    """
+    Visit counts and average wait grouped by hour, day, department or
+    doctor, from the rollup tables. Returns (True, {"group", "since",
+    "until", "visits", "rows"}) or (False, {"outcome", "message"}).
+    """
+    if group not in an.GROUPS:
+        print(f"[X] Unknown Analytics Group: {group}")
+        return False, {"outcome": "invalid", "message": f"group must be one of {', '.join(an.GROUPS)}"}
+    if department_id and not (isinstance(department_id, str) and department_id.isalnum()):
+        print("Enter Valid Department Id")
+        return False, {"outcome": "invalid", "message": "Enter valid department id"}
+    if doctor_id and not util.validate_id(doctor_id, "DOCT"):
+        print("Enter Valid Doctor Id")
+        return False, {"outcome": "invalid", "message": "Enter valid doctor id"}
+
+    dates = {}
+    for name, value in (("since", since), ("until", until)):
+        if value:
+            dates[name] = util.parse_date(value)
+            if not dates[name]:
+                print(f"Valid Date Not Given: {value}")
+                return False, {"outcome": "invalid", "message": f"Enter valid {name} date"}
+    until = dates.get("until") or date.today()
+    since = dates.get("since") or until - timedelta(days=DEFAULT_DAYS[group] - 1)
+    if since > until:
+        return False, {"outcome": "invalid", "message": "since must not be after until"}
+    if (until - since).days >= analytics_config["max_days"]:
+        return False, {"outcome": "invalid", "message": f"Range is limited to {analytics_config['max_days']} days"}
+
+    # ✅ Reads the rollups only; start_refresher() or cron keeps them current
+    rows = an.visit_rollups(group, since, until, department_id, doctor_id)
+    if rows is None:
+        return False, {"outcome": "error", "message": "Failed to read visit analytics"}
+    return True, {
+        "group": group,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "visits": sum(row["visits"] for row in rows),
+        "rows": rows
+    }
+
+def rollup_status():
+    status = an.rollup_status()
+    if status is not None:
+        status["last_refresh"] = dict(_last_refresh)
+    return status
@@ -1,4 +1,5 @@
 import database.db_appointment as ap
+import database.db_doc_schedule as avail
 import backend.utils as util
 from datetime import datetime
 
@@ -57,9 +58,10 @@ def delete_appointment(appointment_id):
         print("Enter Valid Doctor Id")
         return False
 
-    if ap.appointment_exists(appointment_id):
+    if ap.appointment_exists_id(appointment_id):
         try:
             ap.delete_appointment(appointment_id)
+            avail.release_slot(appointment_id)
             print(f"Appointment Successfully Deleted: {appointment_id}")
             return True
         
@@ -71,72 +73,52 @@ def delete_appointment(appointment_id):
         print(f"[X] Appointment Don't Exists With Id: {appointment_id}")
         return False
 
-def update_appointment(appointment_id, date = None, time = None, reason = None, doc_id = None, status = None):
-
+def update_appointment(appointment_id, date = None, time = None, reason = None, doc_id = None, status = None, version = None):
+    """
+    Validates every given field, then writes them in one UPDATE. Pass the
+    version read with the appointment to reject edits made on stale data.
+    Returns (success, {"outcome", "version"}); outcome "slot_taken" or
+    "invalid" means the new doctor, date or time cannot be booked.
+    """
     valid_status = ["Scheduled", "Completed", "Cancelled"]
 
     if not util.validate_id(appointment_id, "APPO"):
-        print("Enter Valid Doctor Id")
-        return False
-
-    if ap.appointment_exists_id(appointment_id):
-        try:
-            if date:
-                try:
-                    date_obj = datetime.strptime(date, "%d/%m/%Y").date()
-                    date = date_obj.strftime("%d/%m/%Y")
-                    print("Valid Date Given")
-
-                except Exception as e:
-                    print(f"Valid Date Not Given: {date}. Try Again Later \n error: {e}")
-                    return False
-                
-                ap.update_appointment_date(appointment_id, date)
-
-            if time:
-                try:
-                    time_obj = datetime.strptime(time, "%H:%M")
-                    time = time_obj.strftime("%H:%M")
-                    print("Valid Time Given")
-
-                except ValueError:
-                    return False
-                
-                ap.update_appointment_time(appointment_id, time)
-
-            if reason:
-                reason = reason.title().strip()
-
-                ap.update_appointment_reason(appointment_id,reason)
-
-            if doc_id:
-                if not util.validate_id(doc_id, "DOCT"):
-                    print(f"Enter Valid Doctor Id")
-                    return False
-                
-                doc_id = int(doc_id)
-
-                ap.update_appointment_doc_id(appointment_id, doc_id)
-
-            if status:
-                status = status.title().strip()
-
-                if status not in valid_status:
-                    print(f"[X] Invalid Status: {status}")
-                    return False
-                
-                ap.update_appointment_status(appointment_id, status)
+        print("Enter Valid Appointment Id")
+        return False, {"outcome": "invalid"}
+
+    changes = {}
+    if date:
+        date_obj = util.parse_date(date)
+        if not date_obj:
+            print(f"Valid Date Not Given: {date}")
+            return False, {"outcome": "invalid"}
+        changes["appointment_date"] = date_obj
+    if time:
+        time_obj = util.parse_time(time)
+        if not time_obj:
+            print(f"Valid Time Not Given: {time}")
+            return False, {"outcome": "invalid"}
+        changes["appointment_time"] = time_obj
+    if reason:
+        changes["reason"] = reason.title().strip()
+    if doc_id:
+        if not util.validate_id(doc_id, "DOCT"):
+            print(f"Enter Valid Doctor Id")
+            return False, {"outcome": "invalid"}
+        changes["doctor_id"] = doc_id
+    if status:
+        status = status.title().strip()
+        if status not in valid_status:
+            print(f"[X] Invalid Status: {status}")
+            return False, {"outcome": "invalid"}
+        changes["status"] = status
+
+    # ✅ Moving or cancelling also moves or releases its slot, in the same transaction
+    outcome, new_version = ap.update_appointment(appointment_id, changes, version)
+    if outcome == "updated":
+        print(f"Appointment Successfully Updated: {', '.join(changes)}")
+    return outcome == "updated", {"outcome": outcome, "version": new_version}
 
-            return True
-        
-        except Exception as e:
-            print(f"[X] Failed To Update Appointment With Id: {appointment_id}. Error: {e}")
-            return False
-        
-    else:
-        print(f"[X] Appointment Don't Exists With Id: {appointment_id}")
-        return False
-    
 def view_one_appointment(appointment_id):
     if not util.validate_id(appointment_id, "APPO"):
         print("Enter Valid Doctor Id")
@@ -153,7 +135,8 @@ def view_one_appointment(appointment_id):
                 "appointment_date" : appointment_details["appointment_date"],
                 "appointment_time" : appointment_details["appointment_time"],
                 "reason" : appointment_details["reason"],
-                "status": appointment_details["status"]
+                "status": appointment_details["status"],
+                "version": appointment_details["version"]
             }
             print(f"Appointment Details Successfully Fetched With Id: {appointment_id}")
             return True, result
@@ -195,11 +178,12 @@ def view_appointments_for_doctor(doc_id):
         print(f"[X] Failed To Fetch Appointments. Error: {e}")
         return False, {"appointments": []}
     
-def view_all_appointments():
+def view_all_appointments(limit = 100, cursor = None):
     try:
-        appointments_list = ap.view_all_appointments()
+        appointments_list, next_cursor = ap.view_all_appointment(limit, cursor)
         result = {
-            "appointments": appointments_list
+            "appointments": appointments_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(appointments_list)} Appointments Successfully")
         return True, result
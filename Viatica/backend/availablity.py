@@ -1,56 +1,173 @@
 import database.db_doc_schedule as avail
+import database.slot_index as slot_index
 import backend.utils as util
-from datetime import datetime
+from datetime import date as dt_date, datetime, timedelta
+from itertools import chain
+
+VALID_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MAX_SCHEDULE_DAYS = 366         # days past start_date; one request expands to about a year of slots per doctor
+MAX_SLOT_MINUTES = 24 * 60
 
 def add_availability(doc_id, date, day, start, end, duration):
-    valid_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    if not (isinstance(doc_id, str) and doc_id.upper().startswith("PAT") and doc_id.isalnum()):
-        print(f"Enter Valid Doctor Id")
+    date_obj = util.parse_date(date)
+    if not date_obj:
+        print(f"Valid Date Not Given: {date}")
         return False
-        
-    try:
-        date_obj = datetime.strptime(date, "%d/%m/%Y").date()
-        date = date_obj.strftime("%d/%m/%Y")
-        print("Valid Date Given")
-    except Exception as e:
-        print(f"Valid Date Not Given: {date}. Try Again Later \n error: {e}")
-        return False
-    
-    if day not in valid_days:
+
+    if day not in VALID_DAYS or VALID_DAYS[date_obj.weekday()] != day:
         print(f"Enter Valid Day")
         return False
 
-    try:
-        start_time_obj = datetime.strptime(start, "%H:%M")
-        start = start_time_obj.strftime("%H:%M")
-        print("Valid Start Time Given")
-    except ValueError:
-        return False
-    
-    try:
-        end_time_obj = datetime.strptime(end, "%H:%M")
-        start = end_time_obj.strftime("%H:%M")
-        print("Valid End Time Given")
-    except ValueError:
-        return False
-    
-    try:
-        duration_obj = datetime.strptime(duration, "%M")
-        start = duration_obj.strftime("%M")
-        print("Valid End Time Given")
-    except ValueError:
-        return
-    
-    try:
-        avail_id = util.generate_id("availability")
+    # ✅ A single day is just a one-rule template over a one-day range
+    template = {
+        "rules": [{"weekday": day, "start": start, "end": end, "slot_duration": duration}],
+        "start_date": date,
+        "end_date": date
+    }
+    success, result = generate_schedule(doc_id, template)
+    return success and result["inserted"] > 0
 
-        if avail.availability_exists(avail_id):
-            return False
-        
-        avail.add_availability(avail_id, doc_id, day, start, end, duration)
+
+# -------------------
+# Schedule Templates
+# -------------------
+
+
+def slot_id(doc_id, date, time):
+    # Deterministic, so re-running a rollout never creates duplicate slots
+    return f"AVAI{doc_id[4:]}{date:%Y%m%d}{time:%H%M}"
+
+def clean_template(template):
+    """
+    Validates a schedule template:
+        {
+            "rules": [{"weekday": "Monday", "start": "09:00", "end": "13:00", "slot_duration": 15}, ...],
+            "start_date": "01/01/2026",        # optional, defaults to today
+            "end_date": "31/03/2026",          # or "days_ahead": 90
+            "exceptions": ["26/01/2026"]       # optional dates with no slots
+        }
+    The range may span at most MAX_SCHEDULE_DAYS days.
+    Returns (rules, start_date, end_date, exceptions) or None.
+    """
+    if not isinstance(template, dict) or not isinstance(template.get("rules") or [], list):
+        print(f"[X] Schedule Template Must Be An Object With A List Of Rules")
+        return None
+    rules = []
+    for rule in template.get("rules") or []:
+        if not isinstance(rule, dict):
+            print(f"[X] Invalid Schedule Rule: {rule}")
+            return None
+        weekday = str(rule.get("weekday", "")).title().strip()
+        start = util.parse_time(rule.get("start"))
+        end = util.parse_time(rule.get("end"))
+        duration = rule.get("slot_duration")
+        if weekday not in VALID_DAYS or not start or not end or start >= end:
+            print(f"[X] Invalid Schedule Rule: {rule}")
+            return None
+        if not str(duration).isdigit() or not 0 < int(duration) <= MAX_SLOT_MINUTES:
+            print(f"[X] Invalid Slot Duration: {duration}")
+            return None
+        rules.append({"weekday": weekday, "start": start, "end": end, "slot_duration": int(duration)})
+    if not rules:
+        print("[X] Schedule Template Has No Rules")
+        return None
+
+    start_date = util.parse_date(template["start_date"]) if template.get("start_date") else dt_date.today()
+    if template.get("end_date"):
+        end_date = util.parse_date(template["end_date"])
+    elif str(template.get("days_ahead", "")).isdigit():
+        if int(template["days_ahead"]) > MAX_SCHEDULE_DAYS:
+            print(f"[X] days_ahead Must Be At Most {MAX_SCHEDULE_DAYS}")
+            return None
+        end_date = dt_date.today() + timedelta(days=int(template["days_ahead"]))
+    else:
+        end_date = None
+    if not start_date or not end_date or start_date > end_date:
+        print(f"[X] Invalid Schedule Date Range")
+        return None
+    if (end_date - start_date).days > MAX_SCHEDULE_DAYS:
+        print(f"[X] Schedule Date Range Longer Than {MAX_SCHEDULE_DAYS} Days")
+        return None
+
+    if not isinstance(template.get("exceptions") or [], list):
+        print(f"[X] Schedule Exceptions Must Be A List Of Dates")
+        return None
+    exceptions = set()
+    for value in template.get("exceptions") or []:
+        day = util.parse_date(value)
+        if not day:
+            print(f"[X] Invalid Exception Date: {value}")
+            return None
+        exceptions.add(day)
+    return rules, start_date, end_date, exceptions
+
+def expand_template(doc_id, rules, start_date, end_date, exceptions):
+    # ✅ Generator: slots are produced in memory as the batches are written
+    rules_by_day = {}
+    for rule in rules:
+        rules_by_day.setdefault(rule["weekday"], []).append(rule)
+    day = start_date
+    while day <= end_date:
+        weekday = VALID_DAYS[day.weekday()]
+        if day not in exceptions:
+            for rule in rules_by_day.get(weekday, []):
+                current = datetime.combine(day, rule["start"])
+                end = datetime.combine(day, rule["end"])
+                step = timedelta(minutes=rule["slot_duration"])
+                while current < end:
+                    yield slot_id(doc_id, day, current), doc_id, day, current.time(), weekday
+                    current += step
+        day += timedelta(days=1)
+
+def roll_out_schedules(templates, incremental = False, batch_size = 1000):
+    """
+    templates: {doctor_id: template}. With incremental=True each doctor only
+    gets days after the last date already generated for them. A failed
+    roll-out returns False with the slots committed before the failure.
+    """
+    batch_size = util.clamp_batch_size(batch_size, 1000)
+    if not isinstance(templates, dict):
+        print("[X] Templates Must Map Doctor Ids To Schedule Templates")
+        return False, {"doctors": 0, "inserted": 0, "rejected": {}}
+    plans, rejected = {}, {}
+    for doc_id, template in templates.items():
+        if not util.validate_id(doc_id, "DOCT"):
+            rejected[doc_id] = "Invalid doctor id"
+            continue
+        cleaned = clean_template(template)
+        if not cleaned:
+            rejected[doc_id] = "Invalid template"
+            continue
+        plans[doc_id] = cleaned
+
+    if incremental and plans:
+        latest = avail.latest_available_dates(list(plans))
+        for doc_id, last in latest.items():
+            last = util.parse_date(str(last)) if last else None
+            if last:
+                rules, start_date, end_date, exceptions = plans[doc_id]
+                plans[doc_id] = (rules, max(start_date, last + timedelta(days=1)), end_date, exceptions)
+
+    try:
+        rows = chain.from_iterable(
+            expand_template(doc_id, *plan) for doc_id, plan in plans.items() if plan[1] <= plan[2]
+        )
+        ok, inserted = avail.bulk_add_availability(rows, batch_size)
+        if not ok:
+            # ❌ Earlier batches are committed; rerunning with incremental=True picks up after them
+            print(f"[X] Schedule Roll-Out Stopped After {inserted} Slots.")
+            return False, {"doctors": len(plans), "inserted": inserted, "rejected": rejected}
+        print(f"[✓] Schedules Rolled Out For {len(plans)} Doctors: {inserted} Slots")
+        return True, {"doctors": len(plans), "inserted": inserted, "rejected": rejected}
     except Exception as e:
-        print(f"[X] Failed To Add Availability For Doctor's Id: {doc_id}. Error: {e}")
-        return False
+        print(f"[X] Failed To Roll Out Schedules. Error: {e}")
+        return False, {"doctors": 0, "inserted": 0, "rejected": rejected}
+
+def generate_schedule(doc_id, template, incremental = False):
+    success, result = roll_out_schedules({doc_id: template}, incremental)
+    if result["rejected"]:
+        return False, result
+    return success, result
 
 def delete_availability(availability_id):
     if not util.validate_id(availability_id, "AVA"):
@@ -165,14 +282,15 @@ def update_slot_free(avail_id, date, start_time):
         print(f"[X] Slot Don't Exists With Id: {avail_id}")
         return False
     
-def view_slot_for_doc(doc_id):
+def view_slot_for_doc(doc_id, limit = 100, cursor = None):
     try:
         if not util.validate_id(doc_id, "DOC"):
             print("Enter Valid Doctor Id")
             return False
-        avail_list = avail.view_all_availability_for_doc(doc_id)
+        avail_list, next_cursor = avail.view_all_availability_for_doc(doc_id, limit, cursor)
         result = {
-            "availabilities": avail_list
+            "availabilities": avail_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(avail_list)} Availabilites Successfully")
         return True, result
@@ -256,14 +374,43 @@ def view_booked_slots(doc_id, date):
         print(f"[X] Failed To Fetch Availabilites. Error: {e}")
         return False, {"availabilites": []}
     
-def view_all_slots():
+def view_all_slots(limit = 100, cursor = None):
     try:
-        avail_list = avail.view_all_availability()
+        avail_list, next_cursor = avail.view_all_availability(limit, cursor)
         result = {
-            "availabilities": avail_list
+            "availabilities": avail_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(avail_list)} Appointments Successfully")
         return True, result
     except Exception as e:
         print(f"[X] Failed To Fetch Availability. Error: {e}")
         return False, {"availability": []}
+
+def next_free_slots(doc_id = None, dept_id = None, specialization = None, n = 5, start = None):
+    # ✅ Answered from the in-memory slot index, no query per page view
+    if doc_id:
+        if not util.validate_id(doc_id, "DOC"):
+            print("Enter Valid Doctor Id")
+            return False, {"slots": []}
+        doc_ids = [doc_id]
+    elif dept_id or specialization:
+        doc_ids = slot_index.index.doctors_for(dept_id=dept_id, specialization=specialization)
+    else:
+        print("Doctor, Department Or Specialization Required")
+        return False, {"slots": []}
+
+    if start:
+        start_date = util.parse_date(start)
+        if not start_date:
+            print(f"Valid Date Not Given: {start}")
+            return False, {"slots": []}
+        start = max(datetime.combine(start_date, datetime.min.time()), datetime.now())
+
+    try:
+        slots = slot_index.index.next_free(doc_ids, start=start, n=max(1, min(int(n), 100)))
+        print(f"[✓] Found {len(slots)} Free Slots")
+        return True, {"slots": slots}
+    except Exception as e:
+        print(f"[X] Failed To Fetch Free Slots. Error: {e}")
+        return False, {"slots": []}
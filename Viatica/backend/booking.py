@@ -0,0 +1,94 @@
+import database.db_booking as bk
+import backend.patient as pt
+import backend.utils as util
+
+
+def book_appointment(contact, doc_id, date, time, reason, name = None, gender = None, age = None, blood_grp = None):
+    if not str(contact).isdigit():
+        print(f"Enter Valid Contact Number ")
+        return False, {"outcome": "invalid", "message": "Enter valid contact number"}
+
+    if not util.validate_id(doc_id, "DOCT"):
+        print(f"Enter Valid Doctor Id")
+        return False, {"outcome": "invalid", "message": "Enter valid doctor id"}
+
+    date_obj = util.parse_date(date)
+    if not date_obj:
+        print(f"Valid Date Not Given: {date}")
+        return False, {"outcome": "invalid", "message": "Enter valid date"}
+
+    # ✅ No time means "earliest free slot that day"
+    time_obj = util.parse_time(time) if time else None
+    if time and not time_obj:
+        print(f"Valid Time Not Given: {time}")
+        return False, {"outcome": "invalid", "message": "Enter valid time"}
+
+    if not isinstance(reason, str) or not reason.strip():
+        print(f"Enter Valid Reason")
+        return False, {"outcome": "invalid", "message": "Enter valid reason"}
+    reason = reason.title().strip()
+
+    # ✅ Patient details are optional; they are only used when the contact is new
+    new_patient = None
+    if all([name, gender, age, blood_grp]):
+        new_patient = pt.clean_patient(name, gender, age, blood_grp, contact)
+        if not new_patient:
+            return False, {"outcome": "invalid", "message": "Invalid patient details"}
+        new_patient["id"] = util.generate_id("patient")
+
+    appointment_id = util.generate_id("appointment")
+    outcome, details = bk.book_appointment(appointment_id, int(contact), doc_id, date_obj, time_obj, reason, new_patient)
+    details["outcome"] = outcome
+    return outcome == "booked", details
+
+MAX_BATCH = 500
+
+def book_batch(items):
+    """
+    Books a list of {contact, doc_id, date, time?, reason} in one
+    transaction. Items that fail validation are reported without touching
+    the database. Returns (success, {"results", "booked"}) where results
+    holds one {"index", "outcome", ...} per item, in input order.
+    """
+    if not isinstance(items, list) or not items:
+        return False, {"outcome": "invalid", "message": "Send a non-empty list of bookings"}
+    if len(items) > MAX_BATCH:
+        return False, {"outcome": "invalid", "message": f"At most {MAX_BATCH} bookings per batch"}
+
+    results = [None] * len(items)
+    valid, positions = [], []
+    for i, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        contact, doc_id, reason = item.get("contact"), item.get("doc_id"), item.get("reason")
+        date_obj = util.parse_date(item.get("date"))
+        time_obj = util.parse_time(item.get("time")) if item.get("time") else None
+        if not str(contact).isdigit():
+            message = "Enter valid contact number"
+        elif not util.validate_id(doc_id, "DOCT"):
+            message = "Enter valid doctor id"
+        elif not date_obj:
+            message = "Enter valid date"
+        elif item.get("time") and not time_obj:
+            message = "Enter valid time"
+        elif not isinstance(reason, str) or not reason.strip():
+            message = "Enter valid reason"
+        else:
+            valid.append({
+                "appointment_id": util.generate_id("appointment"),
+                "contact": int(contact),
+                "doc_id": doc_id,
+                "date": date_obj,
+                "time": time_obj,
+                "reason": reason.title().strip()
+            })
+            positions.append(i)
+            continue
+        results[i] = {"index": i, "outcome": "invalid", "message": message}
+
+    for i, (outcome, details) in zip(positions, bk.book_batch(valid)):
+        details.pop("slot_id", None)
+        results[i] = {"index": i, "outcome": outcome, **details}
+
+    booked = sum(1 for result in results if result["outcome"] == "booked")
+    print(f"[✓] Batch Booking Done: {booked} Of {len(items)} Booked")
+    return True, {"results": results, "booked": booked}
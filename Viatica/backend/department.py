@@ -87,11 +87,12 @@ def view_one_dept(dept_id):
         print(f"[X] Department Don't Exists With Id: {dept_id}")
         return False, {}
     
-def view_all_dept():
+def view_all_dept(limit = 100, cursor = None):
     try:
-        dept_list = dept.view_all_departments()
+        dept_list, next_cursor = dept.view_all_departments(limit, cursor)
         result = {
-            "departments" : dept_list
+            "departments" : dept_list,
+            "next_cursor": next_cursor
         }
         print(f"{len(dept_list)} Departments Successfully Fetched ")
         return True, result
@@ -1,4 +1,6 @@
 import database.db_doc as doc
+import database.db_department as dept
+import backend.imports as imports
 import backend.utils as util
 from datetime import datetime
 
@@ -73,90 +75,61 @@ def delete_doctor(doc_id):
         print(f"[X] Doctor Don't Exists With Id: {doc_id}")
         return False
 
-def update_doctor(doc_id, fname = None, lname = None, gender = None, specialization = None, experience = None, contact = None, email = None, fee = None, dept_id = None):
+def update_doctor(doc_id, fname = None, lname = None, gender = None, specialization = None, experience = None, contact = None, email = None, fee = None, dept_id = None, version = None):
+    """
+    Validates every given field, then writes them in one UPDATE. Pass the
+    version read with the doctor to reject edits made on stale data.
+    Returns (success, {"outcome", "version"}).
+    """
     valid_gender = ["Male", "Female", "Prefer Not To Say"]
     if not util.validate_id(doc_id, "DOCT"):
         print("Enter Valid Doctor Id")
-        return False
-
-    if doc.doctor_exists_id(doc_id):
-        try:
-            if fname:
-                fname = fname.title().strip()
-                doc.update_doctor_fname(doc_id, fname)
-                print(f"Doctor's First Name Successfully Updated: {fname}")
-
-            if lname:
-                lname = lname.title().strip()
-                doc.update_doctor_lname(doc_id, lname)
-                print(f"Doctor's Last Name Successfully Updated: {lname}")
-
-            if gender:
-                gender = gender.title().strip()
-                if gender not in valid_gender:
-                    print(f"[X] Invalid Gender: {gender}")
-                    return False
-                
-                doc.update_doctor_gender(doc_id, gender)
-                print(f"Doctor's Gender Successfully Updated: {gender}")
-
-            if specialization:
-                specialization = specialization.title().strip()
-                doc.update_doctor_specialization(doc_id, specialization)
-                print(f"Doctor's Specialization Successfully Updated: {specialization}")
-
-            if experience:
-                if not str(experience).isdigit():
-                    print(f"Enter Valid Experience ")
-                    return False
-                
-                experience = int(experience)
-                doc.update_doctor_experience(doc_id, experience)
-                print(f"Doctor's Experience Successfully Updated: {experience}")
+        return False, {"outcome": "invalid"}
 
-            if contact:
-                if not str(contact).isdigit():
-                    print(f"Enter Valid Contact Number ")
-                    return False
-                
-                doc.update_doctor_contact(doc_id, contact)
-                print(f"Doctor's Contact Successfully Updated: {contact}")
-
-            if email:
-                if not util.valid_email(email):
-                    print(f"Enter Valid Email ")
-                    return False
-                
-                doc.update_doctor_email(doc_id, email)
-                print(f"Doctor's Email Successfully Updated: {email}")
-
-            if fee:
-                if not str(fee).isdigit():
-                    print(f"Enter Valid Consultation Fee")
-                    return False
-                
-                doc.update_doctor_fee(doc_id, fee)
-                print(f"Doctor's Consulting Fee Successfully Updated: {fee}")
-
-            if dept_id:
-
-                if not util.validate_id(dept_id,"DEPT"):
-                    print(f"Enter Valid Department Id")
-                    return False
+    changes = {}
+    if fname:
+        changes["first_name"] = fname.title().strip()
+    if lname:
+        changes["last_name"] = lname.title().strip()
+    if gender:
+        gender = gender.title().strip()
+        if gender not in valid_gender:
+            print(f"[X] Invalid Gender: {gender}")
+            return False, {"outcome": "invalid"}
+        changes["gender"] = gender
+    if specialization:
+        changes["specialization"] = specialization.title().strip()
+    if experience:
+        if not str(experience).isdigit():
+            print(f"Enter Valid Experience ")
+            return False, {"outcome": "invalid"}
+        changes["experience"] = int(experience)
+    if contact:
+        if not str(contact).isdigit():
+            print(f"Enter Valid Contact Number ")
+            return False, {"outcome": "invalid"}
+        changes["contact"] = int(contact)
+    if email:
+        if not util.valid_email(email):
+            print(f"Enter Valid Email ")
+            return False, {"outcome": "invalid"}
+        changes["email"] = email
+    if fee:
+        if not str(fee).isdigit():
+            print(f"Enter Valid Consultation Fee")
+            return False, {"outcome": "invalid"}
+        changes["consultation_fee"] = int(fee)
+    if dept_id:
+        if not util.validate_id(dept_id,"DEPT"):
+            print(f"Enter Valid Department Id")
+            return False, {"outcome": "invalid"}
+        changes["dept_id"] = dept_id
 
-                doc.update_doctor_dept_id(doc_id, dept_id)
-                print(f"Doctor's Department Id Successfully Updated: {dept_id}")
+    outcome, new_version = doc.update_doctor(doc_id, changes, version)
+    if outcome == "updated":
+        print(f"Doctor's Details Successfully Updated: {', '.join(changes)}")
+    return outcome == "updated", {"outcome": outcome, "version": new_version}
 
-            return True
-        
-        except Exception as e:
-            print(f"[X] Failed To Update Doctor With Id: {doc_id}. Error: {e}")
-            return False
-        
-    else:
-        print(f"[X] Doctor Don't Exists With Id: {doc_id}")
-        return False
-    
 def view_one_doc(doc_id):
     if not util.validate_id(doc_id, "DOCT"):
         print("Enter Valid Doctor Id")
@@ -170,13 +143,14 @@ def view_one_doc(doc_id):
                 "first_name" : doc_details["first_name"],
                 "last_name" : doc_details["last_name"],
                 "gender" : doc_details["gender"],
-                "dob" : doc_details["DOB"],
+                "dob" : doc_details["dob"],
                 "specialization" : doc_details["specialization"],
                 "experience" : doc_details["experience"],
                 "contact" : doc_details["contact"],
                 "email" : doc_details["email"],
                 "consultation_fee" : doc_details["consultation_fee"],
-                "dept_id": doc_details["dept_id"]
+                "dept_id": doc_details["dept_id"],
+                "version": doc_details["version"]
             }
             print(f"Doctor's Details Successfully Fetched With Id: {doc_id}")
             return True, result
@@ -187,11 +161,12 @@ def view_one_doc(doc_id):
         print(f"[X] Doctor Don't Exists With Id: {doc_id}")
         return False, {}
     
-def view_all_doctors():
+def view_all_doctors(limit = 100, cursor = None):
     try:
-        doc_list = doc.view_all_doctors()
+        doc_list, next_cursor = doc.view_all_doctors(limit, cursor)
         result = {
-            "doctors": doc_list
+            "doctors": doc_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(doc_list)} Doctors Successfully")
         return True, result
@@ -199,14 +174,15 @@ def view_all_doctors():
         print(f"[X] Failed To Fetch Doctors. Error: {e}")
         return False, {"doctors": []}
 
-def view_doctor_by_dept(dept_id):
+def view_doctor_by_dept(dept_id, limit = 100, cursor = None):
     if not util.validate_id(dept_id, "DEPT"):
         print("Enter Valid Department Id")
         return False
     try:
-        doc_list = doc.view_all_doctors_by_department(dept_id)
+        doc_list, next_cursor = doc.view_all_doctors_by_department(dept_id, limit, cursor)
         result = {
-            "doctors": doc_list
+            "doctors": doc_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(doc_list)} Doctor Successfully")
         return True, result
@@ -226,7 +202,7 @@ def search_doctor_by_contact(contact):
                 "first_name" : doc_details["first_name"],
                 "last_name" : doc_details["last_name"],
                 "gender" : doc_details["gender"],
-                "dob" : doc_details["DOB"],
+                "dob" : doc_details["dob"],
                 "specialization" : doc_details["specialization"],
                 "experience" : doc_details["experience"],
                 "contact" : doc_details["contact"],
@@ -250,7 +226,7 @@ def search_doctor_by_names(fname, lname):
                 "first_name" : doc_details["first_name"],
                 "last_name" : doc_details["last_name"],
                 "gender" : doc_details["gender"],
-                "dob" : doc_details["DOB"],
+                "dob" : doc_details["dob"],
                 "specialization" : doc_details["specialization"],
                 "experience" : doc_details["experience"],
                 "contact" : doc_details["contact"],
@@ -263,3 +239,78 @@ def search_doctor_by_names(fname, lname):
     except Exception as e:
             print(f"[X] Doctor Don't Exists Or Failed To Fetch Doctor's Details With Name: {fname} {lname}. Error: {e}")
             return False, {}
+
+# -------------------
+# Bulk Roster Import
+# -------------------
+
+
+VALID_GENDERS = {"Male", "Female", "Prefer Not To Say"}
+
+def department_lookup():
+    # ✅ One map for the whole roster; a row may name its department or give its id
+    by_name = dept.department_ids_by_name()
+    return {**{dept_id.lower(): dept_id for dept_id in by_name.values()}, **by_name}
+
+def resolve_department(record, departments):
+    given = str(record.get("dept_id") or record.get("department") or "").strip()
+    return departments.get(given.lower())
+
+def check_doctor_batch(batch, departments):
+    """
+    Validates a batch of (line, record) pairs in one pass without printing
+    per row. departments: {lowercased name or id: id}.
+    Returns ([(line, row in doc.DOCTOR_COLUMNS order minus id)], [(line, reason)]).
+    """
+    valid, invalid = [], []
+    for line, record in batch:
+        fname = str(record.get("first_name") or record.get("fname") or "").title().strip()
+        lname = str(record.get("last_name") or record.get("lname") or "").title().strip()
+        gender = str(record.get("gender") or "").title().strip()
+        dob = util.parse_date(str(record.get("dob") or "").strip())
+        specialization = str(record.get("specialization") or "").title().strip()
+        experience = str(record.get("experience") or "").strip()
+        contact = str(record.get("contact") or "").strip()
+        email = str(record.get("email") or "").strip()
+        fee = str(record.get("consultation_fee") or record.get("fee") or "").strip()
+        dept_id = resolve_department(record, departments)
+        if not fname or not lname:
+            invalid.append((line, "Missing name"))
+        elif gender not in VALID_GENDERS:
+            invalid.append((line, f"Invalid gender: {gender}"))
+        elif not dob:
+            invalid.append((line, f"Invalid date of birth: {record.get('dob')}"))
+        elif not experience.isdigit():
+            invalid.append((line, f"Invalid experience: {experience}"))
+        elif not contact.isdigit():
+            invalid.append((line, f"Invalid contact: {contact}"))
+        elif not util.valid_email(email):
+            invalid.append((line, f"Invalid email: {email}"))
+        elif not fee.isdigit():
+            invalid.append((line, f"Invalid consultation fee: {fee}"))
+        elif not dept_id:
+            invalid.append((line, f"Unknown department: {record.get('dept_id') or record.get('department')}"))
+        else:
+            valid.append((line, (fname, lname, gender, dob, specialization, int(experience), int(contact), email, int(fee), dept_id)))
+    return valid, invalid
+
+def import_doctors(stream, fmt = "csv", batch_size = 500):
+    """
+    Streams a doctor roster from CSV or NDJSON (first_name, last_name,
+    gender, dob, specialization, experience, contact, email,
+    consultation_fee, and department name or dept_id). Departments are
+    resolved from one map loaded up front; each batch costs one contact
+    lookup and one multi-row INSERT. Returns (success, report dict).
+    """
+    departments = []
+
+    def check(batch):
+        # Loaded on the first batch, so a failed lookup is reported like any other import error
+        if not departments:
+            departments.append(department_lookup())
+        return check_doctor_batch(batch, departments[0])
+
+    return imports.run_import(
+        "Doctor", stream, fmt, batch_size, check,
+        key=lambda row: row[6], insert=doc.insert_doctor_batch, id_prefix="doctor"
+    )
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import database.db_export as exp
+import backend.utils as util
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+LINES_PER_CHUNK = 500
+
+
+def _plain(value):
+    # Dates, times and Decimals as text; MySQL TIME comes back as timedelta
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n"
+
+def _csv_lines(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(map(_plain, row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _chunked(lines):
+    # ✅ Fewer, larger writes to the socket than one per row
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def export_table(table, fmt = "ndjson", since = None, until = None):
+    """
+    Validates an export request. Returns (True, {"mimetype", "body"}) where
+    body is a generator of text chunks, or (False, {"message"}).
+    """
+    if table not in exp.EXPORTS:
+        print(f"[X] Unknown Export: {table}")
+        return False, {"message": f"Unknown export '{table}'"}
+    if fmt not in FORMATS:
+        print(f"[X] Unknown Export Format: {fmt}")
+        return False, {"message": f"Format must be one of {', '.join(FORMATS)}"}
+
+    dates = {}
+    for name, value in (("since", since), ("until", until)):
+        if value:
+            dates[name] = util.parse_date(value)
+            if not dates[name]:
+                print(f"Valid Date Not Given: {value}")
+                return False, {"message": f"Enter valid {name} date"}
+
+    columns = exp.export_columns(table)
+    rows = exp.export_rows(table, dates.get("since"), dates.get("until"))
+    lines = _csv_lines(columns, rows) if fmt == "csv" else _ndjson_lines(columns, rows)
+    return True, {"mimetype": FORMATS[fmt], "body": _chunked(lines)}
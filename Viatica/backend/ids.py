@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from config import id_node, id_node_dir
+
+try:
+    import fcntl
+except ImportError:     # ❌ Windows: no advisory locks, so nodes fall back to a host:pid hash
+    fcntl = None
+
+
+# --------------------------------
+# Id Generator
+# --------------------------------
+
+
+NODE_COUNT = 1000           # 3 digits
+SEQUENCE_COUNT = 10000      # 4 digits -> 10M ids per second per node
+
+# ✅ Entity -> four letter prefix that validate_id() checks for
+PREFIXES = {
+    "patient": "PATI",
+    "doctor": "DOCT",
+    "appointment": "APPO",
+    "availability": "AVAI",
+    "department": "DEPT",
+    "visit": "VISI",
+}
+
+def node_range(spec):
+    # ID_NODE is one node ("7") or this host's block of nodes ("100-199"); unset means the whole space
+    if spec is None or str(spec).strip() == "":
+        return 0, NODE_COUNT - 1
+    low, _, high = str(spec).partition("-")
+    low, high = int(low), int(high or low)
+    if not 0 <= low <= high < NODE_COUNT:
+        raise ValueError(f"ID_NODE must be a node or range within 0-{NODE_COUNT - 1}, got {spec!r}")
+    return low, high
+
+def claim_node(low, high, directory):
+    """
+    Locks the first free node in low..high with a lock file per node, held
+    for the life of the process, so no two live processes on this host
+    share a node. Returns (node, lock file).
+    """
+    if fcntl is None:
+        print("[!] No File Locks On This Platform; Id Node Picked By Hash And May Collide. Set ID_NODE Per Process.")
+        seed = f"{os.uname().nodename if hasattr(os, 'uname') else ''}:{os.getpid()}"
+        return low + zlib.crc32(seed.encode()) % (high - low + 1), None
+    os.makedirs(directory, exist_ok=True)
+    for node in range(low, high + 1):
+        lock_file = open(os.path.join(directory, f"node-{node:03d}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        return node, lock_file
+    raise RuntimeError(f"Every id node in {low}-{high} is held by a live process under {directory}")
+
+
+class IdGenerator:
+    """
+    Snowflake-style ids without coordination: UTC timestamp to the
+    millisecond, then node, then a per-millisecond sequence, all fixed
+    width decimal. Ids from one process are strictly increasing and sort by
+    creation time as plain strings. Ids are unique as long as no two live
+    processes hold the same node: claim_node() guarantees that on one host
+    (forked workers included), and giving each host its own ID_NODE range
+    extends it across hosts. Without ID_NODE every host draws from 0-999
+    and two hosts can collide. The node is claimed on the first id, so
+    importing this module takes no lock file.
+
+        PATI 20261018093015123 042 0007
+             time (ms, UTC)    node seq
+    """
+
+    def __init__(self, spec=None, directory=None):
+        self.low, self.high = node_range(spec)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self.node, self._node_lock = None, None
+        self._last_ms = 0
+        self._sequence = 0
+        self._second = None
+        self._second_text = ""
+
+    def _next(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting from the last one
+                self._sequence += 1
+                if self._sequence >= SEQUENCE_COUNT:
+                    # ✅ Borrow the next millisecond instead of sleeping; the clock catches up
+                    self._last_ms += 1
+                    self._sequence = 0
+            # ✅ Formatted under the lock, so the cached second always matches this id's millisecond
+            return self._timestamp(self._last_ms), self._sequence
+
+    def _timestamp(self, ms):
+        # caller holds _lock
+        second, millis = divmod(ms, 1000)
+        if second != self._second:
+            # Formatting dominates the cost, so reuse it for every id in the same second
+            self._second_text = datetime.fromtimestamp(second, timezone.utc).strftime("%Y%m%d%H%M%S")
+            self._second = second
+        return f"{self._second_text}{millis:03d}"
+
+    def _claim(self):
+        # ❌ Raises RuntimeError when every node in the range is taken, rather than share one
+        with self._claim_lock:
+            if self.node is None:
+                self.node, self._node_lock = claim_node(self.low, self.high, self.directory)
+        return self.node
+
+    def generate(self, prefix):
+        node = self.node if self.node is not None else self._claim()
+        stamp, sequence = self._next()
+        return f"{prefix}{stamp}{node:03d}{sequence:04d}"
+
+    def reseed(self):
+        # Called in a forked child: the parent still holds its node, so the child claims its own on first use
+        self._lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self.node, self._node_lock = None, None
+
+
+generator = IdGenerator(id_node, id_node_dir)
+
+def startup_warning():
+    # For the app's startup log; None when ID_NODE is set
+    if id_node:
+        return None
+    return "[!] ID_NODE Not Set; Id Nodes Are Unique On This Host Only. Give Each Host Its Own Range."
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=generator.reseed)
+
+def prefix_for(entity):
+    entity = entity.lower().strip()
+    return PREFIXES.get(entity, entity.upper()[:4])
+
+def new_id(entity):
+    return generator.generate(prefix_for(entity))
@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+import sys
+import time
+import backend.utils as util
+
+
+# --------------------------------
+# Streaming Import Helpers
+# --------------------------------
+
+
+FORMATS = ["csv", "ndjson"]
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_REJECTS = 1000     # the count keeps going; only the first ones carry details
+
+
+def read_records(stream, fmt = "csv"):
+    """
+    Yields (line number, record dict or None, error) from a text stream,
+    one row at a time, so a file of any size is never held in memory.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, {k.strip().lower(): v for k, v in record.items() if k}, None
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, {str(k).lower(): v for k, v in record.items()}, None
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def text_stream(binary):
+    # ✅ Decode request bodies and files lazily; utf-8-sig drops a spreadsheet's BOM
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+class ImportReport:
+    """
+    Running totals for one import. Rejected rows keep their line number
+    and reason so the sender can fix and resend just those.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected_count = 0
+        self.rejected = []
+
+    def reject(self, line, reason):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTS:
+            self.rejected.append({"line": line, "reason": reason})
+
+    def as_dict(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected_count": self.rejected_count,
+            "rejected": self.rejected,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.read / seconds, 1) if seconds else 0.0,
+        }
+
+
+def run_import(entity, stream, fmt, batch_size, check, key, insert, id_prefix):
+    """
+    The loop every bulk import shares: read the stream in batches, reject
+    unparseable rows, validate with check(batch of (line, record)) ->
+    (valid [(line, row)], invalid [(line, reason)]), drop rows whose key(row)
+    was already seen in this file, give the rest a new id and hand them to
+    insert(rows) -> (inserted, ...) or None when the batch failed.
+    Returns (success, report dict).
+    """
+    report = ImportReport()
+    if fmt not in FORMATS:
+        print(f"[X] Unknown Import Format: {fmt}")
+        report.reject(0, f"Format must be one of {', '.join(FORMATS)}")
+        return False, report.as_dict()
+
+    batch_size = util.clamp_batch_size(batch_size, DEFAULT_BATCH_SIZE)
+    seen = set()        # keys from earlier batches of this file
+    failed_batches = 0
+    try:
+        for batch in batched(read_records(stream, fmt), batch_size):
+            report.read += len(batch)
+            parsed = []
+            for line, record, error in batch:
+                if error:
+                    report.reject(line, error)
+                else:
+                    parsed.append((line, record))
+
+            valid, invalid = check(parsed)
+            for line, reason in invalid:
+                report.reject(line, reason)
+
+            rows, lines = [], []
+            for line, row in valid:
+                if key(row) in seen:
+                    report.duplicates += 1
+                    continue
+                seen.add(key(row))
+                rows.append((util.generate_id(id_prefix),) + row)
+                lines.append(line)
+
+            result = insert(rows)
+            if result is None:
+                failed_batches += 1
+                for line in lines:
+                    report.reject(line, "Database error; resend this row")
+                continue
+            inserted, _ = result
+            report.inserted += inserted
+            report.duplicates += len(rows) - inserted
+    except Exception as e:
+        print(f"[X] {entity} Import Stopped After {report.read} Rows. Error: {e}")
+        report.reject(report.read, f"Import stopped: {e}")
+        return False, report.as_dict()
+
+    summary = report.as_dict()
+    print(f"[✓] Imported {summary['inserted']} {entity}s ({summary['duplicates']} Duplicates, "
+          f"{summary['rejected_count']} Rejected) At {summary['rows_per_second']} Rows/s")
+    return failed_batches == 0, summary
+
+
+def importers():
+    # Imported here so backend modules can use the helpers above without a cycle
+    import backend.patient as patient
+    import backend.doctor as doctor
+    return {"patients": patient.import_patients, "doctors": doctor.import_doctors}
+
+
+if __name__ == "__main__":
+    # python -m backend.imports patients clinic.csv [csv|ndjson]
+    if len(sys.argv) < 3 or sys.argv[1] not in importers():
+        print(f"[X] Usage: python -m backend.imports {{{'|'.join(importers())}}} FILE [{'|'.join(FORMATS)}]")
+        sys.exit(2)
+    kind, path = sys.argv[1], sys.argv[2]
+    fmt = sys.argv[3] if len(sys.argv) > 3 else ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(path, "rb") as source:
+        success, report = importers()[kind](text_stream(source), fmt)
+    for rejected in report["rejected"]:
+        print(f"[!] Line {rejected['line']}: {rejected['reason']}")
+    print(f"[{'✓' if success else 'X'}] Read {report['read']}, Inserted {report['inserted']}, "
+          f"Duplicates {report['duplicates']}, Rejected {report['rejected_count']} "
+          f"In {report['seconds']}s ({report['rows_per_second']} Rows/s)")
+    sys.exit(0 if success else 1)
@@ -1,40 +1,52 @@
 import database.db_patients as pt
+import backend.imports as imports
 import backend.utils as util
 
-def add_patient(name, gender, age, blood_grp, contact):
+def clean_patient(name, gender, age, blood_grp, contact):
     name = name.title().strip()
     gender = gender.title().strip()
     valid_gender = ["Male", "Female", "Prefer Not To Say"]
 
     if gender not in valid_gender:
         print(f"[X] Invalid Gender: {gender}")
-        return False
+        return None
     
     blood_grp = blood_grp.upper().strip()
     valid_bg = [ "A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-" ]
 
     if not str(contact).isdigit():
             print(f"Enter Valid Contact Number ")
-            return False
-    
-    if pt.patient_exists_contact(contact):
-        print("Patient Exists Already")
-        return False
+            return None
     
     if not str(age).isdigit():
             print(f"Enter Valid Age")
-            return False
+            return None
     
     if blood_grp not in valid_bg:
         print(f"[X] Invalid Blood Group: {blood_grp}")
+        return None
+
+    return {
+        "name": name,
+        "gender": gender,
+        "age": int(age),
+        "blood_group": blood_grp,
+        "contact": int(contact)
+    }
+
+def add_patient(name, gender, age, blood_grp, contact):
+    patient = clean_patient(name, gender, age, blood_grp, contact)
+    if not patient:
+        return False
+    
+    if pt.patient_exists_contact(patient["contact"]):
+        print("Patient Exists Already")
         return False
     
     try:
         patient_id = util.generate_id("patient")
-        age = int(age)
-        contact = int(contact)
-        pt.insert_patient(patient_id, name,gender,age,blood_grp,contact)
-        print(f"Patient Successfully Added: {name}")
+        pt.insert_patient(patient_id, patient["name"], patient["gender"], patient["age"], patient["blood_group"], patient["contact"])
+        print(f"Patient Successfully Added: {patient['name']}")
         return True
     
     except Exception as e:
@@ -59,56 +71,49 @@ def delete_patient(patient_id):
         print(f"[X] Patient Don't Exists With Id: {patient_id}")
         return False
     
-def update_patient_details(patient_id, name = None, gender = None, age = None, contact = None, blood_grp = None):
-
+def update_patient_details(patient_id, name = None, gender = None, age = None, contact = None, blood_grp = None, version = None):
+    """
+    Validates every given field, then writes them in one UPDATE. Pass the
+    version read with the patient to reject edits made on stale data.
+    Returns (success, {"outcome", "version"}).
+    """
     if not util.validate_id(patient_id, "PATI"):
         print("Enter Valid Patient ID")
-        return False
+        return False, {"outcome": "invalid"}
 
     valid_gender = ["Male", "Female", "Prefer Not To Say"]
     valid_bg = [ "A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-" ]
-    if pt.patient_exists_id(patient_id):
-        try:
-            if name:
-                name = name.title().strip()
-                pt.update_patient_name(patient_id,name)
-                print(f"Patient's Name Successfully Updated: {name}")
-            if gender:
-                gender = gender.title().strip()
-                if gender not in valid_gender:
-                    print(f"[X] Invalid Gender: {gender}")
-                    return False
-                pt.update_patient_gender(patient_id,gender)
-                print(f"Patient's Gender Successfully Updated: {gender}")
-            if age:
-                if not str(age).isdigit():
-                    print(f"Enter Valid Age")
-                    return False
-                age = int(age)
-                pt.update_patient_age(patient_id, age)
-                print(f"Patient's Age Successfully Updated: {age}")
-            if contact:
-                if not str(contact).isdigit():
-                    print(f"Enter Valid Contact Number ")
-                    return False
-                contact = int(contact)
-                pt.update_patient_contact(patient_id, contact)
-                print(f"Patient's Contact Successfully Updated: {contact}")
-            if blood_grp:
-                blood_grp = blood_grp.upper().strip()
-                if blood_grp not in valid_bg:
-                    print(f"[X] Invalid Blood Group: {blood_grp}")
-                    return False
-                pt.update_patient_blood_group(patient_id, blood_grp)
-                print(f"Patient's Blood Group Successfully Updated: {blood_grp}")
-            return True
-        except Exception as e:
-            print(f"[X] Failed To Update Patient With Id: {patient_id}. Error: {e}")
-            return False
-    else:
-        print(f"[X] Patient Don't Exists With Id: {patient_id}")
-        return False
-    
+    changes = {}
+    if name:
+        changes["name"] = name.title().strip()
+    if gender:
+        gender = gender.title().strip()
+        if gender not in valid_gender:
+            print(f"[X] Invalid Gender: {gender}")
+            return False, {"outcome": "invalid"}
+        changes["gender"] = gender
+    if age:
+        if not str(age).isdigit():
+            print(f"Enter Valid Age")
+            return False, {"outcome": "invalid"}
+        changes["age"] = int(age)
+    if contact:
+        if not str(contact).isdigit():
+            print(f"Enter Valid Contact Number ")
+            return False, {"outcome": "invalid"}
+        changes["contact"] = int(contact)
+    if blood_grp:
+        blood_grp = blood_grp.upper().strip()
+        if blood_grp not in valid_bg:
+            print(f"[X] Invalid Blood Group: {blood_grp}")
+            return False, {"outcome": "invalid"}
+        changes["blood_group"] = blood_grp
+
+    outcome, new_version = pt.update_patient(patient_id, changes, version)
+    if outcome == "updated":
+        print(f"Patient's Details Successfully Updated: {', '.join(changes)}")
+    return outcome == "updated", {"outcome": outcome, "version": new_version}
+
 def view_one_patient(patient_id):
     if not util.validate_id(patient_id, "PATI"):
         print("Enter Valid Patient ID")
@@ -123,7 +128,8 @@ def view_one_patient(patient_id):
                 "gender" : patient_details["gender"],
                 "age" : patient_details["age"],
                 "blood_group" : patient_details["blood_group"],
-                "contact" : patient_details["contact"]
+                "contact" : patient_details["contact"],
+                "version" : patient_details["version"]
             }
             print(f"Patient's Details Successfully Fetched With Id: {patient_id}")
             return True, result
@@ -134,11 +140,12 @@ def view_one_patient(patient_id):
         print(f"[X] Patient Don't Exists With Id: {patient_id}")
         return False, {}
     
-def view_all_patient():
+def view_all_patient(limit = 100, cursor = None):
     try:
-        patients_list = pt.view_all_patients()
+        patients_list, next_cursor = pt.view_all_patients(limit, cursor)
         result = {
-            "patients": patients_list
+            "patients": patients_list,
+            "next_cursor": next_cursor
         }
         print(f"[✓] Fetched {len(patients_list)} Patients Successfully")
         return True, result
@@ -187,3 +194,50 @@ def search_patient_by_blood_group(blood_group):
     except Exception as e:
         print(f"[X] Failed To Fetch Patients With Blood Group: {blood_group}. Error: {e}")
         return False, {"patients": []}
+
+# -------------------
+# Bulk Import
+# -------------------
+
+
+VALID_GENDERS = {"Male", "Female", "Prefer Not To Say"}
+VALID_BLOOD_GROUPS = {"A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"}
+
+def check_patient_batch(batch):
+    """
+    Validates a batch of (line, record) pairs in one pass without printing
+    per row. Returns ([(line, cleaned tuple)], [(line, reason)]).
+    """
+    valid, invalid = [], []
+    for line, record in batch:
+        name = str(record.get("name") or "").title().strip()
+        gender = str(record.get("gender") or "").title().strip()
+        blood_grp = str(record.get("blood_group") or record.get("blood_grp") or "").upper().strip()
+        age = str(record.get("age") or "").strip()
+        contact = str(record.get("contact") or "").strip()
+        if not name:
+            invalid.append((line, "Missing name"))
+        elif gender not in VALID_GENDERS:
+            invalid.append((line, f"Invalid gender: {gender}"))
+        elif blood_grp not in VALID_BLOOD_GROUPS:
+            invalid.append((line, f"Invalid blood group: {blood_grp}"))
+        elif not age.isdigit():
+            invalid.append((line, f"Invalid age: {age}"))
+        elif not contact.isdigit():
+            invalid.append((line, f"Invalid contact: {contact}"))
+        else:
+            valid.append((line, (name, gender, int(age), blood_grp, int(contact))))
+    return valid, invalid
+
+def import_patients(stream, fmt = "csv", batch_size = 1000):
+    """
+    Streams patients from CSV (header: name,gender,age,blood_group,contact)
+    or NDJSON and inserts them batch by batch: one validation pass, one
+    contact lookup and one multi-row INSERT per batch. Contacts already on
+    file, or repeated within the file, count as duplicates.
+    Returns (success, report dict).
+    """
+    return imports.run_import(
+        "Patient", stream, fmt, batch_size, check_patient_batch,
+        key=lambda row: row[4], insert=pt.insert_patient_batch, id_prefix="patient"
+    )
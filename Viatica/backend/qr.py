@@ -1,6 +1,8 @@
 from database import db_qr as qr
+import database.qr_store as qr_store
 import backend.patient as pt
 import backend.utils as util
+import backend.qr_queue as qr_queue
 
 
 def generating_qr(patient_id):
@@ -8,16 +10,56 @@ def generating_qr(patient_id):
         print("Enter Valid Patient ID")
         return False
     if qr.qr_exists(patient_id):
-        success = qr.image_exists(patient_id)
-        if success:
-            print(f"✅ QR already exists for Patient {patient_id}")
-            return False
-        else:
-            print(f"⚠️ QR record exists but image missing. Regenerating image...")
-            qr.delete_qr(patient_id)    
-            
+        # ✅ The image is rendered when first requested, so a record is all a patient needs
+        print(f"✅ QR already exists for Patient {patient_id}")
+        return False
+
     qr.create_patient_qr(patient_id)
     return True
 
+def ensure_qr(patient_id, force = False):
+    """
+    Job body for the QR worker. Makes sure the patient has an active QR;
+    images stay lazy and are rendered on first request. force re-renders
+    the stored images with the same qr_id, so printed cards keep working.
+    Returns True when done, False to retry.
+    """
+    qr_id = qr.active_qr_id(patient_id)
+    if qr_id is None:
+        return qr.create_patient_qr(patient_id) is not None
+    if force:
+        for fmt in qr_store.FORMATS:
+            qr_store.store.get(qr_id, fmt, rerender=True)
+    return True
+
+def request_qr(patient_id):
+    # ✅ Booking only queues the job; the QR worker issues the record
+    if not util.validate_id(patient_id, "PATI"):
+        print("Enter Valid Patient ID")
+        return False
+    return qr_queue.enqueue(patient_id)
+
+def qr_image(patient_id, fmt = "png"):
+    """
+    Returns (True, {"data", "etag", "mimetype"}) for the patient's active QR,
+    rendered on first use, or (False, {"outcome"}) with outcome "invalid",
+    "not_found" or "error".
+    """
+    if not util.validate_id(patient_id, "PATI"):
+        print("Enter Valid Patient ID")
+        return False, {"outcome": "invalid"}
+    if fmt not in qr_store.FORMATS:
+        print(f"[X] Unknown QR Format: {fmt}")
+        return False, {"outcome": "invalid"}
+    try:
+        qr_id = qr.active_qr_id(patient_id)
+        if qr_id is None:
+            return False, {"outcome": "not_found"}
+        data, address = qr_store.store.get(qr_id, fmt)
+        return True, {"data": data, "etag": address, "mimetype": qr_store.FORMATS[fmt]}
+    except Exception as e:
+        print(f"[X] Failed To Load QR For Patient {patient_id}. Error: {e}")
+        return False, {"outcome": "error"}
+
 def delete_qr(patient_id):
     pass
\ No newline at end of file
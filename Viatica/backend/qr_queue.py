@@ -0,0 +1,441 @@
+import atexit
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import qr_queue_config
+
+
+# --------------------------------
+# Persistent Job Queue
+# --------------------------------
+
+
+class JobQueue:
+    """
+    QR jobs in a local SQLite file, so queued work survives a restart and
+    several app processes on one host can share the queue. A patient has at
+    most one pending job, and a pending job waits while the same patient
+    has one running, so a request made mid-render is not lost. Failed jobs
+    are retried with exponential backoff and parked as 'failed' after
+    max_attempts.
+    """
+
+    def __init__(self, path, max_attempts=5, retry_after=2.0, stale_after=300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_after = retry_after
+        self.stale_after = stale_after      # a render takes milliseconds; this long means its process died
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+                CREATE TABLE IF NOT EXISTS qr_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patient_id TEXT NOT NULL,
+                    force INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL,
+                    run_after REAL NOT NULL,
+                    claimed_at REAL,
+                    last_error TEXT
+                )
+            """
+        )
+        # ✅ Older queue files made running jobs unique too, which swallowed requests made mid-render
+        self._conn.execute("DROP INDEX IF EXISTS ux_qr_jobs_open")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_qr_jobs_pending ON qr_jobs (patient_id) WHERE status = 'pending'"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_qr_jobs_ready ON qr_jobs (status, run_after)")
+
+    def enqueue(self, patient_ids, force=False):
+        # ✅ A pending job for the same patient absorbs the new one (and picks up force);
+        # a running one has already read its force, so the request becomes a new pending job
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                    INSERT INTO qr_jobs (patient_id, force, enqueued_at, run_after) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (patient_id) WHERE status = 'pending'
+                    DO UPDATE SET force = MAX(force, excluded.force)
+                """, [(patient_id, int(force), now, now) for patient_id in patient_ids]
+            )
+
+    def claim(self, limit):
+        # Returns [(job id, patient_id, force, enqueued_at)] now marked running
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                jobs = self._conn.execute(
+                    """
+                        SELECT id, patient_id, force, enqueued_at FROM qr_jobs
+                        WHERE status = 'pending' AND run_after <= ?
+                            AND patient_id NOT IN (SELECT patient_id FROM qr_jobs WHERE status = 'running')
+                        ORDER BY run_after, id LIMIT ?
+                    """, (time.time(), limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE qr_jobs SET status = 'running', attempts = attempts + 1, claimed_at = ? WHERE id = ?",
+                    [(time.time(), job[0]) for job in jobs]
+                )
+                self._conn.execute("COMMIT")
+                return jobs
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def complete(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM qr_jobs WHERE id = ?", (job_id,))
+
+    def fail(self, job_id, error):
+        # Backoff doubles per attempt: retry_after, 2x, 4x, ...
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self._fold_into_pending("id = ?", (job_id,)):
+                    self._conn.execute(
+                        """
+                            UPDATE qr_jobs
+                            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                run_after = ? + ? * (1 << (attempts - 1)),
+                                last_error = ?
+                            WHERE id = ?
+                        """, (self.max_attempts, time.time(), self.retry_after, str(error)[:500], job_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def requeue(self, job_id):
+        # A claimed job that never started goes back to pending without spending an attempt
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self._fold_into_pending("id = ?", (job_id,)):
+                    self._conn.execute(
+                        "UPDATE qr_jobs SET status = 'pending', attempts = MAX(attempts - 1, 0) WHERE id = ?", (job_id,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def recover(self):
+        # Jobs a crashed process left running go back to pending; live processes' jobs are too recent to match
+        stale = ("status = 'running' AND claimed_at < ?", (time.time() - self.stale_after,))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                folded = self._fold_into_pending(*stale)
+                requeued = self._conn.execute(f"UPDATE qr_jobs SET status = 'pending' WHERE {stale[0]}", stale[1]).rowcount
+                self._conn.execute("COMMIT")
+                return folded + requeued
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _fold_into_pending(self, where, params):
+        # caller holds _lock inside a transaction. Jobs matching `where` whose patient already has a
+        # pending job are merged into it (force carries over) and deleted, since a second pending row
+        # for the patient would break ux_qr_jobs_pending. Returns how many were folded
+        self._conn.execute(
+            f"""
+                UPDATE qr_jobs SET force = 1
+                WHERE status = 'pending' AND force = 0 AND patient_id IN (
+                    SELECT patient_id FROM qr_jobs WHERE {where} AND force = 1
+                )
+            """, params
+        )
+        return self._conn.execute(
+            f"""
+                DELETE FROM qr_jobs
+                WHERE {where} AND patient_id IN (SELECT patient_id FROM qr_jobs WHERE status = 'pending')
+            """, params
+        ).rowcount
+
+    def depth(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*), MIN(enqueued_at) FROM qr_jobs GROUP BY status").fetchall()
+        depth = {"pending": 0, "running": 0, "failed": 0}
+        oldest = None
+        for status, count, enqueued_at in rows:
+            depth[status] = count
+            if status == "pending":
+                oldest = enqueued_at
+        depth["oldest_pending_s"] = round(time.time() - oldest, 3) if oldest else 0.0
+        return depth
+
+    def failed(self, limit=50):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT patient_id, attempts, last_error FROM qr_jobs WHERE status = 'failed' ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"patient_id": p, "attempts": a, "error": e} for p, a, e in rows]
+
+    def retry_failed(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A patient can have failed more than once; keep the oldest, with force if any had it
+                self._conn.execute(
+                    """
+                        UPDATE qr_jobs SET force = 1
+                        WHERE status = 'failed' AND patient_id IN (SELECT patient_id FROM qr_jobs WHERE status = 'failed' AND force = 1)
+                    """
+                )
+                folded = self._conn.execute(
+                    """
+                        DELETE FROM qr_jobs
+                        WHERE status = 'failed' AND id NOT IN (SELECT MIN(id) FROM qr_jobs WHERE status = 'failed' GROUP BY patient_id)
+                    """
+                ).rowcount
+                folded += self._fold_into_pending("status = 'failed'", ())
+                retried = self._conn.execute(
+                    "UPDATE qr_jobs SET status = 'pending', attempts = 0, run_after = ? WHERE status = 'failed'", (time.time(),)
+                ).rowcount
+                self._conn.execute("COMMIT")
+                return folded + retried
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+# --------------------------------
+# Worker
+# --------------------------------
+
+
+class QRWorker:
+    """
+    A dispatcher thread that claims ready jobs and renders them on a small
+    thread pool. enqueue() wakes it; otherwise it polls for retries that
+    have come due.
+    """
+
+    def __init__(self, queue, workers=2, poll_interval=0.5):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._in_flight = threading.Semaphore(workers)
+        self._latencies = deque(maxlen=1000)    # enqueue -> job done, seconds
+        self._render_times = deque(maxlen=1000)
+        self._stats = {"completed": 0, "failed_attempts": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="qr-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        next_recovery = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-render") as pool:
+            while not self._stop.is_set():
+                if time.time() >= next_recovery:
+                    next_recovery = time.time() + 60
+                    try:
+                        recovered = self.queue.recover()
+                        if recovered:
+                            print(f"[!] Requeued {recovered} QR Jobs Left Running By A Dead Process.")
+                    except Exception as e:
+                        print(f"[X] QR Job Recovery Failed \n error: {e}")
+                # ✅ Only claim what the pool can start now; the rest stays visible as pending
+                if not self._in_flight.acquire(timeout=self.poll_interval):
+                    continue        # every render still busy; loop so stop() is noticed
+                free = 1 + sum(1 for _ in range(self.workers - 1) if self._in_flight.acquire(blocking=False))
+                try:
+                    jobs = self.queue.claim(free) if free else []
+                except Exception as e:
+                    print(f"[X] QR Queue Unavailable. Retrying \n error: {e}")
+                    jobs = []
+                for _ in range(free - len(jobs)):
+                    self._in_flight.release()
+                for i, job in enumerate(jobs):
+                    try:
+                        pool.submit(self._process, *job)
+                    except RuntimeError:
+                        # ❌ Interpreter shutting down: hand back what was claimed so it is not stuck 'running'
+                        self._hand_back(jobs[i:])
+                        return
+                if not jobs:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+
+    def _hand_back(self, jobs):
+        self._stop.set()
+        for job in jobs:
+            self._in_flight.release()
+            try:
+                self.queue.requeue(job[0])
+            except Exception as e:
+                print(f"[X] Could Not Requeue QR Job {job[0]}; Recovered After {self.queue.stale_after}s \n error: {e}")
+
+    def _process(self, job_id, patient_id, force, enqueued_at):
+        import backend.qr as qr      # here, not at import: backend.qr imports this module
+        started = time.time()
+        try:
+            done = qr.ensure_qr(patient_id, bool(force))
+            error = None if done else "QR record could not be created"
+        except Exception as e:
+            done, error = False, e
+        finally:
+            self._in_flight.release()
+            self._wake.set()
+
+        with self._stats_lock:
+            if done:
+                self._stats["completed"] += 1
+                self._render_times.append(time.time() - started)
+                self._latencies.append(time.time() - enqueued_at)
+            else:
+                self._stats["failed_attempts"] += 1
+        try:
+            if done:
+                self.queue.complete(job_id)
+            else:
+                print(f"[X] QR Job For Patient {patient_id} Failed; Will Retry \n error: {error}")
+                self.queue.fail(job_id, error)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            print(f"[X] Could Not Record QR Job {job_id} Result \n error: {e}")
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            render_times = sorted(self._render_times)
+        stats["workers"] = self.workers
+        stats["worker_alive"] = bool(self._thread and self._thread.is_alive())
+        stats["latency_p50_ms"] = _percentile_ms(latencies, 50)
+        stats["latency_p95_ms"] = _percentile_ms(latencies, 95)
+        stats["render_p50_ms"] = _percentile_ms(render_times, 50)
+        stats["render_p95_ms"] = _percentile_ms(render_times, 95)
+        return stats
+
+
+def _percentile_ms(ordered, pct):
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000, 3)
+
+
+# --------------------------------
+# Module API
+# --------------------------------
+
+
+_queue = None
+_worker = None
+_setup_lock = threading.Lock()
+
+def get_worker():
+    # ✅ Built on first use, so importing this module never opens files or starts threads
+    global _queue, _worker
+    with _setup_lock:
+        if _worker is None:
+            _queue = JobQueue(qr_queue_config["path"], qr_queue_config["max_attempts"], qr_queue_config["retry_after"])
+            _worker = QRWorker(_queue, qr_queue_config["workers"])
+            # ✅ Stop claiming before the render pool closes: threading's exit hooks run last-registered
+            # first, ahead of the executor's own hook and of atexit
+            getattr(threading, "_register_atexit", atexit.register)(_worker.stop)
+    _worker.start()
+    return _worker
+
+def enqueue(patient_id, force = False):
+    return enqueue_many([patient_id], force)
+
+def enqueue_many(patient_ids, force = False):
+    worker = get_worker()
+    try:
+        worker.queue.enqueue(patient_ids, force)
+    except Exception as e:
+        print(f"[X] Could Not Queue QR Jobs. Try Again Later \n error: {e}")
+        return False
+    worker.wake()
+    return True
+
+def regenerate_all(force = True, chunk_size = 500):
+    """
+    Batch mode: queues one job per patient, page by page. With force every
+    stored image is re-rendered; without it only missing QR records are issued.
+    Returns the number of patients queued.
+    """
+    import database.db_pagination as pg
+    import database.db_patients as pt
+    queued = 0
+    chunk = []
+    for patient in pg.iterate(pt.view_all_patients, limit=pg.MAX_PAGE_SIZE):
+        chunk.append(patient["id"])
+        if len(chunk) >= chunk_size:
+            queued += len(chunk) if enqueue_many(chunk, force) else 0
+            chunk = []
+    if chunk:
+        queued += len(chunk) if enqueue_many(chunk, force) else 0
+    print(f"[✓] Queued QR Regeneration For {queued} Patients.")
+    return queued
+
+def retry_failed():
+    worker = get_worker()
+    count = worker.queue.retry_failed()
+    worker.wake()
+    return count
+
+def stats():
+    worker = get_worker()
+    return {**worker.queue.depth(), **worker.stats(), "failed_jobs": worker.queue.failed(10)}
+
+def drain(timeout = None):
+    # Blocks until nothing is pending or running; True if the queue emptied in time
+    worker = get_worker()
+    deadline = time.time() + timeout if timeout else None
+    while True:
+        depth = worker.queue.depth()
+        if not depth["pending"] and not depth["running"]:
+            return True
+        if deadline and time.time() > deadline:
+            return False
+        time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    # python -m backend.qr_queue regenerate [--missing-only] | work
+    command = sys.argv[1] if len(sys.argv) > 1 else "work"
+    if command == "regenerate":
+        regenerate_all(force="--missing-only" not in sys.argv)
+        drain()
+        print(f"[✓] QR Queue Drained: {stats()}")
+    elif command == "work":
+        get_worker()
+        print("[✓] QR Worker Running. Ctrl+C To Stop.")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            _worker.stop()
+    else:
+        print("[X] Usage: python -m backend.qr_queue {regenerate [--missing-only]|work}")
+        sys.exit(2)
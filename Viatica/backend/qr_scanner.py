@@ -0,0 +1,58 @@
+from datetime import datetime
+import database.db_qr as qr
+import database.db_visit as vis
+import backend.utils as util
+
+
+# -------------------
+# Reception Check-In
+# -------------------
+
+
+def check_in(qr_id, doctor_id = None, department_id = None, service_id = None, status = "Checked-In"):
+    """
+    Front-desk scan: resolves the QR from the in-memory active-QR map and
+    appends the visit_log row to the writer's spool, so a scan costs no
+    database round trip once the QR has been seen. The map is per process:
+    a QR deactivated on another worker is still accepted here until its
+    entry is older than checkin_config["active_qr_recheck"] seconds, after
+    which the scan re-reads the QR's status. If the spool is full or cannot
+    be written the row is written directly instead.
+    Returns (success, details) where details["outcome"] is "checked_in",
+    "invalid", "unknown_qr" or "error".
+    """
+    if not qr_id or not isinstance(qr_id, str):
+        print("[X] Enter Valid QR Code")
+        return False, {"outcome": "invalid"}
+    if doctor_id and not util.validate_id(doctor_id, "DOCT"):
+        print("Enter Valid Doctor Id")
+        return False, {"outcome": "invalid"}
+    if department_id and not util.validate_id(department_id, "DEPT"):
+        print("Enter Valid Department Id")
+        return False, {"outcome": "invalid"}
+    # Service ids carry no prefix; they only have to be plain alphanumeric strings
+    if service_id and not (util.validate_id(service_id, "") and len(service_id) <= 50):
+        print("Enter Valid Service Id")
+        return False, {"outcome": "invalid"}
+
+    patient = qr.resolve_qr(qr_id.strip())
+    if not patient:
+        print("[X] Invalid or inactive QR code.")
+        return False, {"outcome": "unknown_qr"}
+
+    scan_time = datetime.now()
+    row = (util.generate_id("visit"), patient["patient_id"], doctor_id, department_id, service_id, scan_time, status)
+    if not vis.visit_writer().submit(row):
+        # ✅ Back-pressure: write this one ourselves rather than lose it
+        try:
+            vis.insert_visits([row])
+        except Exception as e:
+            print(f"[X] Error Logging Visit. Try Again Later \n error: {e}")
+            return False, {"outcome": "error"}
+
+    return True, {
+        "outcome": "checked_in",
+        "patient_id": patient["patient_id"],
+        "name": patient["name"],
+        "scan_time": scan_time.isoformat(timespec="seconds")
+    }
@@ -1,17 +1,42 @@
+import re
 from datetime import datetime
-import random
+import backend.ids as ids
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 def valid_email(email):
-    pass
+    return isinstance(email, str) and EMAIL_PATTERN.match(email.strip()) is not None
 
 def generate_id(prefix):
-
-    prefix = prefix.upper().strip()
-    prefix = prefix[:4]
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    rand = random.randint(10, 99)
-
-    return f"{prefix}{timestamp}{rand}"
+    # ✅ Unique and time ordered even for thousands of ids per second; see backend/ids.py
+    return ids.new_id(prefix)
 
 def validate_id(entity_id, prefix):
     return isinstance(entity_id, str) and entity_id.upper().startswith(prefix) and entity_id.isalnum()
+
+def parse_date(date):
+    # Front desk sends dd/mm/YYYY, integrations send ISO dates
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(date, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+MAX_BATCH_SIZE = 10000
+
+def clamp_batch_size(batch_size, default):
+    # Request input: non-numbers fall back to the default, the rest is held to 1..MAX_BATCH_SIZE
+    try:
+        batch_size = int(batch_size)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(batch_size, MAX_BATCH_SIZE))
+
+def parse_time(time):
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(time, fmt).time()
+        except (TypeError, ValueError):
+            continue
+    return None
@@ -0,0 +1,99 @@
+"""
+Mints ids from many threads and processes at once and proves that none
+collide, that each thread sees them strictly increasing, and how many a
+process can mint per second. The old second-plus-random scheme runs
+alongside for comparison.
+
+    python -m benchmarks.bench_ids --ids 200000 --threads 8 --processes 4
+
+Needs no database. Exits non-zero on a duplicate, an out-of-order id or
+when throughput drops below --min-rate ids per second.
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def legacy_id(prefix):
+    # The generator this replaced, kept only to show its collision rate
+    return f"{prefix}{datetime.now().strftime('%Y%m%d%H%M%S')}{random.randint(10, 99)}"
+
+def mint(make, count, threads):
+    """
+    Splits `count` ids across `threads`. Returns (ids per thread, seconds).
+    """
+    per_thread = count // threads
+
+    def worker(_):
+        return [make("patient") for _ in range(per_thread)]
+
+    started = clock.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        batches = list(pool.map(worker, range(threads)))
+    return batches, clock.perf_counter() - started
+
+def ordered(batch):
+    return all(a < b for a, b in zip(batch, batch[1:]))
+
+def process_worker(args):
+    count, threads = args
+    import backend.ids as ids
+    batches, _ = mint(ids.new_id, count, threads)
+    return ids.generator.node, [i for batch in batches for i in batch]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ids", type=int, default=200000, help="ids minted per process")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4, help="forked workers, each on its own node")
+    parser.add_argument("--min-rate", type=float, default=20000.0)
+    args = parser.parse_args(argv)
+
+    import backend.ids as ids
+    import backend.utils as util
+
+    # Single process, many threads
+    batches, seconds = mint(ids.new_id, args.ids, args.threads)
+    minted = [i for batch in batches for i in batch]
+    duplicates = len(minted) - len(set(minted))
+    unordered = sum(1 for batch in batches if not ordered(batch))
+    rate = len(minted) / seconds
+    invalid = sum(1 for i in minted[:1000] if not util.validate_id(i, "PATI"))
+    print(f"threads={args.threads} ids={len(minted)} rate={rate:,.0f}/s duplicates={duplicates} "
+          f"unordered_threads={unordered} invalid={invalid} sample={minted[-1]}")
+
+    # Many processes, no coordination between them
+    cross_duplicates, nodes = 0, []
+    if args.processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        started = clock.perf_counter()
+        with context.Pool(args.processes) as pool:
+            results = pool.map(process_worker, [(args.ids, args.threads)] * args.processes)
+        seconds = clock.perf_counter() - started
+        nodes = [node for node, _ in results]
+        everything = [i for _, batch in results for i in batch]
+        cross_duplicates = len(everything) - len(set(everything))
+        print(f"processes={args.processes} nodes={nodes} ids={len(everything)} "
+              f"rate={len(everything) / seconds:,.0f}/s duplicates={cross_duplicates}")
+        if len(set(nodes)) < len(nodes):
+            # ❌ Live workers on one host must never share a node
+            print("[X] Two workers claimed the same node")
+            cross_duplicates += 1
+
+    # Old scheme, same load
+    batches, seconds = mint(legacy_id, args.ids, args.threads)
+    legacy = [i for batch in batches for i in batch]
+    print(f"legacy ids={len(legacy)} rate={len(legacy) / seconds:,.0f}/s "
+          f"duplicates={len(legacy) - len(set(legacy))}")
+
+    ok = not duplicates and not unordered and not invalid and not cross_duplicates and rate >= args.min_rate
+    print("[✓] PASS" if ok else "[X] FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import tempfile
+
+
+# --------------------------------
+# Shared Benchmark Helpers
+# --------------------------------
+
+
+def use_local_sqlite(pool_size=None):
+    """
+    Points the project at a throwaway SQLite file unless DB_ENGINE is set.
+    Must run before any project module imports config.
+    """
+    if not os.getenv("DB_ENGINE"):
+        os.environ["DB_ENGINE"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="viatica-bench-"), "bench.db")
+    if pool_size:
+        os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+    return os.environ["DB_ENGINE"]
+
+# File-backed state the app keeps beside the database; benchmarks must not touch the real ones
+SCRATCH_PATHS = {
+    "QR_QUEUE_PATH": "qr_queue.db",
+    "QR_STORE_PATH": "qrcodes",
+    "VISIT_SPOOL_PATH": "spool/visit_log",
+    "VISIT_DEAD_LETTER_PATH": "spool/visit_log_rejected.jsonl",
+    "SLOW_QUERY_LOG": "logs/slow_query.log",
+}
+
+def use_scratch_files():
+    # Like use_local_sqlite(): call before any project module imports config
+    directory = tempfile.mkdtemp(prefix="viatica-bench-files-")
+    for name, relative in SCRATCH_PATHS.items():
+        os.environ.setdefault(name, os.path.join(directory, relative))
+    return directory
+
+def quiet():
+    # The database modules print on every call; keep benchmark output readable
+    return contextlib.redirect_stdout(io.StringIO())
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(samples):
+    # samples in seconds -> milliseconds
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
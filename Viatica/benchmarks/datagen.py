@@ -0,0 +1,300 @@
+"""
+Fills a database with a synthetic hospital: departments, doctors,
+patients with QR cards, years of doctor_availability slots, appointments
+booked into them and the visit_log scans those visits produce.
+
+    python -m benchmarks.datagen --sqlite /tmp/hospital.db --patients 200000
+    python -m benchmarks.datagen --patients 2000000 --doctors 3000 --days 730     # DB_ENGINE from .env
+
+Rows are generated lazily and written in --batch chunks through the
+engine's bulk path (COPY on PostgreSQL, multi-row INSERT on MySQL), so
+memory stays flat at any volume. The same --seed and sizes always produce
+the same rows. Generated ids look like PATIG0000000042: they pass
+backend.utils.validate_id and cannot collide with minted ids, and --reset
+deletes an earlier run's rows by those prefixes.
+"""
+import argparse
+import os
+import random
+import sys
+import time as clock
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import use_local_sqlite
+
+DEPARTMENTS = [
+    "Cardiology", "Dermatology", "Emergency", "ENT", "Gastroenterology", "General Medicine",
+    "Gynecology", "Nephrology", "Neurology", "Oncology", "Ophthalmology", "Orthopedics",
+    "Pediatrics", "Psychiatry", "Pulmonology", "Radiology", "Urology", "Dental",
+]
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Diya", "Farah", "Ishaan", "Kavya", "Meera",
+    "Neha", "Nikhil", "Pooja", "Priya", "Rahul", "Riya", "Rohan", "Sanjay", "Sara", "Vikram",
+]
+LAST_NAMES = [
+    "Agarwal", "Bose", "Chopra", "Das", "Fernandes", "Gupta", "Iyer", "Joshi", "Khan", "Kumar",
+    "Menon", "Nair", "Patel", "Rao", "Reddy", "Shah", "Sharma", "Singh", "Thomas", "Verma",
+]
+GENDERS = (["Male", "Female", "Prefer Not To Say"], [49, 49, 2])
+BLOOD_GROUPS = (["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"], [38, 34, 9, 3, 7, 6, 2, 1])
+AGE_BANDS = ([(0, 12), (13, 19), (20, 39), (40, 59), (60, 79), (80, 99)], [14, 8, 30, 26, 18, 4])
+PAST_STATUSES = (["Completed", "Cancelled", "No-Show"], [85, 9, 6])
+FUTURE_STATUSES = (["Scheduled", "Cancelled"], [93, 7])
+REASONS = ["Consultation", "Follow-up", "Routine check-up", "Test results", "Prescription renewal", "New symptoms"]
+
+COLUMNS = {
+    "department": ["id", "name", "description"],
+    "doctor": ["id", "first_name", "last_name", "gender", "dob", "specialization", "experience", "contact", "email", "consultation_fee", "dept_id"],
+    "patient": ["id", "name", "gender", "age", "blood_group", "contact"],
+    "patient_qr": ["qr_id", "patient_id", "issued_date", "status"],
+    "doctor_availability": ["id", "doctor_id", "available_date", "available_time", "day_of_week", "is_booked", "appointment_id"],
+    "appointment": ["id", "patient_id", "doctor_id", "appointment_date", "appointment_time", "reason", "status"],
+    "visit_log": ["event_id", "patient_id", "doctor_id", "department_id", "service_id", "scan_time", "status"],
+}
+
+# table -> (column, LIKE pattern) that picks out generated rows for --reset; children first
+GENERATED = [
+    ("visit_log", "event_id", "VISIG%"),
+    ("appointment", "id", "APPOG%"),
+    ("doctor_availability", "id", "AVAIG%"),
+    ("patient_qr", "patient_id", "PATIG%"),
+    ("patient", "id", "PATIG%"),
+    ("doctor", "id", "DOCTG%"),
+    ("department", "id", "DEPTG%"),
+]
+
+
+def gid(prefix, n):
+    # Prefix + "G" + sequence: alphanumeric like minted ids, shorter, so the two never meet
+    return f"{prefix}G{n:010d}"
+
+def pick(rng, choices):
+    values, weights = choices
+    return rng.choices(values, weights)[0]
+
+
+# --------------------------------
+# Bulk Loader
+# --------------------------------
+
+
+class Loader:
+    """
+    Buffers rows per table and hands each full chunk to the dialect's bulk
+    path. Commits every commit_rows rows: few enough commits that fsync
+    is not the bottleneck, and no transaction grows with the dataset.
+    """
+
+    def __init__(self, db, batch, commit_rows=50000):
+        self.dialect = db.dialect()
+        self.conn = db.get_connection()
+        self.cursor = self.conn.cursor()
+        self.batch = batch
+        self.commit_rows = commit_rows
+        self.uncommitted = 0
+        self.buffers = defaultdict(list)
+        self.counts = defaultdict(int)
+
+    def add(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch:
+            self.flush(table)
+
+    def flush(self, table=None):
+        for name in [table] if table else list(self.buffers):
+            rows = self.buffers[name]
+            if rows:
+                self.dialect.bulk_load(self.cursor, name, COLUMNS[name], rows)
+                self.counts[name] += len(rows)
+                self.uncommitted += len(rows)
+                self.buffers[name] = []
+        if self.uncommitted >= self.commit_rows or table is None:
+            self.conn.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.cursor.close()
+            self.conn.close()
+
+
+# --------------------------------
+# Generators
+# --------------------------------
+
+
+def gen_departments(args):
+    names = DEPARTMENTS + [f"Department {i}" for i in range(len(DEPARTMENTS), args.departments)]
+    for i, name in enumerate(names[:args.departments]):
+        yield (gid("DEPT", i), name, f"{name} department")
+
+def gen_doctors(args, rng):
+    # A few large departments and a long tail of small ones
+    weights = [1 / (k + 1) ** 0.7 for k in range(args.departments)]
+    names = [row[1] for row in gen_departments(args)]
+    for i in range(args.doctors):
+        dept = rng.choices(range(args.departments), weights)[0]
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (
+            gid("DOCT", i), first, last, pick(rng, (GENDERS[0][:2], [1, 1])),
+            date(1955 + rng.randint(0, 40), rng.randint(1, 12), rng.randint(1, 28)),
+            names[dept], rng.randint(1, 35), 6_100_000_000 + i,
+            f"{first}.{last}.{i}@hospital.example".lower(), rng.choice(range(300, 2001, 100)), gid("DEPT", dept)
+        )
+
+def gen_patients(args, rng):
+    for i in range(args.patients):
+        low, high = pick(rng, AGE_BANDS)
+        yield (
+            gid("PATI", i), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", pick(rng, GENDERS),
+            rng.randint(low, high), pick(rng, BLOOD_GROUPS), 9_100_000_000 + i
+        )
+
+def gen_patient_qrs(args, rng, first_day):
+    span = (date.today() - first_day).days + 1
+    for i in range(args.patients):
+        issued = datetime.combine(first_day + timedelta(days=rng.randrange(span)), datetime.min.time())
+        yield (str(uuid.UUID(int=rng.getrandbits(128), version=4)), gid("PATI", i), issued, "Active")
+
+def gen_schedule(args, rng, doctor_depts, first_day):
+    """
+    Walks every doctor's working days and yields (table, row) for each
+    slot, the appointment booked into it and, for completed visits, the
+    check-in and consultation scans. Past days are mostly booked; the
+    future fills up less the further out it is.
+    """
+    today = date.today()
+    counters = defaultdict(int)
+    slot_times = [
+        (datetime.combine(today, datetime.min.time()) + timedelta(hours=9, minutes=15 * s)).time()
+        for s in range(args.slots_per_day)
+    ]
+    for d, dept_id in enumerate(doctor_depts):
+        doctor_id = gid("DOCT", d)
+        day_off = d % 6                 # one weekday off each, plus Sundays
+        for offset in range(args.days):
+            day = first_day + timedelta(days=offset)
+            if day.weekday() == 6 or day.weekday() == day_off:
+                continue
+            weekday = day.strftime("%A")
+            ahead = (day - today).days
+            booked_share = 0.75 if ahead < 0 else max(0.05, 0.6 - 0.55 * ahead / max(args.future_days, 1))
+            for slot_time in slot_times:
+                slot_id = gid("AVAI", counters["slot"])
+                counters["slot"] += 1
+                if rng.random() >= booked_share:
+                    yield "doctor_availability", (slot_id, doctor_id, day, slot_time, weekday, False, None)
+                    continue
+
+                appointment_id = gid("APPO", counters["appointment"])
+                counters["appointment"] += 1
+                # Regulars: low patient numbers come back far more often
+                patient_id = gid("PATI", int(args.patients * rng.random() ** 1.6))
+                status = pick(rng, PAST_STATUSES if ahead < 0 else FUTURE_STATUSES)
+                booked = status != "Cancelled"
+                yield "doctor_availability", (
+                    slot_id, doctor_id, day, slot_time, weekday, booked, appointment_id if booked else None
+                )
+                yield "appointment", (appointment_id, patient_id, doctor_id, day, slot_time, rng.choice(REASONS), status)
+
+                if status == "Completed" and args.visits:
+                    slot_at = datetime.combine(day, slot_time)
+                    checked_in = slot_at - timedelta(minutes=rng.randint(0, 25), seconds=rng.randint(0, 59))
+                    seen = slot_at + timedelta(minutes=rng.randint(0, 45), seconds=rng.randint(0, 59))
+                    for scan_time, scan_status in ((checked_in, "Checked-In"), (seen, "Consulted")):
+                        yield "visit_log", (
+                            gid("VISI", counters["visit"]), patient_id, doctor_id, dept_id, None, scan_time, scan_status
+                        )
+                        counters["visit"] += 1
+
+
+# --------------------------------
+# Runner
+# --------------------------------
+
+
+def reset(db):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        for table, column, pattern in GENERATED:
+            cursor.execute(f"DELETE FROM {table} WHERE {column} LIKE %s", (pattern,))
+            print(f"[✓] Removed {max(cursor.rowcount, 0)} Generated Rows From {table}")
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def load(loader, table_rows, label):
+    started = clock.perf_counter()
+    before = dict(loader.counts)
+    for item in table_rows:
+        loader.add(*item)
+    loader.flush()
+    elapsed = clock.perf_counter() - started
+    for table, count in loader.counts.items():
+        added = count - before.get(table, 0)
+        if added:
+            print(f"[✓] {table}: {added:,} Rows In {elapsed:.1f}s ({added / elapsed:,.0f}/s) [{label}]")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--departments", type=int, default=len(DEPARTMENTS))
+    parser.add_argument("--days", type=int, default=365, help="days of doctor_availability, ending --future-days after today")
+    parser.add_argument("--future-days", type=int, default=60)
+    parser.add_argument("--slots-per-day", type=int, default=16, help="15-minute slots from 09:00")
+    parser.add_argument("--no-visits", dest="visits", action="store_false", help="skip visit_log scans")
+    parser.add_argument("--batch", type=int, default=5000, help="rows per bulk insert")
+    parser.add_argument("--commit-rows", type=int, default=50000, help="rows per transaction")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", help="write to this SQLite file instead of the configured database")
+    parser.add_argument("--reset", action="store_true", help="delete previously generated rows first")
+    args = parser.parse_args(argv)
+    if args.slots_per_day > 60 or args.future_days >= args.days:
+        print("[X] --slots-per-day must be at most 60 and --future-days below --days")
+        return 2
+
+    if args.sqlite:
+        os.environ["DB_ENGINE"] = "sqlite"
+        os.environ["SQLITE_PATH"] = args.sqlite
+    engine = use_local_sqlite()
+    import database.db_connection as db
+    import database.db_migrate as migrations
+
+    if not migrations.migrate():
+        return 1
+    if args.reset:
+        reset(db)
+
+    # ✅ One stream per table, each from its own seed, so changing --batch or skipping visits changes nothing else
+    streams = lambda name: random.Random(f"{args.seed}:{name}")
+    first_day = date.today() + timedelta(days=args.future_days - args.days + 1)
+    doctor_depts = [row[-1] for row in gen_doctors(args, streams("doctor"))]
+
+    started = clock.perf_counter()
+    loader = Loader(db, args.batch, args.commit_rows)
+    try:
+        load(loader, (("department", row) for row in gen_departments(args)), "departments")
+        load(loader, (("doctor", row) for row in gen_doctors(args, streams("doctor"))), "doctors")
+        load(loader, (("patient", row) for row in gen_patients(args, streams("patient"))), "patients")
+        load(loader, (("patient_qr", row) for row in gen_patient_qrs(args, streams("qr"), first_day)), "qr cards")
+        load(loader, gen_schedule(args, streams("schedule"), doctor_depts, first_day), "schedule")
+    finally:
+        loader.close()
+
+    total = sum(loader.counts.values())
+    where = os.environ.get("SQLITE_PATH") if engine == "sqlite" else engine
+    print(f"[✓] Generated {total:,} Rows Into {where} In {clock.perf_counter() - started:.1f}s (seed={args.seed})")
+    print("[!] Visit rollups are not updated here; run: python -m database.db_analytics rebuild")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
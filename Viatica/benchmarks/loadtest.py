@@ -0,0 +1,477 @@
+"""
+Replays a hospital day of mixed traffic against the Flask app and reports
+throughput, latency percentiles and error rates per route.
+
+    python -m benchmarks.loadtest --duration 60 --workers 16                  # closed loop, as fast as the app allows
+    python -m benchmarks.loadtest --rate 150 --workers 64 --pool-size 20     # open loop: 150 req/s at intensity 1
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --rate 300     # a running server (gunicorn, ...)
+    python -m benchmarks.loadtest --mix day.json                             # a custom day, same shape as DAY
+
+The day is compressed into --duration seconds and split into phases:
+a morning check-in burst, a booking storm, the clinic itself and an
+evening of dashboard reads. Each phase has a share of the run, a traffic
+intensity and a weighted mix of actions. With --rate, requests arrive on
+a seeded Poisson schedule at rate x intensity and latency is measured
+from the scheduled arrival, so queueing behind busy workers is counted.
+Without it every worker sends back to back and intensity sets how many
+of them are active.
+
+Runs in-process through the Flask test client against a throwaway SQLite
+file unless DB_ENGINE points elsewhere; --url drives a real server that
+shares the configured database instead. If the database holds no
+benchmarks.datagen rows yet, a small dataset is generated first. 4xx
+answers (a slot already taken, an unknown QR) are counted as rejected,
+5xx answers and transport failures as errors. Exits non-zero when the
+error rate exceeds --max-error-rate.
+"""
+import argparse
+import http.client
+import json
+import math
+import random
+import sys
+import threading
+import time as clock
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlsplit
+
+from benchmarks.common import use_local_sqlite, use_scratch_files, quiet, summarize
+
+DAY = [
+    {"name": "opening", "share": 0.2, "intensity": 2.0,
+     "mix": {"check_in": 60, "find_patient": 15, "free_slots": 15, "book": 10}},
+    {"name": "booking_storm", "share": 0.2, "intensity": 1.5,
+     "mix": {"book": 45, "next_slots": 20, "free_slots": 20, "find_patient": 10, "check_in": 5}},
+    {"name": "clinic", "share": 0.4, "intensity": 1.0,
+     "mix": {"check_in": 30, "book": 15, "free_slots": 15, "find_patient": 15, "list_patients": 10,
+             "visit_report": 10, "analytics_status": 5}},
+    {"name": "dashboards", "share": 0.2, "intensity": 0.6,
+     "mix": {"visit_report": 25, "list_patients": 20, "check_in": 20, "hourly_report": 15,
+             "analytics_status": 10, "pool_status": 10}},
+]
+REASONS = ["Consultation", "Follow-up", "Review of reports", "Fever", "Routine check-up"]
+BOOKING_DAYS = 7        # bookings and slot lookups aim at the next week of open slots
+
+
+# --------------------------------
+# Dataset
+# --------------------------------
+
+
+def ensure_dataset(db, args):
+    # ✅ Reuse a datagen dataset when there is one; otherwise generate a small one
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM doctor WHERE id LIKE %s", ("DOCTG%",))
+        if cursor.fetchone()[0]:
+            return False
+    finally:
+        cursor.close()
+        conn.close()
+
+    import benchmarks.datagen as datagen
+    import database.db_analytics as analytics
+    print(f"[!] No Generated Dataset Found; Generating {args.patients:,} Patients And {args.doctors} Doctors")
+    with quiet():
+        status = datagen.main([
+            "--patients", str(args.patients), "--doctors", str(args.doctors),
+            "--days", "60", "--future-days", "21", "--seed", str(args.seed)
+        ])
+        analytics.rebuild_rollups()
+    if status:
+        raise RuntimeError("benchmarks.datagen failed")
+    return True
+
+def sample(db, size):
+    """
+    The ids the actions draw on: doctors with their departments, patients
+    with contacts, active QR cards and the next days with open slots.
+    """
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, dept_id FROM doctor ORDER BY id LIMIT %s", (size,))
+        doctors = [(row[0], row[1]) for row in cursor.fetchall()]
+        cursor.execute("SELECT id, contact FROM patient ORDER BY id LIMIT %s", (size,))
+        patients = [(row[0], row[1]) for row in cursor.fetchall()]
+        cursor.execute("SELECT qr_id FROM patient_qr WHERE status = %s ORDER BY qr_id LIMIT %s", ("Active", size))
+        qr_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            """
+                SELECT DISTINCT available_date FROM doctor_availability
+                WHERE available_date > %s AND is_booked = FALSE
+                ORDER BY available_date LIMIT %s
+            """, (date.today(), BOOKING_DAYS)
+        )
+        days = [date.fromisoformat(str(row[0])[:10]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    return {
+        "doctors": doctors,
+        "departments": sorted({dept for _, dept in doctors if dept}),
+        "patients": patients,
+        "qr_ids": qr_ids,
+        "days": days,
+    }
+
+
+# --------------------------------
+# Actions
+# --------------------------------
+
+
+# Each action: rng, ids -> (method, path, JSON body or None)
+ACTIONS = {
+    "check_in": lambda rng, ids: ("POST", "/visits/checkin", {
+        "qr_id": rng.choice(ids["qr_ids"]),
+        "doctor_id": rng.choice(ids["doctors"])[0],
+    }),
+    "book": lambda rng, ids: ("POST", "/appointment/add", {
+        "contact": rng.choice(ids["patients"])[1],
+        "doc_id": rng.choice(ids["doctors"])[0],
+        "date": rng.choice(ids["days"]).isoformat(),
+        "reason": rng.choice(REASONS),
+    }),
+    "free_slots": lambda rng, ids: (
+        "GET", f"/doctors/{rng.choice(ids['doctors'])[0]}/slots?date={rng.choice(ids['days']):%d/%m/%Y}&free=1", None
+    ),
+    "next_slots": lambda rng, ids: ("GET", f"/doctors/slots/next?dept_id={rng.choice(ids['departments'])}&n=5", None),
+    "find_patient": lambda rng, ids: ("GET", f"/patients/contact/{rng.choice(ids['patients'])[1]}", None),
+    "list_patients": lambda rng, ids: ("GET", "/patients/all?limit=100", None),
+    "visit_report": lambda rng, ids: ("GET", "/analytics/visits?group=department", None),
+    "hourly_report": lambda rng, ids: ("GET", "/analytics/visits?group=hour", None),
+    "analytics_status": lambda rng, ids: ("GET", "/analytics/status", None),
+    "pool_status": lambda rng, ids: ("GET", "/admin/pool", None),
+}
+
+# Route patterns for the report, as /metrics labels them
+ROUTES = {
+    "check_in": "POST /visits/checkin",
+    "book": "POST /appointment/add",
+    "free_slots": "GET /doctors/<doc_id>/slots",
+    "next_slots": "GET /doctors/slots/next",
+    "find_patient": "GET /patients/contact/<contact>",
+    "list_patients": "GET /patients/all",
+    "visit_report": "GET /analytics/visits",
+    "hourly_report": "GET /analytics/visits",
+    "analytics_status": "GET /analytics/status",
+    "pool_status": "GET /admin/pool",
+}
+
+def load_day(path):
+    if not path:
+        return DAY
+    with open(path) as source:
+        phases = json.load(source)
+    for phase in phases:
+        unknown = [name for name in phase["mix"] if name not in ACTIONS]
+        if unknown:
+            raise ValueError(f"phase {phase['name']}: unknown actions {', '.join(unknown)}")
+    return phases
+
+
+# --------------------------------
+# Transports
+# --------------------------------
+
+
+class InProcess:
+    # One Flask test client per worker thread, sharing the app and its pools
+    def __init__(self):
+        with quiet():
+            from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+
+class Http:
+    # One keep-alive connection per worker thread; reopened after any failure
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            kind = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = kind(self.host, self.port, timeout=self.timeout)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            conn.request(method, self.prefix + path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except Exception:
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+# --------------------------------
+# Schedule
+# --------------------------------
+
+
+class Schedule:
+    """
+    Hands out the next request to whichever worker asks. Open loop (rate > 0):
+    seeded Poisson arrivals, due at a fixed offset from the start. Closed
+    loop: due immediately, with the phase taken from the elapsed time.
+    """
+
+    def __init__(self, phases, duration, rate, seed, ids):
+        self.phases = phases
+        self.duration = duration
+        self.rate = rate
+        self.ids = ids
+        self.rng = random.Random(seed)
+        total = sum(phase["share"] for phase in phases)
+        self.ends, end = [], 0.0
+        for phase in phases:
+            end += phase["share"] / total * duration
+            self.ends.append(end)
+        self.peak = max(phase["intensity"] for phase in phases)
+        self.next_due = 0.0
+        self.started = None
+        self._lock = threading.Lock()
+
+    def phase_at(self, offset):
+        for index, end in enumerate(self.ends):
+            if offset < end:
+                return index
+        return len(self.phases) - 1
+
+    def active_workers(self, offset, workers):
+        # Closed loop: intensity decides how many workers send in this phase
+        share = self.phases[self.phase_at(offset)]["intensity"] / self.peak
+        return max(1, math.ceil(workers * share))
+
+    def next(self):
+        with self._lock:
+            if self.rate > 0:
+                due = self.next_due
+                if due >= self.duration:
+                    return None
+                index = self.phase_at(due)
+                self.next_due += self.rng.expovariate(self.rate * self.phases[index]["intensity"])
+            else:
+                due = clock.perf_counter() - self.started
+                if due >= self.duration:
+                    return None
+                index = self.phase_at(due)
+            mix = self.phases[index]["mix"]
+            action = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+            return due, index, action, ACTIONS[action](self.rng, self.ids)
+
+
+# --------------------------------
+# Runner
+# --------------------------------
+
+
+def worker(number, schedule, transport, workers, results):
+    # Results stay per worker and are merged at the end, so recording takes no lock
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    phases = defaultdict(lambda: defaultdict(int))
+    lag = 0.0
+    while True:
+        if schedule.rate <= 0:
+            offset = clock.perf_counter() - schedule.started
+            if offset < schedule.duration and number >= schedule.active_workers(offset, workers):
+                clock.sleep(0.01)
+                continue
+        item = schedule.next()
+        if item is None:
+            break
+        due, phase, action, (method, path, body) = item
+        wait = schedule.started + due - clock.perf_counter()
+        if wait > 0:
+            clock.sleep(wait)
+        else:
+            lag = max(lag, -wait)
+        try:
+            status, _ = transport.request(method, path, body)
+        except Exception:
+            status = 0
+        latencies[action].append(clock.perf_counter() - schedule.started - due)
+        kind = "error" if status == 0 or status >= 500 else "rejected" if status >= 400 else "ok"
+        statuses[action][kind] += 1
+        phases[phase][kind] += 1
+    results[number] = (latencies, statuses, phases, lag)
+
+def merge(results):
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    phases = defaultdict(lambda: defaultdict(int))
+    lag = 0.0
+    for part_latencies, part_statuses, part_phases, part_lag in results.values():
+        for action, samples in part_latencies.items():
+            latencies[action].extend(samples)
+        for target, part in ((statuses, part_statuses), (phases, part_phases)):
+            for key, counts in part.items():
+                for kind, count in counts.items():
+                    target[key][kind] += count
+        lag = max(lag, part_lag)
+    return latencies, statuses, phases, lag
+
+def report(latencies, statuses, phases, schedule, wall):
+    routes = {}
+    for action, samples in sorted(latencies.items()):
+        counts = statuses[action]
+        routes[action] = dict(
+            summarize(samples),
+            route=ROUTES[action],
+            rps=round(len(samples) / wall, 1),
+            ok=counts["ok"],
+            rejected=counts["rejected"],
+            errors=counts["error"],
+            error_rate=round(counts["error"] / len(samples), 4),
+        )
+    by_phase = {}
+    starts = [0.0] + schedule.ends[:-1]
+    for index, phase in enumerate(schedule.phases):
+        counts = phases.get(index, {})
+        total = sum(counts.values())
+        by_phase[phase["name"]] = {
+            "requests": total,
+            "rps": round(total / (schedule.ends[index] - starts[index]), 1),
+            "rejected": counts.get("rejected", 0),
+            "errors": counts.get("error", 0),
+        }
+    return routes, by_phase
+
+def print_report(routes, by_phase, totals, pool):
+    print(f"{'action':<17} {'route':<34} {'count':>7} {'req/s':>8} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'max_ms':>9} {'4xx':>6} {'err%':>6}")
+    for action, row in routes.items():
+        print(
+            f"{action:<17} {row['route'][:34]:<34} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>9.2f} "
+            f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {row['rejected']:>6} {row['error_rate']:>6.1%}"
+        )
+    for name, row in by_phase.items():
+        print(f"phase {name:<15} requests={row['requests']} req/s={row['rps']} rejected={row['rejected']} errors={row['errors']}")
+    print(
+        f"total requests={totals['requests']} wall={totals['wall_s']}s throughput={totals['rps']}/s "
+        f"errors={totals['errors']} ({totals['error_rate']:.2%}) max_start_lag={totals['max_lag_ms']}ms"
+    )
+    for name, stats in (pool or {}).items():
+        print(
+            f"pool {name}: size={stats['size']}/{stats['max_size']} checkouts={stats['checkouts']} waits={stats['waits']} "
+            f"wait_max={stats['wait_time_max'] * 1000:.1f}ms timeouts={stats['timeouts']}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds the whole day is compressed into")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent request threads")
+    parser.add_argument("--rate", type=float, default=0.0, help="arrivals per second at intensity 1; 0 = closed loop")
+    parser.add_argument("--mix", help="JSON file with a list of phases shaped like DAY")
+    parser.add_argument("--url", help="base URL of a running server; default drives the app in-process")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout with --url")
+    parser.add_argument("--pool-size", type=int, help="DB_POOL_SIZE for the in-process app; default --workers")
+    parser.add_argument("--patients", type=int, default=20_000, help="patients to generate when the database has none")
+    parser.add_argument("--doctors", type=int, default=100, help="doctors to generate when the database has none")
+    parser.add_argument("--sample", type=int, default=5000, help="ids of each kind drawn from the database")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results to a file")
+    args = parser.parse_args(argv)
+
+    try:
+        phases = load_day(args.mix)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[X] Could Not Read Day Mix {args.mix} \n error: {e}")
+        return 2
+
+    engine = use_local_sqlite(pool_size=args.pool_size or args.workers)
+    use_scratch_files()
+    import database.db_connection as db
+    import database.db_migrate as migrations
+    import database.db_visit as visits
+
+    with quiet():
+        migrated = migrations.migrate()
+    if not migrated:
+        print("[X] Migrations Failed")
+        return 1
+    ensure_dataset(db, args)
+    ids = sample(db, args.sample)
+    missing = [name for name in ("doctors", "departments", "patients", "qr_ids", "days") if not ids[name]]
+    if missing:
+        print(f"[X] Database Has No {', '.join(missing)} To Draw On")
+        return 1
+
+    transport = Http(args.url, args.timeout) if args.url else InProcess()
+    schedule = Schedule(phases, args.duration, args.rate, args.seed, ids)
+    results = {}
+    threads = [
+        threading.Thread(target=worker, args=(n, schedule, transport, args.workers, results), name=f"load-{n}", daemon=True)
+        for n in range(args.workers)
+    ]
+
+    mode = f"open loop at {args.rate:g}/s" if args.rate > 0 else "closed loop"
+    print(f"engine={engine} target={args.url or 'in-process'} workers={args.workers} duration={args.duration:g}s {mode} seed={args.seed}")
+    with quiet():
+        schedule.started = clock.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = clock.perf_counter() - schedule.started
+        if args.url:
+            status, body = transport.request("GET", "/admin/pool", None)
+            pool = json.loads(body).get("pools") if status == 200 else None
+        else:
+            pool = db.pool_stats()
+            visits.visit_writer().flush(10)
+
+    latencies, statuses, by_phase_counts, lag = merge(results)
+    routes, by_phase = report(latencies, statuses, by_phase_counts, schedule, wall)
+    requests = sum(row["count"] for row in routes.values())
+    errors = sum(row["errors"] for row in routes.values())
+    totals = {
+        "requests": requests,
+        "wall_s": round(wall, 2),
+        "rps": round(requests / wall, 1),
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "max_lag_ms": round(lag * 1000, 1),
+    }
+    print_report(routes, by_phase, totals, pool)
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump({
+                "meta": {"engine": engine, "target": args.url or "in-process", "workers": args.workers,
+                         "pool_size": args.pool_size or args.workers, "rate": args.rate,
+                         "duration": args.duration, "seed": args.seed, "phases": phases},
+                "totals": totals, "phases": by_phase, "routes": routes, "pool": pool,
+            }, out, indent=2, sort_keys=True)
+
+    if not requests:
+        print("[X] FAIL: No Requests Completed")
+        return 1
+    if totals["error_rate"] > args.max_error_rate:
+        print(f"[X] FAIL: Error Rate {totals['error_rate']:.2%} Above {args.max_error_rate:.2%}")
+        return 1
+    print(f"[✓] PASS: Error Rate {totals['error_rate']:.2%} Within {args.max_error_rate:.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
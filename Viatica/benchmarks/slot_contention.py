@@ -0,0 +1,165 @@
+"""
+Fires hundreds of concurrent bookings at one doctor-day and proves that no
+slot is booked twice and that p99 latency stays bounded.
+
+    python -m benchmarks.slot_contention --bookings 300 --slots 40 --workers 32
+
+Runs against a throwaway SQLite file unless DB_ENGINE points elsewhere.
+Exits non-zero on a double booking or when p99 exceeds --max-p99-ms.
+"""
+import argparse
+import random
+import sys
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import use_local_sqlite, quiet, summarize
+
+
+def seed(db, util, doc_id, day, slots, bookings):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+                INSERT INTO doctor (id, first_name, last_name, gender, dob, specialization, experience, contact, email, consultation_fee, dept_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (doc_id, "Bench", "Doctor", "Female", date(1980, 1, 1), "General", 10, 0, "bench@example.com", 100, None)
+        )
+        start = datetime.combine(day, datetime.min.time()) + timedelta(hours=9)
+        times = [(start + timedelta(minutes=15 * i)).time() for i in range(slots)]
+        cursor.executemany(
+            """
+                INSERT INTO doctor_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
+                VALUES (%s, %s, %s, %s, %s, FALSE)
+            """, [(f"{doc_id}S{i}", doc_id, day, t, day.strftime("%A")) for i, t in enumerate(times)]
+        )
+        contacts = [9_000_000_000 + i for i in range(bookings)]
+        cursor.executemany(
+            """
+                INSERT INTO patient (id, name, gender, age, blood_group, contact)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, [(f"{doc_id}P{i}", f"Patient {i}", "Female", 30, "O+", c) for i, c in enumerate(contacts)]
+        )
+        conn.commit()
+        return times, contacts
+    finally:
+        cursor.close()
+        conn.close()
+
+def verify(db, doc_id, day):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+                SELECT appointment_time, COUNT(*) FROM appointment
+                WHERE doctor_id = %s AND appointment_date = %s
+                GROUP BY appointment_time HAVING COUNT(*) > 1
+            """, (doc_id, day)
+        )
+        doubles = cursor.fetchall()
+        cursor.execute("SELECT COUNT(*) FROM appointment WHERE doctor_id = %s AND appointment_date = %s", (doc_id, day))
+        appointments = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT COUNT(*) FROM doctor_availability WHERE doctor_id = %s AND available_date = %s AND is_booked = TRUE",
+            (doc_id, day)
+        )
+        booked = cursor.fetchone()[0]
+        cursor.execute(
+            """
+                SELECT COUNT(*) FROM doctor_availability s
+                JOIN appointment a ON a.id = s.appointment_id AND a.appointment_time = s.available_time
+                WHERE s.doctor_id = %s AND s.available_date = %s
+            """, (doc_id, day)
+        )
+        linked = cursor.fetchone()[0]
+        return doubles, appointments, booked, linked
+    finally:
+        cursor.close()
+        conn.close()
+
+def cleanup(db, doc_id):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM appointment WHERE doctor_id = %s", (doc_id,))
+        cursor.execute("DELETE FROM doctor_availability WHERE doctor_id = %s", (doc_id,))
+        cursor.execute("DELETE FROM patient WHERE id LIKE %s", (f"{doc_id}P%",))
+        cursor.execute("DELETE FROM doctor WHERE id = %s", (doc_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--mode", choices=["exact", "next", "mixed"], default="mixed",
+                        help="exact: ask for a specific time, next: earliest free slot")
+    parser.add_argument("--max-p99-ms", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    engine = use_local_sqlite(pool_size=args.workers)
+    import database.db_connection as db
+    import database.db_migrate as migrations
+    import backend.booking as booking
+    import backend.utils as util
+
+    rng = random.Random(args.seed)
+    doc_id = util.generate_id("doctor")
+    day = date.today() + timedelta(days=365)
+
+    with quiet():
+        migrations.migrate()
+        times, contacts = seed(db, util, doc_id, day, args.slots, args.bookings)
+
+    requests = []
+    for contact in contacts:
+        mode = args.mode if args.mode != "mixed" else rng.choice(["exact", "next"])
+        requests.append((contact, rng.choice(times).strftime("%H:%M") if mode == "exact" else None))
+
+    latencies, outcomes = [], {}
+    lock = __import__("threading").Lock()
+
+    def book(request):
+        contact, slot = request
+        started = clock.perf_counter()
+        _, result = booking.book_appointment(contact, doc_id, day.isoformat(), slot, "Contention Bench")
+        elapsed = clock.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+
+    started = clock.perf_counter()
+    with quiet(), ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(book, requests))
+    wall = clock.perf_counter() - started
+
+    doubles, appointments, booked, linked = verify(db, doc_id, day)
+    stats = summarize(latencies)
+
+    print(f"engine={engine} bookings={args.bookings} slots={args.slots} workers={args.workers} mode={args.mode}")
+    print(f"outcomes={outcomes} wall={wall:.2f}s throughput={args.bookings / wall:.1f}/s")
+    print(f"latency p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+    print(f"appointments={appointments} booked_slots={booked} linked_slots={linked} double_bookings={len(doubles)}")
+
+    ok = (
+        not doubles
+        and appointments == outcomes.get("booked", 0)
+        and booked == appointments == linked
+        and appointments <= args.slots
+        and stats["p99_ms"] <= args.max_p99_ms
+    )
+    if engine != "sqlite":
+        cleanup(db, doc_id)
+    print("[✓] PASS" if ok else "[X] FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Times the hot paths against a seeded database and compares them with a
+stored baseline.
+
+    python -m benchmarks.suite                    # run and print
+    python -m benchmarks.suite --save             # run and store the result as the baseline
+    python -m benchmarks.suite --compare          # run and flag regressions against the baseline
+    python -m benchmarks.suite --only add_patient,check_in --iterations 500
+
+Runs against a throwaway SQLite file unless DB_ENGINE points elsewhere
+(then it must be an empty scratch database). The dataset and every
+workload come from --seed, so two runs do the same work. --compare exits
+non-zero when a case's p50 is more than --threshold slower than the
+baseline's and by more than --min-delta-ms.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time as clock
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import use_local_sqlite, use_scratch_files, quiet, summarize
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+GENDERS = ["Male", "Female", "Prefer Not To Say"]
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+SPECIALIZATIONS = ["Cardiology", "Dermatology", "General", "Neurology", "Orthopedics", "Pediatrics"]
+STATUSES = ["Scheduled", "Scheduled", "Completed", "Completed", "Completed", "Cancelled"]
+SLOTS_PER_DAY = 32      # 09:00 to 16:45, every 15 minutes
+BOOKING_DAYS = 7
+
+
+# --------------------------------
+# Dataset
+# --------------------------------
+
+
+def seed(db, rng, scale):
+    """
+    Deterministic dataset sized by `scale` patients. Returns the ids the
+    workloads draw on. Seeded ids are fixed strings, so they are stable
+    across runs and still pass backend.utils.validate_id.
+    """
+    doctors = [f"DOCTB{i:05d}" for i in range(max(10, scale // 100))]
+    departments = [f"DEPTB{i:02d}" for i in range(len(SPECIALIZATIONS))]
+    patients = [f"PATIB{i:08d}" for i in range(scale)]
+    contacts = [7_000_000_000 + i for i in range(scale)]
+    qr_ids = [f"QRB{i:08d}" for i in range(scale)]
+    first_day = date.today() + timedelta(days=30)
+    days = [first_day + timedelta(days=d) for d in range(BOOKING_DAYS)]
+    start = datetime.combine(first_day, datetime.min.time()) + timedelta(hours=9)
+    times = [(start + timedelta(minutes=15 * s)).time() for s in range(SLOTS_PER_DAY)]
+    past = datetime.combine(date.today() - timedelta(days=90), datetime.min.time())
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO department (id, name, description) VALUES (%s, %s, %s)",
+            [(dept, name, f"{name} department") for dept, name in zip(departments, SPECIALIZATIONS)]
+        )
+        cursor.executemany(
+            """
+                INSERT INTO doctor (id, first_name, last_name, gender, dob, specialization, experience, contact, email, consultation_fee, dept_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (doc, "Bench", f"Doctor{i}", rng.choice(GENDERS[:2]), date(1970 + i % 25, 1 + i % 12, 1 + i % 28),
+                 SPECIALIZATIONS[i % len(SPECIALIZATIONS)], 1 + i % 30, 6_000_000_000 + i, f"doctor{i}@bench.example",
+                 100 + 50 * (i % 10), departments[i % len(departments)])
+                for i, doc in enumerate(doctors)
+            ]
+        )
+        cursor.executemany(
+            """
+                INSERT INTO doctor_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
+                VALUES (%s, %s, %s, %s, %s, FALSE)
+            """, [
+                (f"AVAIB{d:05d}{n}{s:02d}", doc, day, t, day.strftime("%A"))
+                for d, doc in enumerate(doctors) for n, day in enumerate(days) for s, t in enumerate(times)
+            ]
+        )
+        cursor.executemany(
+            "INSERT INTO patient (id, name, gender, age, blood_group, contact) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(p, f"Patient {i}", rng.choice(GENDERS), rng.randint(1, 90), rng.choice(BLOOD_GROUPS), c)
+             for i, (p, c) in enumerate(zip(patients, contacts))]
+        )
+        cursor.executemany(
+            "INSERT INTO patient_qr (qr_id, patient_id, issued_date, status) VALUES (%s, %s, %s, 'Active')",
+            [(q, p, past) for q, p in zip(qr_ids, patients)]
+        )
+        # History for the list and count reads: past appointments and visits
+        cursor.executemany(
+            """
+                INSERT INTO appointment (id, patient_id, doctor_id, appointment_date, appointment_time, reason, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (f"APPOB{i:08d}", patients[i], rng.choice(doctors), (past + timedelta(days=i % 90)).date(),
+                 rng.choice(times), "Follow-up", rng.choice(STATUSES))
+                for i in range(scale // 2)
+            ]
+        )
+        cursor.executemany(
+            "INSERT INTO visit_log (patient_id, doctor_id, department_id, service_id, scan_time, status) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(rng.choice(patients), rng.choice(doctors), rng.choice(departments), None,
+              past + timedelta(minutes=rng.randint(0, 90 * 24 * 60)), "Checked-In")
+             for _ in range(scale)]
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return {"doctors": doctors, "patients": patients, "contacts": contacts, "qr_ids": qr_ids, "days": days}
+
+
+# --------------------------------
+# Cases
+# --------------------------------
+
+
+def case_add_patient(ctx):
+    import backend.patient as patient
+    rng = random.Random(ctx["seed"] + 1)
+    def op(i):
+        assert patient.add_patient(f"New Patient {i}", rng.choice(GENDERS), rng.randint(1, 90), rng.choice(BLOOD_GROUPS), 8_000_000_000 + i)
+    return op
+
+def case_book_appointment(ctx):
+    # The whole HTTP flow: JSON in, one booking transaction, QR job queued, JSON out
+    from app import app
+    client = app.test_client()
+    doctors, contacts, days = ctx["doctors"], ctx["contacts"], ctx["days"]
+    def op(i):
+        response = client.post("/appointment/add", json={
+            "contact": contacts[i % len(contacts)],
+            "doc_id": doctors[i % len(doctors)],
+            "date": days[(i // len(doctors)) % len(days)].isoformat(),
+            "reason": "Benchmark"
+        })
+        assert response.status_code == 201, response.get_json()
+    return op
+
+def case_view_free_slots(ctx):
+    import backend.availablity as availability
+    doctors, days = ctx["doctors"], ctx["days"]
+    def op(i):
+        success, _ = availability.view_free_slots(doctors[i % len(doctors)], days[i % len(days)].strftime("%d/%m/%Y"))
+        assert success
+    return op
+
+def case_view_all_appointment(ctx):
+    import database.db_appointment as appointments
+    def op(i):
+        rows, _ = appointments.view_all_appointment(100)
+        assert rows
+    return op
+
+def case_log_visit(ctx):
+    import database.db_visit as visits
+    qr_ids, doctors = ctx["qr_ids"], ctx["doctors"]
+    def op(i):
+        assert visits.log_visit(qr_ids[i % len(qr_ids)], doctors[i % len(doctors)])
+    return op
+
+def case_check_in(ctx):
+    # Scans distinct patients, so every QR lookup is a cache miss; the write is batched
+    import backend.qr_scanner as scanner
+    qr_ids, doctors = ctx["qr_ids"], ctx["doctors"]
+    offset = len(qr_ids) // 2
+    def op(i):
+        success, _ = scanner.check_in(qr_ids[(offset + i) % len(qr_ids)], doctors[i % len(doctors)])
+        assert success
+    return op
+
+def count_case(module, name, *args):
+    def factory(ctx):
+        count = getattr(__import__(module, fromlist=[name]), name)
+        return lambda i: count(*args)
+    return factory
+
+CASES = {
+    "add_patient": case_add_patient,
+    "book_appointment": case_book_appointment,
+    "view_free_slots": case_view_free_slots,
+    "view_all_appointment": case_view_all_appointment,
+    "log_visit": case_log_visit,
+    "check_in": case_check_in,
+    "count_patients": count_case("database.db_patients", "count_patients"),
+    "count_patients_by_gender": count_case("database.db_patients", "count_patients_by_gender"),
+    "count_patients_by_blood_group": count_case("database.db_patients", "count_patients_by_blood_group"),
+    "count_doctors": count_case("database.db_doc", "count_doctors"),
+    "count_doctors_by_specialization": count_case("database.db_doc", "count_doctors_by_specialization"),
+    "count_doctors_by_gender": count_case("database.db_doc", "count_doctors_by_gender"),
+    "count_appointments": count_case("database.db_appointment", "count_appointments"),
+    "count_patient_by_status": count_case("database.db_appointment", "count_patient_by_status", "Completed"),
+}
+
+
+# --------------------------------
+# Runner
+# --------------------------------
+
+
+def run_case(op, iterations, warmup):
+    samples = []
+    for i in range(warmup + iterations):
+        started = clock.perf_counter()
+        op(i)
+        if i >= warmup:
+            samples.append(clock.perf_counter() - started)
+    stats = summarize(samples)
+    stats["ops_per_s"] = round(len(samples) / sum(samples), 1) if samples else 0.0
+    return stats
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Returns {case: verdict} where verdict is "regression", "faster", "ok"
+    or "new", judged on p50.
+    """
+    verdicts = {}
+    for name, stats in results.items():
+        before = baseline["cases"].get(name)
+        if not before:
+            verdicts[name] = "new"
+            continue
+        delta = stats["p50_ms"] - before["p50_ms"]
+        ratio = stats["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        if ratio > 1 + threshold and delta > min_delta_ms:
+            verdicts[name] = "regression"
+        elif ratio < 1 - threshold and -delta > min_delta_ms:
+            verdicts[name] = "faster"
+        else:
+            verdicts[name] = "ok"
+    return verdicts
+
+def print_table(results, baseline=None, verdicts=None):
+    header = f"{'case':34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}"
+    if baseline:
+        header += f" {'base p50':>9} {'change':>8}  verdict"
+    print(header)
+    for name, stats in results.items():
+        line = f"{name:34} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['ops_per_s']:>10.1f}"
+        before = baseline["cases"].get(name) if baseline else None
+        if before:
+            change = (stats["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0.0
+            line += f" {before['p50_ms']:>9.3f} {change:>+7.1f}%  {verdicts[name]}"
+        elif baseline:
+            line += f" {'-':>9} {'-':>8}  {verdicts[name]}"
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help="comma-separated case names; default all")
+    parser.add_argument("--scale", type=int, default=2000, help="seeded patients; doctors, slots and history scale with it")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="baseline file; default benchmarks/baselines/<engine>.json")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline and exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore changes smaller than this")
+    parser.add_argument("--json", help="also write this run's results to a file")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        print(f"[X] Unknown Cases: {', '.join(unknown)}. Choose From: {', '.join(CASES)}")
+        return 2
+
+    engine = use_local_sqlite()
+    use_scratch_files()
+    import database.db_connection as db
+    import database.db_migrate as migrations
+    import database.db_visit as visits
+
+    rng = random.Random(args.seed)
+    with quiet():
+        migrations.migrate()
+        ctx = seed(db, rng, args.scale)
+    ctx["seed"] = args.seed
+
+    results = {}
+    for name in names:
+        with quiet():
+            op = CASES[name](ctx)
+            results[name] = run_case(op, args.iterations, args.warmup)
+    with quiet():
+        visits.visit_writer().flush(10)
+
+    run = {
+        "meta": {
+            "engine": engine,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "cases": results,
+    }
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{engine}.json")
+    status = 0
+
+    if args.compare:
+        try:
+            with open(baseline_path) as stored:
+                baseline = json.load(stored)
+        except FileNotFoundError:
+            print(f"[X] No Baseline At {baseline_path}. Run With --save First.")
+            return 2
+        for key in ("scale", "iterations", "seed"):
+            if baseline["meta"].get(key) != run["meta"][key]:
+                print(f"[!] Baseline {key}={baseline['meta'].get(key)} But This Run Used {run['meta'][key]}; Figures May Not Compare.")
+        verdicts = compare(results, baseline, args.threshold, args.min_delta_ms)
+        print_table(results, baseline, verdicts)
+        regressions = [name for name, verdict in verdicts.items() if verdict == "regression"]
+        if regressions:
+            print(f"[X] FAIL: {len(regressions)} Regression(s) Beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            status = 1
+        else:
+            print(f"[✓] PASS: No Case Slower Than Baseline By More Than {args.threshold:.0%}")
+    else:
+        print(f"engine={engine} scale={args.scale} iterations={args.iterations} seed={args.seed}")
+        print_table(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as out:
+            json.dump(run, out, indent=2, sort_keys=True)
+            out.write("\n")
+        print(f"[✓] Baseline Saved To {baseline_path}")
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(run, out, indent=2, sort_keys=True)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
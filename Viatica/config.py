@@ -6,6 +6,7 @@
 
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # ✅ Load environment variables from .env
@@ -19,3 +20,78 @@ mydb = {
     "port": int(os.getenv("DB_PORT", 3306))
 }
 
+
+# ✅ Connection pool settings shared by every database module
+pool_config = {
+    "max_size": int(os.getenv("DB_POOL_SIZE", 10)),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", 5)),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+    "health_check_after": float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", 30)),
+}
+
+# ✅ Engine every database module talks to: mysql | postgres | sqlite
+db_engine = os.getenv("DB_ENGINE", "mysql").lower()
+sqlite_path = os.getenv("SQLITE_PATH", "viatica.db")
+
+# ✅ Read-through caches for rarely changing rows (doctors, departments)
+cache_config = {
+    "max_size": int(os.getenv("CACHE_MAX_SIZE", 2048)),
+    "ttl": float(os.getenv("CACHE_TTL", 60)),
+}
+
+# ✅ Seconds a cached doctor-day in the slot index is trusted before reloading
+slot_index_ttl = float(os.getenv("SLOT_INDEX_TTL", 30))
+# ✅ Doctor-days the slot index holds before dropping the least recently used
+slot_index_max_days = int(os.getenv("SLOT_INDEX_MAX_DAYS", 20000))
+
+# ✅ Node numbers (0-999) baked into generated ids: one ("7") or this host's range ("100-199").
+# Processes on a host claim distinct nodes through lock files in id_node_dir; hosts need disjoint ranges
+id_node = os.getenv("ID_NODE")
+id_node_dir = os.getenv("ID_NODE_DIR", os.path.join(tempfile.gettempdir(), "viatica-id-nodes"))
+
+# ✅ Background QR rendering: local persistent job queue and its worker threads
+qr_queue_config = {
+    "path": os.getenv("QR_QUEUE_PATH", "qr_queue.db"),
+    "workers": int(os.getenv("QR_WORKERS", 2)),
+    "max_attempts": int(os.getenv("QR_MAX_ATTEMPTS", 5)),
+    "retry_after": float(os.getenv("QR_RETRY_AFTER", 2)),
+}
+
+# ✅ QR images: sharded on-disk store plus an in-memory LRU of rendered bytes
+qr_store_config = {
+    "path": os.getenv("QR_STORE_PATH", "qrcodes"),
+    "memory_items": int(os.getenv("QR_CACHE_ITEMS", 10000)),
+}
+
+# ✅ Reception check-in: cached QR lookups and the batched visit_log writer
+checkin_config = {
+    "active_qr_items": int(os.getenv("ACTIVE_QR_CACHE_ITEMS", 50000)),
+    # The QR map is per process and lives for CACHE_TTL; entries older than this many seconds
+    # re-read the QR's status, so a card deactivated on one worker is refused by all within it (0 = every scan)
+    "active_qr_recheck": float(os.getenv("ACTIVE_QR_RECHECK", 5)),
+    "batch_size": int(os.getenv("VISIT_BATCH_SIZE", 500)),
+    "flush_interval": float(os.getenv("VISIT_FLUSH_INTERVAL", 0.25)),
+    "max_pending": int(os.getenv("VISIT_MAX_PENDING", 50000)),
+    # Local append-only spool for queued check-ins; empty keeps them in memory only
+    "spool_path": os.getenv("VISIT_SPOOL_PATH", "spool/visit_log"),
+    "spool_fsync_interval": float(os.getenv("VISIT_SPOOL_FSYNC_INTERVAL", 0.05)),
+    # Check-ins the database refused, one JSON line each; empty only logs them
+    "dead_letter_path": os.getenv("VISIT_DEAD_LETTER_PATH", "spool/visit_log_rejected.jsonl"),
+}
+
+# ✅ Visit analytics: a background thread folds new visits in every refresh_interval seconds (0 = cron only)
+analytics_config = {
+    "refresh_interval": float(os.getenv("ANALYTICS_REFRESH_INTERVAL", 30)),
+    "gap_timeout": float(os.getenv("ANALYTICS_GAP_TIMEOUT", 600)),
+    "batch_size": int(os.getenv("ANALYTICS_BATCH_SIZE", 5000)),
+    "max_days": int(os.getenv("ANALYTICS_MAX_DAYS", 366)),
+}
+
+# ✅ Query profiler: statements at or over threshold_ms go to a rotating slow-query log
+slow_query_config = {
+    "threshold_ms": float(os.getenv("SLOW_QUERY_MS", 200)),
+    "log_path": os.getenv("SLOW_QUERY_LOG", "logs/slow_query.log"),
+    "max_bytes": int(os.getenv("SLOW_QUERY_LOG_BYTES", 10 * 1024 * 1024)),
+    "backups": int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5)),
+    "max_fingerprints": int(os.getenv("QUERY_FINGERPRINTS", 1000)),
+}
@@ -0,0 +1,219 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+
+# --------------------------------
+# Buffers
+# --------------------------------
+
+
+class MemoryBuffer:
+    """
+    Pending rows in process memory: fastest, but lost if the process dies.
+    database/spool.py has the same interface backed by an append-only file.
+    """
+
+    def __init__(self, max_pending=50000):
+        self.max_pending = max_pending
+        self._rows = deque()            # (row, submitted_at)
+        self._lock = threading.Lock()
+
+    def put(self, row):
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                return False
+            self._rows.append((row, time.monotonic()))
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def oldest(self):
+        # monotonic time the oldest pending row arrived, or None
+        with self._lock:
+            return self._rows[0][1] if self._rows else None
+
+    def peek(self, limit):
+        # Returns (rows, marker); the rows stay pending until ack(marker)
+        with self._lock:
+            rows = [row for row, _ in islice(self._rows, limit)]
+        return rows, len(rows)
+
+    def ack(self, marker):
+        with self._lock:
+            for _ in range(marker):
+                self._rows.popleft()
+
+    def sync(self):
+        pass
+
+
+# --------------------------------
+# Batched Background Writer
+# --------------------------------
+
+
+class BatchWriter:
+    """
+    Hands pending rows to `write(rows)` in batches from one background
+    thread. A batch goes out when batch_size rows are waiting or
+    flush_interval seconds after the oldest one arrived, whichever comes
+    first. Rows leave the buffer only after a successful write; a failed
+    write is retried with backoff. When permanent(error) says retrying
+    cannot help, the batch is halved until the rows at fault are found, and
+    those go to dead_letter(row, error) so the rest are written; write must
+    therefore tolerate seeing a row twice. submit() returns False when the
+    buffer refuses the row (full, or the spool cannot be written).
+    """
+
+    def __init__(self, name, write, batch_size=500, flush_interval=0.25, max_pending=50000, buffer=None,
+                 permanent=None, dead_letter=None):
+        self.name = name
+        self.write = write
+        self.permanent = permanent or (lambda error: False)
+        self.dead_letter = dead_letter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = buffer if buffer is not None else MemoryBuffer(max_pending)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = os.getpid()
+        self._closing = False
+        self._submitted = len(self.buffer)      # a spool may start with rows from the last run
+        self._written = 0
+        self._dead = 0
+        self._stats = {"batches": 0, "failures": 0, "rejected": 0, "largest_batch": 0, "last_write_ms": 0.0, "max_wait_ms": 0.0}
+
+    def submit(self, row):
+        with self._cond:
+            if self._closing:
+                self._stats["rejected"] += 1
+                return False
+            try:
+                accepted = self.buffer.put(row)
+            except Exception as e:
+                print(f"[X] {self.name} Buffer Refused A Row \n error: {e}")
+                accepted = False
+            if not accepted:
+                self._stats["rejected"] += 1
+                return False
+            self._submitted += 1
+            if self._submitted - self._written >= self.batch_size:
+                self._cond.notify_all()
+        self.start()
+        return True
+
+    def flush(self, timeout=None):
+        # Blocks until everything submitted before the call is written; True if it was in time
+        with self._cond:
+            target = self._submitted
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written + self._dead >= target, timeout)
+
+    def close(self, timeout=5):
+        if os.getpid() != self._pid:
+            return      # a forked child's copy: the thread and the buffer's files are the parent's
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        if hasattr(self.buffer, "close"):
+            self.buffer.close()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+                # ✅ Rows still buffered at shutdown get one last write
+                atexit.register(self.close)
+
+    def _wait_for_batch(self):
+        # True when a batch is due; False once closing with nothing left
+        with self._cond:
+            while True:
+                pending = len(self.buffer)
+                if pending:
+                    due = (self.buffer.oldest() or time.monotonic()) + self.flush_interval
+                    if pending >= self.batch_size or self._closing or time.monotonic() >= due:
+                        return True
+                    self._cond.wait(max(due - time.monotonic(), 0.001))
+                elif self._closing:
+                    return False
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        failures = 0
+        while self._wait_for_batch():
+            oldest = self.buffer.oldest() or time.monotonic()
+            rows, marker = self.buffer.peek(self.batch_size)
+            if not rows:
+                time.sleep(self.flush_interval)
+                continue
+            started = time.monotonic()
+            try:
+                self.buffer.sync()
+                dead = self._write(rows)
+                self.buffer.ack(marker)
+            except Exception as e:
+                failures += 1
+                with self._cond:
+                    self._stats["failures"] += 1
+                print(f"[X] {self.name} Writer Failed On {len(rows)} Rows; Retrying \n error: {e}")
+                if self._closing and failures >= 3:
+                    print(f"[X] {self.name} Writer Gave Up At Shutdown With {len(self.buffer)} Rows Unwritten.")
+                    return
+                time.sleep(min(0.1 * 2 ** failures, 5.0))
+                continue
+            failures = 0
+            finished = time.monotonic()
+            with self._cond:
+                self._written += len(rows) - dead
+                self._dead += dead
+                self._stats["batches"] += 1
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(rows))
+                self._stats["last_write_ms"] = round((finished - started) * 1000, 3)
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], round((finished - oldest) * 1000, 3))
+                self._cond.notify_all()
+
+    def _write(self, rows):
+        # Returns how many rows were set aside; transient errors propagate and the whole batch is retried
+        try:
+            self.write(rows)
+            return 0
+        except Exception as e:
+            if not self.permanent(e):
+                raise
+            if len(rows) == 1:
+                self._reject(rows[0], e)
+                return 1
+        middle = len(rows) // 2
+        return self._write(rows[:middle]) + self._write(rows[middle:])
+
+    def _reject(self, row, error):
+        print(f"[X] {self.name} Writer Set Aside A Row The Database Refused \n error: {error}")
+        if self.dead_letter is not None:
+            self.dead_letter(row, error)    # ❌ If this raises, the batch stays pending and is retried
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                **self._stats,
+                "pending": len(self.buffer),
+                "submitted": self._submitted,
+                "written": self._written,
+                "dead_lettered": self._dead,
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+        if hasattr(self.buffer, "stats"):
+            stats["spool"] = self.buffer.stats()
+        return stats
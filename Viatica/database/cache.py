@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from config import cache_config
+
+
+# --------------------------------
+# TTL + LRU Cache
+# --------------------------------
+
+
+class TTLCache:
+    """
+    Bounded in-process cache. Entries expire `ttl` seconds after they are
+    stored, and the least recently used entry is evicted once `max_size`
+    is reached. Writers call invalidate()/clear() after their commit.
+    """
+
+    def __init__(self, name, max_size=None, ttl=None):
+        self.name = name
+        self.max_size = max_size or cache_config["max_size"]
+        self.ttl = ttl if ttl is not None else cache_config["ttl"]
+        self._entries = OrderedDict()       # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+        _caches[name] = self
+
+    def get(self, key):
+        # Returns the cached value, or None on a miss
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+                self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_caches = {}
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in list(_caches.items())}
@@ -0,0 +1,357 @@
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+import database.db_connection as db
+from config import analytics_config
+
+
+# --------------------------------
+# Visit Rollups
+# --------------------------------
+
+
+CHECKED_IN = "Checked-In"
+WATERMARK = "visit_rollups"
+IN_CHUNK = 500      # patients per IN (...) when pairing waits, gap ids per lookup
+MAX_NEW_GAPS = 50000    # a jump in the id sequence wider than this is not tracked id by id
+
+# Rollup table -> its time key. Both share (department_id, doctor_id, visits, waits, wait_seconds);
+# '' stands for "no department/doctor" so the columns can sit in the primary key
+ROLLUPS = {
+    "visit_rollup_hour": "bucket",
+    "visit_rollup_day": "day",
+}
+
+def as_datetime(value):
+    # SQLite hands back scan_time as ISO text, the server drivers as datetime
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+# --------------------------------
+# Incremental Refresh
+# --------------------------------
+
+
+def refresh_rollups(batch_size=5000):
+    """
+    Folds visit_log rows with visit_id above the watermark into the hourly
+    and daily rollups. Each batch moves the counts and the watermark in one
+    transaction, so a crash mid-refresh never counts a row twice, and the
+    locked watermark row keeps concurrent refreshes from overlapping.
+    Writers on MySQL/PostgreSQL can commit ids out of order, so every id
+    the watermark passes without seeing is kept in rollup_gap and folded
+    when it shows up; gaps older than gap_timeout seconds belonged to
+    rolled-back or ignored inserts and are dropped.
+    Returns the number of rows folded, or None on error.
+    """
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    lock = "FOR UPDATE" if dialect.supports_skip_locked else ""
+    folded = 0
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+        cursor.execute(f"SELECT last_id FROM rollup_watermark WHERE name = %s {lock}", (WATERMARK,))
+        cursor.fetchone()
+        folded += _fold_gaps(cursor)
+        conn.commit()
+
+        while True:
+            dialect.begin(conn)
+            cursor.execute(f"SELECT last_id FROM rollup_watermark WHERE name = %s {lock}", (WATERMARK,))
+            last_id = cursor.fetchone()[0]
+            cursor.execute(
+                """
+                    SELECT visit_id, patient_id, department_id, doctor_id, scan_time, status
+                    FROM visit_log WHERE visit_id > %s
+                    ORDER BY visit_id LIMIT %s
+                """, (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                conn.commit()
+                break
+
+            _fold(cursor, rows)
+            _note_gaps(cursor, dialect, last_id, rows)
+            cursor.execute(
+                "UPDATE rollup_watermark SET last_id = %s, updated_at = %s WHERE name = %s",
+                (rows[-1][0], datetime.now(), WATERMARK)
+            )
+            conn.commit()
+            folded += len(rows)
+            if len(rows) < batch_size:
+                break
+        if folded:
+            print(f"[✓] Folded {folded} Visits Into The Rollups.")
+        return folded
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Refreshing Visit Rollups. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def _fold(cursor, rows):
+    hours, days = _aggregate(cursor, rows)
+    _apply(cursor, "visit_rollup_hour", hours)
+    _apply(cursor, "visit_rollup_day", days)
+
+def _note_gaps(cursor, dialect, last_id, rows):
+    # Ids between the watermark and this batch's last row that are not (yet) visible
+    seen = {row[0] for row in rows}
+    span = rows[-1][0] - last_id
+    if span - len(seen) > MAX_NEW_GAPS:
+        print(f"[!] visit_id Jumped By {span} After {last_id}; Not Tracking Those Gaps.")
+        return
+    missing = [visit_id for visit_id in range(last_id + 1, rows[-1][0]) if visit_id not in seen]
+    noted_at = datetime.now()
+    for offset in range(0, len(missing), IN_CHUNK):
+        chunk = missing[offset:offset + IN_CHUNK]
+        cursor.execute(
+            dialect.insert_ignore("rollup_gap", ["visit_id", "noted_at"], len(chunk)),
+            [value for visit_id in chunk for value in (visit_id, noted_at)]
+        )
+
+def _fold_gaps(cursor):
+    # ✅ Late commits behind the watermark: fold the ones that appeared, forget the ones that never will
+    cursor.execute("SELECT visit_id FROM rollup_gap ORDER BY visit_id")
+    gaps = [row[0] for row in cursor.fetchall()]
+    folded = 0
+    for offset in range(0, len(gaps), IN_CHUNK):
+        chunk = gaps[offset:offset + IN_CHUNK]
+        cursor.execute(
+            f"""
+                SELECT visit_id, patient_id, department_id, doctor_id, scan_time, status
+                FROM visit_log WHERE visit_id IN ({_placeholders(chunk)})
+                ORDER BY visit_id
+            """, chunk
+        )
+        rows = cursor.fetchall()
+        if rows:
+            _fold(cursor, rows)
+            found = [row[0] for row in rows]
+            cursor.execute(f"DELETE FROM rollup_gap WHERE visit_id IN ({_placeholders(found)})", found)
+            folded += len(rows)
+    expired = datetime.now() - timedelta(seconds=analytics_config["gap_timeout"])
+    cursor.execute("DELETE FROM rollup_gap WHERE noted_at < %s", (expired,))
+    if folded:
+        print(f"[✓] Folded {folded} Late-Committed Visits Into The Rollups.")
+    return folded
+
+def _aggregate(cursor, rows):
+    # (time key, department, doctor) -> [visits, waits, wait_seconds] at both grains
+    hours = defaultdict(lambda: [0, 0, 0])
+    days = defaultdict(lambda: [0, 0, 0])
+
+    def add(scan_time, department_id, doctor_id, visits, waits, wait_seconds):
+        for totals, key in ((hours, scan_time.replace(minute=0, second=0, microsecond=0)), (days, scan_time.date())):
+            entry = totals[(key, department_id or "", doctor_id or "")]
+            entry[0] += visits
+            entry[1] += waits
+            entry[2] += wait_seconds
+
+    for _, _, department_id, doctor_id, scan_time, status in rows:
+        if status == CHECKED_IN:
+            add(as_datetime(scan_time), department_id, doctor_id, 1, 0, 0)
+    for checked_in_at, department_id, doctor_id, wait_seconds in _waits(cursor, rows):
+        add(checked_in_at, department_id, doctor_id, 0, 1, wait_seconds)
+    return hours, days
+
+def _waits(cursor, rows):
+    """
+    A wait runs from a check-in to the patient's next visit event the same
+    day (called in, consulted, ...). Yields (check-in time, department,
+    doctor, seconds) for each event in `rows` that directly follows a
+    check-in; the wait is booked to the check-in's hour.
+    """
+    follow_ups = {row[0] for row in rows if row[5] != CHECKED_IN}
+    if not follow_ups:
+        return
+    times = [as_datetime(row[4]) for row in rows if row[0] in follow_ups]
+    start = datetime.combine(min(times).date(), datetime.min.time())
+    end = max(times)
+    patients = sorted({row[1] for row in rows if row[0] in follow_ups})
+
+    history = defaultdict(list)
+    for offset in range(0, len(patients), IN_CHUNK):
+        chunk = patients[offset:offset + IN_CHUNK]
+        # ✅ Bounded by patient and day, so this stays on ix_visit_patient
+        cursor.execute(
+            f"""
+                SELECT visit_id, patient_id, department_id, doctor_id, scan_time, status
+                FROM visit_log
+                WHERE patient_id IN ({_placeholders(chunk)}) AND scan_time >= %s AND scan_time <= %s
+            """, (*chunk, start, end)
+        )
+        for visit_id, patient_id, department_id, doctor_id, scan_time, status in cursor.fetchall():
+            history[patient_id].append((as_datetime(scan_time), visit_id, department_id, doctor_id, status))
+
+    for events in history.values():
+        events.sort()
+        for previous, event in zip(events, events[1:]):
+            if event[1] not in follow_ups or previous[4] != CHECKED_IN or previous[0].date() != event[0].date():
+                continue
+            wait_seconds = int((event[0] - previous[0]).total_seconds())
+            # The event usually names the doctor who saw them; reception check-ins often do not
+            yield previous[0], event[2] or previous[2], event[3] or previous[3], wait_seconds
+
+def _apply(cursor, table, totals):
+    key = ROLLUPS[table]
+    for (bucket, department_id, doctor_id), (visits, waits, wait_seconds) in totals.items():
+        cursor.execute(
+            f"""
+                UPDATE {table} SET visits = visits + %s, waits = waits + %s, wait_seconds = wait_seconds + %s
+                WHERE {key} = %s AND department_id = %s AND doctor_id = %s
+            """, (visits, waits, wait_seconds, bucket, department_id, doctor_id)
+        )
+        if cursor.rowcount == 0:
+            cursor.execute(
+                db.insert_values("INSERT INTO", table, [key, "department_id", "doctor_id", "visits", "waits", "wait_seconds"]),
+                (bucket, department_id, doctor_id, visits, waits, wait_seconds)
+            )
+
+def rebuild_rollups(batch_size=5000):
+    # ✅ Repair path: empty the rollups, rewind the watermark and fold the whole history again
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+        for table in ROLLUPS:
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.execute("DELETE FROM rollup_gap")
+        cursor.execute("UPDATE rollup_watermark SET last_id = 0, updated_at = %s WHERE name = %s", (datetime.now(), WATERMARK))
+        conn.commit()
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Resetting Visit Rollups. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+    return refresh_rollups(batch_size)
+
+
+# --------------------------------
+# Reads (rollups only)
+# --------------------------------
+
+
+# group -> (rollup table, key expression, name expression, dimension join)
+GROUPS = {
+    "hour": ("visit_rollup_hour", "r.bucket", None, ""),
+    "day": ("visit_rollup_day", "r.day", None, ""),
+    "department": ("visit_rollup_day", "r.department_id", "d.name", "LEFT JOIN department d ON d.id = r.department_id"),
+    "doctor": (
+        "visit_rollup_day", "r.doctor_id", "doc.first_name, doc.last_name",
+        "LEFT JOIN doctor doc ON doc.id = r.doctor_id"
+    ),
+}
+
+def visit_rollups(group, since, until, department_id=None, doctor_id=None):
+    """
+    Visits and average wait per hour, day, department or doctor between two
+    dates (inclusive), read from the rollup tables; only department and
+    doctor names are joined in, by primary key. Returns a list of dicts, or
+    None on error.
+    """
+    table, key, name, join = GROUPS[group]
+    time_key = f"r.{ROLLUPS[table]}"
+    if table == "visit_rollup_hour":
+        low, high = datetime.combine(since, datetime.min.time()), datetime.combine(until + timedelta(days=1), datetime.min.time())
+    else:
+        low, high = since, until + timedelta(days=1)
+    filters = [f"{time_key} >= %s", f"{time_key} < %s"]
+    params = [low, high]
+    if department_id:
+        filters.append("r.department_id = %s")
+        params.append(department_id)
+    if doctor_id:
+        filters.append("r.doctor_id = %s")
+        params.append(doctor_id)
+
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        select = f"{key}, {name}" if name else key
+        cursor.execute(
+            f"""
+                SELECT {select}, SUM(r.visits), SUM(r.waits), SUM(r.wait_seconds)
+                FROM {table} r {join}
+                WHERE {' AND '.join(filters)}
+                GROUP BY {select}
+                ORDER BY {key}
+            """, params
+        )
+        results = []
+        for row in cursor.fetchall():
+            visits, waits, wait_seconds = (int(value or 0) for value in row[-3:])
+            entry = {group: str(row[0]) if row[0] != "" else None}
+            if group == "department":
+                entry["name"] = row[1]
+            elif group == "doctor":
+                entry["name"] = ((row[1] or "") + " " + (row[2] or "")).strip() or None
+            entry["visits"] = visits
+            entry["waits"] = waits
+            entry["avg_wait_minutes"] = round(wait_seconds / waits / 60, 1) if waits else None
+            results.append(entry)
+        return results
+    except Exception as e:
+        print(f"[X] Error Reading Visit Rollups. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def rollup_status():
+    # Watermark and how many visit_log rows are not folded in yet (MAX on the primary key is an index lookup)
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_id, updated_at FROM rollup_watermark WHERE name = %s", (WATERMARK,))
+        last_id, updated_at = cursor.fetchone()
+        cursor.execute("SELECT MAX(visit_id) FROM visit_log")
+        newest = cursor.fetchone()[0] or 0
+        cursor.execute("SELECT COUNT(*) FROM rollup_gap")
+        gaps = cursor.fetchone()[0]
+        return {
+            "watermark": last_id,
+            "refreshed_at": str(updated_at) if updated_at else None,
+            "newest_visit_id": newest,
+            "behind": max(newest - last_id, 0),
+            "open_gaps": gaps,
+        }
+    except Exception as e:
+        print(f"[X] Error Reading Rollup Status. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+if __name__ == "__main__":
+    # python -m database.db_analytics [refresh|rebuild]
+    command = sys.argv[1] if len(sys.argv) > 1 else "refresh"
+    if command == "refresh":
+        refresh_rollups()
+    elif command == "rebuild":
+        rebuild_rollups()
+    else:
+        print("[X] Usage: python -m database.db_analytics {refresh|rebuild}")
+        sys.exit(2)
+    print(f"[✓] Rollup Status: {rollup_status()}")
@@ -1,21 +1,17 @@
-import os
-import psycopg2
+import database.db_connection as db
+import database.db_pagination as pg
+import database.db_booking as booking
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
-def insert_appointment(patient_id, doc_id, date, time, reason, status):
+def insert_appointment(id, patient_id, doc_id, date, time, reason, status):
     conn = None
     cursor = None
     try:
@@ -24,9 +20,9 @@ def insert_appointment(patient_id, doc_id, date, time, reason, status):
         # ✅ Insert query with parameter binding (safe against SQL injection)
         cursor.execute(
             """
-                INSERT INTO appointment (patient_id, doctor_id, appointment_date , appointment_time , reason, status)
-                VALUES (%s, %s, %s, %s, %s,%s)
-            """, (patient_id, doc_id, date, time, reason, status)  # ✅ values passed as tuple
+                INSERT INTO appointment (id, patient_id, doctor_id, appointment_date , appointment_time , reason, status)
+                VALUES (%s, %s, %s, %s, %s, %s,%s)
+            """, (id, patient_id, doc_id, date, time, reason, status)  # ✅ values passed as tuple
         )
         conn.commit()  # ✅ Commit transaction so the new appointment is saved
         print("[✓] Appointment created Successfully.")
@@ -81,10 +77,16 @@ def update_appointment_doc_id(appointment_id, new_doc_id):
 def update_appointment_status(appointment_id, new_status):
     update_field(appointment_id, "status", new_status)
 
+UPDATABLE_FIELDS = {"appointment_date", "appointment_time", "reason", "doctor_id", "status"}
+
+def update_appointment(appointment_id, changes, expected_version=None):
+    # ✅ All changed fields in one UPDATE, with its slot moved or released in the same transaction
+    return booking.update_appointment(appointment_id, changes, UPDATABLE_FIELDS, expected_version)
+
 # ✅ Generic helper function to update any allowed field
 def update_field(appointment_id, field, value):
     # Define which fields are allowed to be updated (safety check)
-    allowed_fields = {"appointment_date", "appointment_time", "reason", "doctor_id", "status"}
+    allowed_fields = UPDATABLE_FIELDS
     if field not in allowed_fields:
         raise ValueError("Invalid Field Name")  # Prevents SQL injection
     conn = None
@@ -94,7 +96,7 @@ def update_field(appointment_id, field, value):
         cursor = conn.cursor()
         # ⚠️ Using f-string for column name is okay here since it's validated
         # But values (field value + appointment_id) must use parameter binding (%s)
-        query = f"UPDATE appointment SET {field} = %s WHERE id = %s"
+        query = f"UPDATE appointment SET {field} = %s, version = version + 1 WHERE id = %s"
         cursor.execute(query, (value, appointment_id))  # Safe against SQL injection
         conn.commit()  # Save changes
         print(f"[✓] Updated {field} for appointment id: {appointment_id}")
@@ -124,12 +126,14 @@ def view_patient_appointment(appointment_id):
                     a.id AS appointment_id,
                     p.name AS patient_name,
                     p.age AS patient_age,
-                    d.name AS doctor_name,
+                    d.first_name AS doctor_fname,
+                    d.last_name AS doctor_lname,
                     d.specialization,
                     a.appointment_date,
                     a.appointment_time,
                     a.reason,
-                    a.status
+                    a.status,
+                    a.version
                 FROM appointment a
                 JOIN patient p ON a.patient_id = p.id
                 JOIN doctor d ON a.doctor_id = d.id
@@ -139,17 +143,18 @@ def view_patient_appointment(appointment_id):
         result = cursor.fetchone()
         if result is None:
             return None
-        appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time , reason, status = result
+        appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time , reason, status, version = result
         appointment_details = {
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date,
             "appointment_time" : appointment_time,
             "reason" : reason,
-            "status": status
+            "status": status,
+            "version": version
         }
         return appointment_details
     except Exception as e:
@@ -176,7 +181,8 @@ def view_patient_appointments(patient_id):
                 a.id AS appointment_id,
                 p.name AS patient_name,
                 p.age AS patient_age,
-                d.name AS doctor_name,
+                d.first_name AS doctor_fname,
+                d.last_name AS doctor_lname,
                 d.specialization,
                 a.appointment_date,
                 a.appointment_time,
@@ -196,14 +202,14 @@ def view_patient_appointments(patient_id):
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date ,
             "appointment_time" : appointment_time,
             "reason" : reason,
             "status": status
             }
-            for appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time, reason, status in rows
+            for appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time, reason, status in rows
         ]
     except Exception as e:
         # ✅ Log errors but don’t crash the program
@@ -217,7 +223,8 @@ def view_patient_appointments(patient_id):
         if conn:
             conn.close()
 
-def view_all_appointment():
+def view_all_appointment(limit = 100, after = None):
+    # ✅ One page ordered by date, time, id; returns (appointments, next_cursor)
     conn = None
     cursor = None
     try:
@@ -225,13 +232,15 @@ def view_all_appointment():
         conn = get_connection()
         cursor = conn.cursor()
         # ✅ Fetch all appointments joined with patient + doctor details
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT 
                 a.id AS appointment_id,
                 p.name AS patient_name,
                 p.age AS patient_age,
-                d.name AS doctor_name,
+                d.first_name AS doctor_fname,
+                d.last_name AS doctor_lname,
                 d.specialization,
                 a.appointment_date,
                 a.appointment_time,
@@ -240,17 +249,17 @@ def view_all_appointment():
             FROM appointment a
             JOIN patient p ON a.patient_id = p.id
             JOIN doctor d ON a.doctor_id = d.id
-            ORDER BY a.appointment_date, a.appointment_time LIMIT 100 OFFSET 0
-            """
+            """,
+            ["a.appointment_date", "a.appointment_time", "a.id"], "appointment",
+            key=lambda row: (row[6], row[7], row[0]), limit=limit, after=after
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date ,
             "appointment_time" : appointment_time,
@@ -258,13 +267,15 @@ def view_all_appointment():
             "status": status
 
             }
-            for appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time, reason, status in rows
-        ]
+            for appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time, reason, status in rows
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching All Appointments. Try Again Later \n Error: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -286,7 +297,8 @@ def view_doctor_appointments(doctor_id):
                 a.id AS appointment_id,
                 p.name AS patient_name,
                 p.age AS patient_age,
-                d.name AS doctor_name,
+                d.first_name AS doctor_fname,
+                d.last_name AS doctor_lname,
                 d.specialization,
                 a.appointment_date,
                 a.appointment_time,
@@ -306,14 +318,14 @@ def view_doctor_appointments(doctor_id):
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date ,
             "appointment_time" : appointment_time,
             "reason" : reason,
             "status": status
             }
-            for appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time, reason, status in rows
+            for appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time, reason, status in rows
         ]
     except Exception as e:
         # ✅ Log errors but don’t crash the program
@@ -341,7 +353,8 @@ def search_appointment_by_date(date):
                 a.id AS appointment_id,
                 p.name AS patient_name,
                 p.age AS patient_age,
-                d.name AS doctor_name,
+                d.first_name AS doctor_fname,
+                d.last_name AS doctor_lname,
                 d.specialization,
                 a.appointment_date,
                 a.appointment_time,
@@ -361,14 +374,14 @@ def search_appointment_by_date(date):
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date ,
             "appointment_time" : appointment_time,
             "reason" : reason,
             "status": status
             }
-            for appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time, reason, status in rows
+            for appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time, reason, status in rows
         ]
     except Exception as e:
         # ✅ Log errors but don’t crash the program
@@ -396,7 +409,8 @@ def search_appointment_by_status(status):
                 a.id AS appointment_id,
                 p.name AS patient_name,
                 p.age AS patient_age,
-                d.name AS doctor_name,
+                d.first_name AS doctor_fname,
+                d.last_name AS doctor_lname,
                 d.specialization,
                 a.appointment_date,
                 a.appointment_time,
@@ -416,14 +430,14 @@ def search_appointment_by_status(status):
             "appointment_id" : appointment_id,
             "patient_name" : pat_name,
             "patient_age" : pat_age,
-            "doctor_name" : doc_name,
+            "doctor_name" : ((doc_fname or "") + " " + (doc_lname or "")).strip(),
             "doctor_specialization" : doc_specialization,
             "appointment_date" : appointment_date ,
             "appointment_time" : appointment_time,
             "reason" : reason,
             "status": status
             }
-            for appointment_id, pat_name, pat_age, doc_name, doc_specialization, appointment_date , appointment_time, reason, status in rows
+            for appointment_id, pat_name, pat_age, doc_fname, doc_lname, doc_specialization, appointment_date , appointment_time, reason, status in rows
         ]
     except Exception as e:
         # ✅ Log errors but don’t crash the program
@@ -536,10 +550,7 @@ def appointment_exists_id(appointment_id):
         cursor.execute("""
                             SELECT id 
                             FROM appointment
-                            WHERE patient_id = %s 
-                                AND appointment_date = %s 
-                                AND appointment_time = %s 
-                                AND status = 'Scheduled'
+                            WHERE id = %s
                        """, (appointment_id,))
         # ✅ fetchone() returns a row if found, otherwise None
         row = cursor.fetchone()
@@ -0,0 +1,408 @@
+import database.db_connection as db
+import database.db_doc_schedule as sch
+import database.db_patch as patch
+import database.slot_index as slot_index
+
+
+# --------------------------------
+# Booking Pipeline
+# --------------------------------
+
+
+def book_appointment(appointment_id, contact, doc_id, date, time, reason, new_patient=None, status="Scheduled"):
+    """
+    Books an appointment in one transaction on one connection:
+    patient upsert, slot claim, and a guarded insert that also checks the
+    doctor and duplicate bookings. With time=None the doctor's earliest free
+    slot that day is booked. A doctor who publishes slots that day can only
+    be booked on them; one who does not is booked at the given time unless
+    another scheduled appointment already holds it. Returns (outcome,
+    details) where outcome is "booked", "invalid", "patient_missing",
+    "doctor_missing", "duplicate", "slot_taken" or "error".
+    """
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+
+        # ✅ Step 1: register the patient if this contact is new (no-op otherwise)
+        created_patient = False
+        if new_patient:
+            cursor.execute(
+                """
+                    INSERT INTO patient (id, name, gender, age, blood_group, contact)
+                    SELECT %s, %s, %s, %s, %s, %s {dual}
+                    WHERE NOT EXISTS (SELECT 1 FROM patient WHERE contact = %s)
+                """.format(dual=dialect.dual), (new_patient["id"], new_patient["name"], new_patient["gender"], new_patient["age"],
+                      new_patient["blood_group"], contact, contact)
+            )
+            created_patient = cursor.rowcount > 0
+
+        # ✅ Step 2: claim the doctor's slot and link it to this appointment; locked until commit
+        claimed = sch.claim_slot(cursor, doc_id, date, appointment_id, time)
+        if claimed is None and time is None:
+            conn.rollback()
+            return "slot_taken", {}
+        if claimed is None:
+            # No free slot at that time: taken, off the doctor's grid, or no schedule that day
+            outcome = _unscheduled_time(cursor, dialect, doc_id, date, time)
+            if outcome is not None:
+                conn.rollback()
+                return outcome, {"message": OFF_GRID} if outcome == "invalid" else {}
+        else:
+            time = claimed
+
+        # ✅ Step 3: resolve patient, check doctor and duplicates, and insert in one statement
+        query = """
+            INSERT INTO appointment (id, patient_id, doctor_id, appointment_date, appointment_time, reason, status)
+            SELECT %s, p.id, %s, %s, %s, %s, %s
+            FROM patient p
+            WHERE p.contact = %s
+                AND EXISTS (SELECT 1 FROM doctor WHERE id = %s)
+                AND NOT EXISTS (
+                    SELECT 1 FROM appointment a
+                    WHERE a.patient_id = p.id
+                        AND a.appointment_date = %s
+                        AND a.appointment_time = %s
+                        AND a.status = 'Scheduled'
+                )
+        """
+        params = (appointment_id, doc_id, date, time, reason, status, contact, doc_id, date, time)
+        if dialect.supports_returning:
+            cursor.execute(query + " RETURNING patient_id", params)
+            row = cursor.fetchone()
+        else:
+            cursor.execute(query, params)
+            row = None
+            if cursor.rowcount > 0:
+                cursor.execute("SELECT patient_id FROM appointment WHERE id = %s", (appointment_id,))
+                row = cursor.fetchone()
+
+        if row is None:
+            outcome = _diagnose(cursor, contact, doc_id)
+            conn.rollback()
+            return outcome, {}
+
+        conn.commit()
+        if claimed is not None:
+            slot_index.index.set_booked_at(doc_id, date, time, True)
+        print(f"[✓] Appointment {appointment_id} Booked For Patient {row[0]}.")
+        return "booked", {
+            "appointment_id": appointment_id,
+            "patient_id": row[0],
+            "doctor_id": doc_id,
+            "date": str(date),
+            "time": str(time),
+            "slot_claimed": claimed is not None,
+            "new_patient": created_patient
+        }
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Booking Appointment. Try Again Later \n error: {e}")
+        return "error", {}
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+OFF_GRID = "Doctor has no slot at that time"
+
+def _unscheduled_time(cursor, dialect, doc_id, date, time, appointment_id=None):
+    """
+    Called when no free slot matched the requested time. Returns the
+    failing outcome, or None when the doctor has no schedule that day and
+    nobody else is booked with them at that time.
+    """
+    cursor.execute(
+        """
+            SELECT COUNT(*), SUM(CASE WHEN available_time = %s THEN 1 ELSE 0 END)
+            FROM doctor_availability
+            WHERE doctor_id = %s AND available_date = %s
+        """, (time, doc_id, date)
+    )
+    slots, at_time = cursor.fetchone()
+    if slots:
+        return "slot_taken" if at_time else "invalid"
+
+    # ✅ No slot rows to lock: the doctor row serialises unscheduled bookings (SQLite's begin() already does)
+    if dialect.supports_skip_locked:
+        cursor.execute("SELECT id FROM doctor WHERE id = %s FOR UPDATE", (doc_id,))
+        cursor.fetchall()
+    cursor.execute(
+        """
+            SELECT 1 FROM appointment
+            WHERE doctor_id = %s AND appointment_date = %s AND appointment_time = %s
+                AND status = 'Scheduled' AND id <> %s
+        """, (doc_id, date, time, appointment_id or "")
+    )
+    return "slot_taken" if cursor.fetchone() is not None else None
+
+def _diagnose(cursor, contact, doc_id):
+    # Only runs on the failure path, to tell the caller which guard failed
+    cursor.execute(
+        """
+            SELECT
+                (SELECT id FROM patient WHERE contact = %s),
+                (SELECT COUNT(*) FROM doctor WHERE id = %s)
+        """, (contact, doc_id)
+    )
+    patient_id, doctor_count = cursor.fetchone()
+    if patient_id is None:
+        return "patient_missing"
+    if not doctor_count:
+        return "doctor_missing"
+    return "duplicate"
+
+
+# --------------------------------
+# Rescheduling
+# --------------------------------
+
+
+SLOT_FIELDS = ("doctor_id", "appointment_date", "appointment_time")
+
+def update_appointment(appointment_id, changes, allowed_fields, expected_version=None):
+    """
+    Applies changes to one appointment in one transaction, keeping its
+    doctor_availability slot in step: moving it to another doctor, date or
+    time releases the old slot and claims the new one, and cancelling it
+    releases the slot. The version check and the slot moves commit or roll
+    back together. Returns (outcome, version) with the outcomes of
+    db_patch.patch_row() plus "slot_taken" and "invalid" for a move that
+    cannot be booked.
+    """
+    unknown = set(changes) - set(allowed_fields)
+    if unknown or not changes:
+        print(f"[X] Invalid Fields For appointment: {sorted(unknown) or 'nothing to update'}")
+        return "invalid", None
+
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    lock = "FOR UPDATE" if dialect.supports_skip_locked else ""
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+
+        # ✅ Lock the appointment first, so two edits of it cannot move its slot at once
+        cursor.execute(
+            f"""
+                SELECT doctor_id, appointment_date, appointment_time, status, version
+                FROM appointment WHERE id = %s {lock}
+            """, (appointment_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return "not_found", None
+        if expected_version is not None and row[4] != expected_version:
+            conn.rollback()
+            print(f"[!] appointment {appointment_id} Changed Since Version {expected_version}; Now At {row[4]}.")
+            return "conflict", row[4]
+
+        current = dict(zip(SLOT_FIELDS, (row[0], slot_index.as_date(row[1]), slot_index.as_time(row[2]))))
+        target = {field: changes.get(field, current[field]) for field in SLOT_FIELDS}
+        old_status, new_status = row[3], changes.get("status", row[3])
+        moved = target != current or (old_status != "Scheduled" and new_status == "Scheduled")
+
+        released = []
+        if moved or new_status == "Cancelled":
+            cursor.execute("SELECT id FROM doctor_availability WHERE appointment_id = %s", (appointment_id,))
+            released = [slot_id for (slot_id,) in cursor.fetchall()]
+            cursor.execute(
+                """
+                    UPDATE doctor_availability SET is_booked = FALSE, appointment_id = NULL
+                    WHERE appointment_id = %s
+                """, (appointment_id,)
+            )
+
+        claimed = None
+        if moved and new_status == "Scheduled":
+            doc_id, date, time = target["doctor_id"], target["appointment_date"], target["appointment_time"]
+            claimed = sch.claim_slot(cursor, doc_id, date, appointment_id, time)
+            if claimed is None:
+                outcome = _unscheduled_time(cursor, dialect, doc_id, date, time, appointment_id)
+                if outcome is not None:
+                    conn.rollback()
+                    return outcome, row[4]
+
+        outcome, version = patch.apply_patch(cursor, "appointment", appointment_id, changes, expected_version)
+        if outcome != "updated":
+            conn.rollback()
+            return outcome, version
+        conn.commit()
+
+        for slot_id in released:
+            slot_index.index.set_booked(slot_id, False)
+        if claimed is not None:
+            slot_index.index.set_booked_at(target["doctor_id"], target["appointment_date"], claimed, True)
+        return outcome, version
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Updating appointment {appointment_id}. Try Again Later \n error: {e}")
+        return "error", None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+# --------------------------------
+# Batch Booking
+# --------------------------------
+
+
+def _in(values):
+    return ", ".join(["%s"] * len(values))
+
+def book_batch(bookings):
+    """
+    Books many appointments in one transaction with a fixed number of
+    statements, however many bookings there are: one lookup each for
+    patients, doctors, the patients' and the doctors' existing appointments
+    and slots, then one executemany each for the slot claims and the
+    inserts.
+    bookings: list of dicts with appointment_id, contact, doc_id, date,
+    time (None = earliest free slot) and reason.
+    Returns [(outcome, details)] in input order, with the same outcomes as
+    book_appointment() except that new patients are not registered here.
+    """
+    if not bookings:
+        return []
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    # Engines with row locks hold the slots until commit; SQLite's begin() already locks the database
+    lock = "FOR UPDATE" if dialect.supports_skip_locked else ""
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+
+        contacts = sorted({b["contact"] for b in bookings})
+        cursor.execute(f"SELECT contact, id FROM patient WHERE contact IN ({_in(contacts)})", contacts)
+        patients = {int(contact): patient_id for contact, patient_id in cursor.fetchall()}
+
+        # Doctor rows are locked too: they guard bookings for doctors without a schedule that day
+        doc_ids = sorted({b["doc_id"] for b in bookings})
+        cursor.execute(f"SELECT id FROM doctor WHERE id IN ({_in(doc_ids)}) ORDER BY id {lock}", doc_ids)
+        doctors = {row[0] for row in cursor.fetchall()}
+
+        dates = sorted({b["date"] for b in bookings})
+        patient_ids = sorted(set(patients.values()))
+        taken = set()       # (patient_id, date, time) already scheduled
+        if patient_ids:
+            cursor.execute(
+                f"""
+                    SELECT patient_id, appointment_date, appointment_time FROM appointment
+                    WHERE patient_id IN ({_in(patient_ids)}) AND appointment_date IN ({_in(dates)})
+                        AND status = 'Scheduled'
+                """, patient_ids + dates
+            )
+            taken = {(p, slot_index.as_date(d), slot_index.as_time(t)) for p, d, t in cursor.fetchall()}
+
+        cursor.execute(
+            f"""
+                SELECT doctor_id, appointment_date, appointment_time FROM appointment
+                WHERE doctor_id IN ({_in(doc_ids)}) AND appointment_date IN ({_in(dates)})
+                    AND status = 'Scheduled'
+            """, doc_ids + dates
+        )
+        busy = {(d, slot_index.as_date(day), slot_index.as_time(t)) for d, day, t in cursor.fetchall()}
+
+        cursor.execute(
+            f"""
+                SELECT id, doctor_id, available_date, available_time, is_booked
+                FROM doctor_availability
+                WHERE doctor_id IN ({_in(doc_ids)}) AND available_date IN ({_in(dates)})
+                ORDER BY doctor_id, available_date, available_time {lock}
+            """, doc_ids + dates
+        )
+        slots = {}          # (doc_id, date) -> [[slot_id, time, booked]] in time order
+        for slot_id, doc_id, available_date, available_time, is_booked in cursor.fetchall():
+            key = (doc_id, slot_index.as_date(available_date))
+            slots.setdefault(key, []).append([slot_id, slot_index.as_time(available_time), bool(is_booked)])
+
+        results, claims, inserts = [], [], []
+        for b in bookings:
+            patient_id = patients.get(b["contact"])
+            if patient_id is None:
+                results.append(("patient_missing", {}))
+                continue
+            if b["doc_id"] not in doctors:
+                results.append(("doctor_missing", {}))
+                continue
+
+            # ✅ Pick the slot in memory; the rows are locked, so nobody else can take it first
+            day = slots.get((b["doc_id"], b["date"]), [])
+            if b["time"] is None:
+                slot = next((s for s in day if not s[2]), None)
+                if slot is None:
+                    results.append(("slot_taken", {}))
+                    continue
+            else:
+                slot = next((s for s in day if s[1] == b["time"]), None)
+                if slot is not None and slot[2]:
+                    results.append(("slot_taken", {}))
+                    continue
+                if slot is None and day:
+                    results.append(("invalid", {"message": OFF_GRID}))
+                    continue
+                if slot is None and (b["doc_id"], b["date"], b["time"]) in busy:
+                    results.append(("slot_taken", {}))
+                    continue
+            booked_time = slot[1] if slot else b["time"]
+
+            if (patient_id, b["date"], booked_time) in taken:
+                results.append(("duplicate", {}))
+                continue
+            taken.add((patient_id, b["date"], booked_time))
+            busy.add((b["doc_id"], b["date"], booked_time))
+
+            if slot is not None:
+                slot[2] = True
+                claims.append((b["appointment_id"], slot[0]))
+            inserts.append((b["appointment_id"], patient_id, b["doc_id"], b["date"], booked_time, b["reason"], "Scheduled"))
+            results.append(("booked", {
+                "appointment_id": b["appointment_id"],
+                "patient_id": patient_id,
+                "doctor_id": b["doc_id"],
+                "date": str(b["date"]),
+                "time": str(booked_time),
+                "slot_claimed": slot is not None,
+                "slot_id": slot[0] if slot else None
+            }))
+
+        if claims:
+            cursor.executemany(
+                """
+                    UPDATE doctor_availability SET is_booked = TRUE, appointment_id = %s
+                    WHERE id = %s AND is_booked = FALSE
+                """, claims
+            )
+        if inserts:
+            cursor.executemany(
+                """
+                    INSERT INTO appointment (id, patient_id, doctor_id, appointment_date, appointment_time, reason, status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, inserts
+            )
+        conn.commit()
+
+        for outcome, details in results:
+            if outcome == "booked" and details["slot_claimed"]:
+                slot_index.index.set_booked(details["slot_id"], True)
+        print(f"[✓] Batch Booked {len(inserts)} Of {len(bookings)} Appointments.")
+        return results
+    except Exception as e:
+        if conn:
+            conn.rollback()   # ❌ All or nothing: a failed batch books none of its items
+        print(f"[X] Error Booking A Batch Of {len(bookings)} Appointments. Try Again Later \n error: {e}")
+        return [("error", {}) for _ in bookings]
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
@@ -0,0 +1,481 @@
+import csv
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from dotenv import load_dotenv
+from config import mydb, pool_config, db_engine, sqlite_path
+import database.metrics as metrics
+
+load_dotenv()
+
+
+# --------------------------------
+# Connection Pool
+# --------------------------------
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """
+    Wraps a raw DB-API connection. close() hands it back to the pool
+    instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, raw, pinned=False):
+        self._pool = pool
+        self._raw = raw
+        self._pinned = pinned       # pinned = owned by the current request
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        # ✅ Every statement is counted and timed against the current request (see database/metrics.py)
+        return metrics.TimedCursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        # Request-scoped connections are returned in end_request()
+        if self._pinned or self._released:
+            return
+        self._released = True
+        self._pool.release(self._raw)
+
+    def release(self):
+        self._pinned = False
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, name, connect, max_size=10, timeout=5.0, max_idle=300.0, health_check_after=30.0):
+        self.name = name
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout                          # seconds to wait for a free connection
+        self.max_idle = max_idle                        # idle connections older than this are closed
+        self.health_check_after = health_check_after    # ping connections idle longer than this
+        self._idle = []                                 # [(raw, last_used)], reused LIFO
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "reaped": 0,
+            "discarded": 0,
+        }
+
+    # ✅ Borrow a connection (reuse an idle one, open a new one, or wait)
+    def checkout(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        raw, last_used, waited = None, None, False
+        with self._cond:
+            self._reap_idle_locked()
+            while True:
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    self._stats["hits"] += 1
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._stats["misses"] += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No free connection in pool '{self.name}' after {self.timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+            waited_for = time.perf_counter() - start
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total"] += waited_for
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited_for)
+
+        if raw is not None and time.monotonic() - last_used > self.health_check_after:
+            if not self._is_healthy(raw):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                self._close_quietly(raw)
+                raw = None
+
+        opened = raw is None
+        if raw is None:
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        metrics.record_checkout(opened)
+        return PooledConnection(self, raw)
+
+    # ✅ Return a connection; any unfinished transaction is rolled back first
+    def release(self, raw):
+        try:
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def reap_idle(self):
+        with self._cond:
+            self._reap_idle_locked()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self.max_size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["wait_time_avg"] = stats["wait_time_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def _reap_idle_locked(self):
+        now = time.monotonic()
+        keep = []
+        for raw, last_used in self._idle:
+            if now - last_used > self.max_idle:
+                self._size -= 1
+                self._stats["reaped"] += 1
+                self._close_quietly(raw)
+            else:
+                keep.append((raw, last_used))
+        self._idle = keep
+
+    def _discard(self, raw):
+        self._close_quietly(raw)
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(raw):
+        cursor = None
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            raw.rollback()
+            return True
+        except Exception:
+            return False
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+# --------------------------------
+# Dialects
+# --------------------------------
+
+
+def insert_values(verb, table, columns, rows=1):
+    # ✅ One statement carrying `rows` tuples: INSERT ... VALUES (...), (...), ...
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    return f"{verb} {table} ({', '.join(columns)}) VALUES {', '.join([row] * rows)}"
+
+
+class Dialect:
+    """
+    Everything that differs between the engines we can run on: how to
+    connect and the few SQL spellings the database modules need.
+    """
+    name = None
+    supports_returning = False
+    supports_skip_locked = False
+    autoincrement_pk = "INTEGER PRIMARY KEY"
+    timestamp_type = "TIMESTAMP"
+    dual = ""                       # FROM clause for a SELECT that needs no table
+
+    def connect(self):
+        raise NotImplementedError
+
+    def insert_ignore(self, table, columns, rows=1):
+        return f"{insert_values('INSERT INTO', table, columns, rows)} ON CONFLICT DO NOTHING"
+
+    def create_index(self, name, table, columns, unique=False):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        return f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+
+    def index_exists(self, cursor, table, name):
+        # ✅ IF NOT EXISTS already makes create_index() safe to rerun
+        return False
+
+    def column_exists(self, cursor, table, column):
+        # ✅ ADD COLUMN has no portable IF NOT EXISTS; an empty select still describes every column
+        cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+        cursor.fetchall()
+        return column.lower() in {description[0].lower() for description in cursor.description}
+
+    def begin(self, conn):
+        # ✅ Drivers that open transactions implicitly need nothing here
+        pass
+
+    def bulk_load(self, cursor, table, columns, rows):
+        # ✅ Fastest generic load: pymysql folds this into multi-row INSERTs, sqlite3 reuses one statement
+        cursor.executemany(insert_values("INSERT INTO", table, columns), rows)
+
+    def server_cursor(self, conn, batch_size=1000):
+        # ✅ Cursor that pulls rows from the server as they are fetched, not all at execute()
+        return conn.cursor()
+
+
+class MySQLDialect(Dialect):
+    name = "mysql"
+    supports_skip_locked = True
+    autoincrement_pk = "INT AUTO_INCREMENT PRIMARY KEY"
+    timestamp_type = "DATETIME"
+    dual = "FROM DUAL"
+
+    def connect(self):
+        import pymysql
+        return pymysql.connect(**mydb)
+
+    def insert_ignore(self, table, columns, rows=1):
+        return insert_values("INSERT IGNORE INTO", table, columns, rows)
+
+    def create_index(self, name, table, columns, unique=False):
+        # MySQL has no CREATE INDEX IF NOT EXISTS; callers check index_exists() first
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        return f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"
+
+    def index_exists(self, cursor, table, name):
+        cursor.execute(
+            """
+                SELECT 1 FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                LIMIT 1
+            """, (table, name)
+        )
+        return cursor.fetchone() is not None
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute(
+            """
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+                LIMIT 1
+            """, (table, column)
+        )
+        return cursor.fetchone() is not None
+
+    def begin(self, conn):
+        conn.begin()
+
+    def server_cursor(self, conn, batch_size=1000):
+        import pymysql.cursors
+        return conn.cursor(pymysql.cursors.SSCursor)
+
+
+class PostgresDialect(Dialect):
+    name = "postgres"
+    supports_returning = True
+    supports_skip_locked = True
+    autoincrement_pk = "SERIAL PRIMARY KEY"
+
+    def connect(self):
+        """
+        Opens a connection to the PostgreSQL database on Render.
+        """
+        import psycopg2
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise ValueError("DATABASE_URL not set in environment variables.")
+        return psycopg2.connect(database_url)
+
+    def bulk_load(self, cursor, table, columns, rows):
+        # ✅ COPY takes the whole chunk in one round trip; NULLs are written as empty unquoted fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def server_cursor(self, conn, batch_size=1000):
+        # Named cursors live on the server; itersize rows come back per round trip
+        cursor = conn.cursor(name=f"stream_{id(conn):x}_{time.monotonic_ns():x}")
+        cursor.itersize = batch_size
+        return cursor
+
+
+class SQLiteDialect(Dialect):
+    """
+    In-process engine for local runs and benchmarks. Queries keep the
+    %s placeholders used everywhere else; the cursor wrapper rewrites them.
+    """
+    name = "sqlite"
+    supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+    autoincrement_pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def connect(self):
+        conn = sqlite3.connect(sqlite_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return SQLiteConnection(conn)
+
+    def insert_ignore(self, table, columns, rows=1):
+        return insert_values("INSERT OR IGNORE INTO", table, columns, rows)
+
+    def begin(self, conn):
+        # ✅ Take the write lock up front so concurrent writers queue instead of deadlocking
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+
+class SQLiteCursor:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def execute(self, query, params=()):
+        self._raw.execute(query.replace("%s", "?"), tuple(params))
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._raw.executemany(query.replace("%s", "?"), [tuple(p) for p in seq_of_params])
+        return self
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class SQLiteConnection:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self):
+        return SQLiteCursor(self._raw.cursor())
+
+    def execute(self, query, params=()):
+        return SQLiteCursor(self._raw.cursor()).execute(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(dt_time, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+_dialects = {
+    "mysql": MySQLDialect(),
+    "postgres": PostgresDialect(),
+    "sqlite": SQLiteDialect(),
+}
+
+def dialect(name=None):
+    name = name or db_engine
+    if name not in _dialects:
+        raise ValueError(f"Unsupported DB_ENGINE: {name}")
+    return _dialects[name]
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(name=None):
+    name = name or db_engine
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = ConnectionPool(name, dialect(name).connect, **pool_config)
+                _pools[name] = pool
+    return pool
+
+def reset_pools():
+    # ✅ Drop every pool, e.g. after switching engine or database file
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+# --------------------------------
+# Per-Request Checkout
+# --------------------------------
+
+
+_request = threading.local()
+
+def begin_request():
+    _request.connections = {}
+
+def end_request():
+    connections = getattr(_request, "connections", None)
+    _request.connections = None
+    if connections:
+        for conn in connections.values():
+            conn.release()
+
+def get_connection(name=None):
+    """
+    Returns a pooled connection to the configured engine. Inside a request
+    every call shares one checked-out connection until end_request().
+    """
+    name = name or db_engine
+    connections = getattr(_request, "connections", None)
+    if connections is None:
+        return get_pool(name).checkout()
+    conn = connections.get(name)
+    if conn is None:
+        conn = get_pool(name).checkout()
+        conn._pinned = True
+        connections[name] = conn
+    return conn
+
+# DB-API errors caused by the statement or its values, not the connection; retrying cannot fix them
+PERMANENT_ERRORS = {"DataError", "IntegrityError", "ProgrammingError", "NotSupportedError"}
+
+def is_permanent_error(exc):
+    # Matched by class name so every driver's hierarchy counts without importing it
+    if isinstance(exc, (TypeError, ValueError)):
+        return True
+    return any(cls.__name__ in PERMANENT_ERRORS for cls in type(exc).__mro__)
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in list(_pools.items())}
@@ -1,19 +1,23 @@
-import os
-import psycopg2
+import database.db_connection as db
+import database.db_pagination as pg
+from database.cache import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# ✅ Departments barely change; single rows by id and list pages by (limit, cursor)
+department_cache = TTLCache("department")
+department_list_cache = TTLCache("department_list")
+
+def invalidate_department(dept_id):
+    department_cache.invalidate(dept_id)
+    department_list_cache.clear()
+
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
 def insert_dept(id, name, description):
     conn = None
@@ -29,6 +33,7 @@ def insert_dept(id, name, description):
             """, (id, name, description)  # ✅ values passed as tuple
         )
         conn.commit()  # ✅ Commit transaction so the new department is saved
+        invalidate_department(id)
         print("[✓] Department created Successfully.")
         return True
     except Exception as e:
@@ -54,6 +59,7 @@ def delete_department(dept_id):
             """,(dept_id,)   # tuple required (id,)
         )
         conn.commit()   # ✅ Save changes permanently
+        invalidate_department(dept_id)
         print(f"[✓] Department with id {dept_id} deleted.")
         return True
     except Exception as e:
@@ -93,6 +99,7 @@ def update_department(dept_id, name=None, description= None):
         values.append(dept_id)
         cursor.execute(query, values)
         conn.commit()
+        invalidate_department(dept_id)
         print(f"[✓] Department with ID {dept_id} updated successfully.")
         return True
 
@@ -108,6 +115,9 @@ def update_department(dept_id, name=None, description= None):
             conn.close()
 
 def view_department(dept_id):
+    cached = department_cache.get(dept_id)
+    if cached is not None:
+        return dict(cached)
     conn = None
     cursor = None
     try:
@@ -126,11 +136,13 @@ def view_department(dept_id):
         # ✅ Convert rows into a list of dicts for readability
         if not row:
             return {}
-        return {
+        department = {
             "department_id": row[0],
             "department_name": row[1],
             "department_description": row[2]
         }
+        department_cache.set(dept_id, department)
+        return dict(department)
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
@@ -143,24 +155,26 @@ def view_department(dept_id):
         if conn:
             conn.close()
 
-def view_all_departments(limit=100, offset=0):
+def view_all_departments(limit=100, after=None):
+    # ✅ One page ordered by id; returns (departments, next_cursor)
+    cached = department_list_cache.get((limit, after))
+    if cached is not None:
+        return [dict(department) for department in cached[0]], cached[1]
     conn = None
     cursor = None
     try:
         conn = get_connection()   # ✅ Establish DB connection
         cursor = conn.cursor()    # ✅ Create cursor for running SQL queries
-        # ✅ Fetch the department details by ID using parameter binding (%s)
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
-                
                 SELECT id, name, description
                 FROM department
-                LIMIT %s OFFSET %s
-            """(limit,offset)
+            """,
+            ["id"], "department", key=lambda row: row[:1], limit=limit, after=after
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
-        return [
+        departments = [
             {
             "department_id": department_id,
             "department_name": department_name,
@@ -168,11 +182,15 @@ def view_all_departments(limit=100, offset=0):
             }
             for department_id, department_name, department_description in rows
         ]
+        department_list_cache.set((limit, after), (departments, next_cursor))
+        return [dict(department) for department in departments], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Department Info. Try Again Later \n Error: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -180,6 +198,13 @@ def view_all_departments(limit=100, offset=0):
         if conn:
             conn.close()
 
+def department_ids_by_name():
+    # ✅ {lowercased name: id} built from the cached department pages
+    return {
+        department["department_name"].lower(): department["department_id"]
+        for department in pg.iterate(view_all_departments, limit=pg.MAX_PAGE_SIZE)
+    }
+
 def department_exists(name):
     conn = None
     cursor = None
@@ -211,6 +236,8 @@ def department_exists(name):
         if conn: conn.close()
 
 def department_exists_id(id):
+    if department_cache.get(id) is not None:
+        return True
     conn = None
     cursor = None
     try:
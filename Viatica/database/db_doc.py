@@ -1,19 +1,19 @@
-import os
-import psycopg2
+import database.db_connection as db
+import database.db_pagination as pg
+import database.db_patch as patch
+from database.cache import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# ✅ Doctor rows by id; read on every booking, written rarely
+doctor_cache = TTLCache("doctor")
+
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
 
 
@@ -36,6 +36,7 @@ def insert_doc(id, first_name, last_name, gender, DOB, specialization, experienc
             """, (id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id)  # ✅ values passed as tuple
         )
         conn.commit()  # ✅ Commit transaction so the new Doctors is saved
+        doctor_cache.invalidate(id)
         print("[✓] Doctor Added Successfully.")
         return True
     except Exception as e:
@@ -48,6 +49,42 @@ def insert_doc(id, first_name, last_name, gender, DOB, specialization, experienc
         if cursor: cursor.close()
         if conn: conn.close()
 
+DOCTOR_COLUMNS = ["id", "first_name", "last_name", "gender", "DOB", "specialization", "experience", "contact", "email", "consultation_fee", "dept_id"]
+
+def insert_doctor_batch(rows):
+    """
+    Inserts already validated doctors in one transaction.
+    rows: list of tuples in DOCTOR_COLUMNS order.
+    Contacts already on file are skipped with one IN lookup for the whole
+    batch. Returns (inserted, contacts already on file), or None on error.
+    """
+    if not rows:
+        return 0, set()
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)            # ✅ Lookup and insert in one transaction
+        placeholders = ", ".join(["%s"] * len(rows))
+        cursor.execute(f"SELECT contact FROM doctor WHERE contact IN ({placeholders})", [row[7] for row in rows])
+        existing = {int(row[0]) for row in cursor.fetchall()}
+        fresh = [row for row in rows if row[7] not in existing]
+        if fresh:
+            query = db.insert_values("INSERT INTO", "doctor", DOCTOR_COLUMNS, rows=len(fresh))
+            cursor.execute(query, [value for row in fresh for value in row])
+        conn.commit()
+        return len(fresh), existing
+    except Exception as e:
+        if conn:
+            conn.rollback()  # ❌ Only this batch is lost; earlier ones are committed
+        print(f"[X] Error Inserting {len(rows)} Doctors. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
 
 # -------------------
 # DELETE
@@ -67,6 +104,7 @@ def delete_doc(id):
             """, (id,)   # tuple required (id,)
         )
         conn.commit()   # ✅ Save changes permanently
+        doctor_cache.invalidate(id)
         print(f"[✓] Doctor with id {id} deleted.")
         return True
     except Exception as e:
@@ -122,10 +160,19 @@ def update_doctor_dept_id(doctor_id, new_dept_id):
     # Calls helper function to update only the "email" field
     update_field(doctor_id, "dept_id", new_dept_id)
 
+UPDATABLE_FIELDS = {"first_name", "last_name", "gender", "specialization", "experience", "contact", "email", "consultation_fee", "dept_id"}
+
+def update_doctor(doctor_id, changes, expected_version=None):
+    # ✅ All changed fields in one UPDATE; see db_patch.patch_row for outcomes
+    outcome, version = patch.patch_row("doctor", doctor_id, changes, UPDATABLE_FIELDS, expected_version)
+    if outcome == "updated":
+        doctor_cache.invalidate(doctor_id)
+    return outcome, version
+
 # ✅ Generic helper function to update any allowed field
 def update_field(doctor_id, field, value):
     # Define which fields are allowed to be updated (safety check)
-    allowed_fields = {"first_name", "last_name", "gender", "specialization", "experience", "contact", "email", "consultation_fee", "dept_id"}
+    allowed_fields = UPDATABLE_FIELDS
     if field not in allowed_fields:
         raise ValueError("Invalid Field Name")  # Prevents SQL injection
     conn = None
@@ -135,9 +182,10 @@ def update_field(doctor_id, field, value):
         cursor = conn.cursor()
         # ⚠️ Using f-string for column name is okay here since it's validated
         # But values (field value + doctor_id) must use parameter binding (%s)
-        query = f"UPDATE doctor SET {field} = %s WHERE id = %s"
+        query = f"UPDATE doctor SET {field} = %s, version = version + 1 WHERE id = %s"
         cursor.execute(query, (value, doctor_id))  # Safe against SQL injection
         conn.commit()  # Save changes
+        doctor_cache.invalidate(doctor_id)
         print(f"[✓] Updated {field} for doctor {doctor_id}")
         return True
     except Exception as e:
@@ -157,6 +205,9 @@ def update_field(doctor_id, field, value):
 
 
 def view_doc(doc_id):
+    cached = doctor_cache.get(doc_id)
+    if cached is not None:
+        return dict(cached)   # ✅ Copy, so callers can't edit the cached row
     conn = None
     cursor = None
     try:
@@ -164,7 +215,7 @@ def view_doc(doc_id):
         cursor = conn.cursor()
         cursor.execute(
             """
-                select id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id
+                select id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id, version
                 from doctor
                 where id = %s
             """, (doc_id,)
@@ -173,7 +224,7 @@ def view_doc(doc_id):
         if result is None:
             return None  # No doctor found with given ID
         # ✅ Unpack tuple directly into variables
-        id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id = result
+        id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id, version = result
         # ✅ Construct a clean dictionary for returning data
         doc_details = {
             "id" : id,
@@ -186,9 +237,11 @@ def view_doc(doc_id):
             "contact" : contact,
             "email" : email,
             "consultation_fee" : consultation_fee,
-            "dept_id": dept_id
+            "dept_id": dept_id,
+            "version": version
         }
-        return doc_details
+        doctor_cache.set(doc_id, doc_details)
+        return dict(doc_details)
     except Exception as e:
         # ❌ If something goes wrong, log error and return None (safe fallback)
         if conn:
@@ -205,7 +258,8 @@ def view_doc(doc_id):
 # -------------------
 
 
-def view_all_doctors(limit = 100, offset = 0):
+def view_all_doctors(limit = 100, after = None):
+    # ✅ One page ordered by id; returns (doctors, next_cursor)
     conn = None
     cursor = None
     try:
@@ -213,14 +267,14 @@ def view_all_doctors(limit = 100, offset = 0):
         conn = get_connection()
         cursor = conn.cursor()
         # ✅ Fetch all doctors (id, first_name, last_name, gender, DOB, specialization, experience, contact, email)
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT id, first_name, last_name, gender, DOB, specialization, experience, contact, email,consultation_fee, dept_id
                 FROM doctor
-                ORDER BY id LIMIT %s OFFSET %s
-            """,(limit,offset)
+            """,
+            ["id"], "doctor", key=lambda row: row[:1], limit=limit, after=after
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
@@ -237,12 +291,14 @@ def view_all_doctors(limit = 100, offset = 0):
             "dept_id": dept_id
             }
             for id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id in rows
-        ]
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -250,7 +306,7 @@ def view_all_doctors(limit = 100, offset = 0):
         if conn:
             conn.close()
 
-def view_all_doctors_by_department(dept_id, limit = 100, offset = 0):
+def view_all_doctors_by_department(dept_id, limit = 100, after = None):
     conn = None
     cursor = None
     try:
@@ -258,15 +314,15 @@ def view_all_doctors_by_department(dept_id, limit = 100, offset = 0):
         conn = get_connection()
         cursor = conn.cursor()
         # ✅ Fetch all doctors (id, first_name, last_name, gender, DOB, specialization, experience, contact, email)
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT id, first_name, last_name, gender, DOB, specialization, experience, contact, email,consultation_fee, dept_id
                 FROM doctor
-                WHERE dept_id = %s
-                ORDER BY id LIMIT %s OFFSET %s
-            """,(dept_id, limit, offset)
+            """,
+            ["id"], "doctor_dept", key=lambda row: row[:1], limit=limit, after=after,
+            where="dept_id = %s", params=(dept_id,)
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
@@ -283,12 +339,14 @@ def view_all_doctors_by_department(dept_id, limit = 100, offset = 0):
             "dept_id": dept_id
             }
             for id, first_name, last_name, gender, DOB, specialization, experience, contact, email, consultation_fee, dept_id in rows
-        ]
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -406,6 +464,8 @@ def doctor_exists_contact(contact):
         if conn: conn.close()
 
 def doctor_exists_id(id):
+    if doctor_cache.get(id) is not None:
+        return True
     conn = None
     cursor = None
     try:
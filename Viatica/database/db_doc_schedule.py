@@ -1,5 +1,6 @@
-import os
-import psycopg2
+import database.db_connection as db
+import database.db_pagination as pg
+import database.slot_index as slot_index
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
@@ -7,14 +8,9 @@ load_dotenv()
 
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
 def add_availability(id, doc_id,date,day_of_week, start_time, end_time, slot_duration):
     conn = None
@@ -25,16 +21,16 @@ def add_availability(id, doc_id,date,day_of_week, start_time, end_time, slot_dur
         start = datetime.strptime(start_time, "%H:%M")
         end = datetime.strptime(end_time, "%H:%M")
 
+        # ✅ INSERT IGNORE is spelled differently on every engine
+        query = db.dialect().insert_ignore(
+            "doctor_availability",
+            ["id", "doctor_id", "available_date", "available_time", "day_of_week", "is_booked"]
+        )
         while start < end:
-            cursor.execute(
-                """
-                INSERT IGNORE INTO doctor_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
-                VALUES (%s, %s, %s, %s, %s, FALSE)
-                """,
-                (id, doc_id, date, start.time(), day_of_week)
-            )
+            cursor.execute(query, (id, doc_id, date, start.time(), day_of_week, False))
             start += timedelta(minutes=slot_duration)
         conn.commit()  # ✅ Commit transaction so the new Doctors is saved
+        slot_index.index.invalidate(doc_id)
         print("[✓] Availability Added Successfully.")
         return True
     except Exception as e:
@@ -47,6 +43,84 @@ def add_availability(id, doc_id,date,day_of_week, start_time, end_time, slot_dur
         if cursor: cursor.close()
         if conn: conn.close()
 
+# -------------------
+# Bulk Slot Generation
+# -------------------
+
+
+AVAILABILITY_COLUMNS = ["id", "doctor_id", "available_date", "available_time", "day_of_week", "is_booked"]
+
+def bulk_add_availability(rows, batch_size=1000):
+    """
+    Inserts slots as multi-row INSERTs, one transaction per batch.
+    rows: iterable of (id, doctor_id, available_date, available_time, day_of_week).
+    Slots that already exist are skipped. Returns (ok, rows inserted); on a
+    failure the batches before it stay committed and are counted.
+    """
+    conn = None
+    cursor = None
+    inserted = 0
+    doc_ids = set()
+    try:
+        conn = get_connection()        # ✅ One connection for the whole rollout
+        cursor = conn.cursor()
+        batch = []
+        for row in rows:
+            batch.append(row)
+            doc_ids.add(row[1])
+            if len(batch) >= batch_size:
+                inserted += _insert_slot_batch(conn, cursor, batch)
+                batch = []
+        if batch:
+            inserted += _insert_slot_batch(conn, cursor, batch)
+        print(f"[✓] {inserted} Availability Slots Added.")
+        return True, inserted
+    except Exception as e:
+        if conn:
+            conn.rollback()  # ❌ Only the failing batch is lost; earlier ones are committed
+        print(f"[X] Error Bulk Inserting Availability After {inserted} Rows. Try Again Later \n error: {e}")
+        return False, inserted
+    finally:
+        slot_index.index.invalidate_doctors(doc_ids)
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def _insert_slot_batch(conn, cursor, batch):
+    query = db.dialect().insert_ignore("doctor_availability", AVAILABILITY_COLUMNS, rows=len(batch))
+    params = []
+    for slot_id, doc_id, available_date, available_time, day_of_week in batch:
+        params.extend((slot_id, doc_id, available_date, available_time, day_of_week, False))
+    cursor.execute(query, params)
+    conn.commit()
+    return max(cursor.rowcount, 0)
+
+def latest_available_dates(doc_ids):
+    # ✅ One grouped query instead of one per doctor: {doctor_id: last generated date}
+    if not doc_ids:
+        return {}
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        placeholders = ", ".join(["%s"] * len(doc_ids))
+        cursor.execute(
+            f"""
+                SELECT doctor_id, MAX(available_date)
+                FROM doctor_availability
+                WHERE doctor_id IN ({placeholders})
+                GROUP BY doctor_id
+            """, tuple(doc_ids)
+        )
+        return {doctor_id: latest for doctor_id, latest in cursor.fetchall()}
+    except Exception as e:
+        if conn:
+            print(f"[X] Error Fetching Latest Availability Dates: {e}")
+        return {}
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
 def delete_slot(availability_id):
     conn = None
     cursor = None
@@ -60,6 +134,7 @@ def delete_slot(availability_id):
             """, (availability_id, )   # tuple required (id, start_time)
         )
         conn.commit()   # ✅ Save changes permanently
+        slot_index.index.remove(availability_id)
         print(f"[✓] Availability with id {availability_id} deleted.")
         return True
     except Exception as e:
@@ -92,6 +167,7 @@ def delete_slot_with_doc_id(doc_id, date, start_time = None):
                 """, (doc_id, date)   # tuple required (doc_id, date)
             )
         conn.commit()   # ✅ Save changes permanently
+        slot_index.index.invalidate(doc_id, date)
         if cursor.rowcount > 0:
             if start_time:
                 print(f"[✓] Slot on {date} at {start_time} for doctor {doc_id} deleted.")
@@ -120,11 +196,12 @@ def mark_slot_booked(availability_id, date, start_time):
         cursor.execute(
             """
                 UPDATE doctor_availability SET is_booked = TRUE
-                WHERE id = %s
-            """, (availability_id)
+                WHERE id = %s AND is_booked = FALSE
+            """, (availability_id,)
         )
         conn.commit()
         if cursor.rowcount > 0:
+            slot_index.index.set_booked(availability_id, True)
             print(f"[✓] Slot {availability_id} On {date} At {start_time} Marked As Booked.")
             return True
         else:
@@ -148,12 +225,13 @@ def mark_slot_free(availability_id, date, start_time):
         cursor = conn.cursor()
         cursor.execute(
             """
-                UPDATE doctor_availability SET is_booked = FALSE
+                UPDATE doctor_availability SET is_booked = FALSE, appointment_id = NULL
                 WHERE id = %s
-            """, (availability_id)
+            """, (availability_id,)
         )
         conn.commit()
         if cursor.rowcount > 0:
+            slot_index.index.set_booked(availability_id, False)
             print(f"[✓] Slot {availability_id} On {date} At {start_time} Marked As Free.")
             return True
         else:
@@ -169,48 +247,79 @@ def mark_slot_free(availability_id, date, start_time):
         if cursor: cursor.close()
         if conn: conn.close()
 
-def view_all_availability_for_doc(doc_id, limit = 100, offset = 0):
+# -------------------
+# Slot Reservation
+# -------------------
+
+
+def claim_slot(cursor, doc_id, date, appointment_id, time=None):
+    """
+    Claims a free slot inside the caller's transaction and links it to the
+    appointment. With a time only that slot is tried; without one the
+    earliest free slot of the day is taken. Returns the claimed time or None.
+    """
+    if time is not None:
+        # ✅ Conditional update: only one concurrent booker can flip is_booked
+        cursor.execute(
+            """
+                UPDATE doctor_availability SET is_booked = TRUE, appointment_id = %s
+                WHERE doctor_id = %s AND available_date = %s AND available_time = %s AND is_booked = FALSE
+            """, (appointment_id, doc_id, date, time)
+        )
+        return time if cursor.rowcount > 0 else None
+
+    # ✅ Skip rows other bookers have locked instead of queueing behind them
+    lock = "FOR UPDATE SKIP LOCKED" if db.dialect().supports_skip_locked else ""
+    cursor.execute(
+        f"""
+            SELECT id, available_time
+            FROM doctor_availability
+            WHERE doctor_id = %s AND available_date = %s AND is_booked = FALSE
+            ORDER BY available_time LIMIT 1 {lock}
+        """, (doc_id, date)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    cursor.execute(
+        """
+            UPDATE doctor_availability SET is_booked = TRUE, appointment_id = %s
+            WHERE id = %s AND is_booked = FALSE
+        """, (appointment_id, row[0])
+    )
+    return row[1] if cursor.rowcount > 0 else None
+
+def release_slot(appointment_id):
     conn = None
     cursor = None
     try:
-        # ✅ Establish DB connection
         conn = get_connection()
         cursor = conn.cursor()
-        # ✅ Fetch all doctors_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
+        cursor.execute("SELECT id FROM doctor_availability WHERE appointment_id = %s", (appointment_id,))
+        slot_ids = [row[0] for row in cursor.fetchall()]
         cursor.execute(
             """
-                SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
-                FROM doctor_availability
-                WHERE doctor_id = %s
-                ORDER BY id LIMIT %s OFFSET %s
-            """,(doc_id, limit, offset)
+                UPDATE doctor_availability SET is_booked = FALSE, appointment_id = NULL
+                WHERE appointment_id = %s
+            """, (appointment_id,)
         )
-        rows = cursor.fetchall()
-        # ✅ Convert rows into a list of dicts for readability
-        return [
-            {
-            "id" : id,
-            "doctor_id" :doctor_id ,
-            "available_date" : available_date,
-            "available_time" : available_time,
-            "day_of_week" : day_of_week,
-            "is_booked" : is_booked
-            }
-            for id, doctor_id, available_date, available_time, day_of_week, is_booked in rows
-        ]
+        conn.commit()
+        for slot_id in slot_ids:
+            slot_index.index.set_booked(slot_id, False)
+        if cursor.rowcount > 0:
+            print(f"[✓] Slot Held By Appointment {appointment_id} Released.")
+        return True
     except Exception as e:
-        # ✅ Log errors but don’t crash the program
         if conn:
-            print(f"[X] Error Fetching Availability Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+            conn.rollback()   # ❌ Undo changes if an error occurs (safety)
+        print(f"[X] Error Releasing Slot For Appointment {appointment_id}. Try Again Later \n error: {e}")
+        return False
     finally:
-        # ✅ Always close resources (best practice in DB code)
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        # ✅ Always release resources
+        if cursor: cursor.close()
+        if conn: conn.close()
 
-def view_day_schedule(doc_id, available_date):
+def view_all_availability_for_doc(doc_id, limit = 100, after = None):
     conn = None
     cursor = None
     try:
@@ -218,15 +327,15 @@ def view_day_schedule(doc_id, available_date):
         conn = get_connection()
         cursor = conn.cursor()
         # ✅ Fetch all doctors_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
                 FROM doctor_availability
-                WHERE doctor_id = %s AND available_date = %s
-                
-            """,(doc_id, available_date)
+            """,
+            ["id"], "availability_doc", key=lambda row: row[:1], limit=limit, after=after,
+            where="doctor_id = %s", params=(doc_id,)
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
@@ -238,12 +347,14 @@ def view_day_schedule(doc_id, available_date):
             "is_booked" : is_booked
             }
             for id, doctor_id, available_date, available_time, day_of_week, is_booked in rows
-        ]
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Availability Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -251,89 +362,35 @@ def view_day_schedule(doc_id, available_date):
         if conn:
             conn.close()
 
+def view_day_schedule(doc_id, available_date):
+    try:
+        # ✅ Served from the in-memory slot index; it loads the day from the DB on a miss
+        return slot_index.index.day_schedule(doc_id, available_date)
+    except Exception as e:
+        # ✅ Log errors but don’t crash the program
+        print(f"[X] Error Fetching Availability Info: {e}")
+        return []  #  Return empty list instead of None for consistency
+
 def view_free_slots(doc_id, available_date):
-    conn = None
-    cursor = None
     try:
-        # ✅ Establish DB connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        # ✅ Fetch all doctors_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
-        cursor.execute(
-            """
-                SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
-                FROM doctor_availability
-                WHERE doctor_id = %s AND available_date = %s AND is_booked = FALSE
-                
-            """,(doc_id, available_date)
-        )
-        rows = cursor.fetchall()
-        # ✅ Convert rows into a list of dicts for readability
-        return [
-            {
-            "id" : id,
-            "doctor_id" :doctor_id ,
-            "available_date" : available_date,
-            "available_time" : available_time,
-            "day_of_week" : day_of_week,
-            "is_booked" : is_booked
-            }
-            for id, doctor_id, available_date, available_time, day_of_week, is_booked in rows
-        ]
+        # ✅ Served from the in-memory slot index; it loads the day from the DB on a miss
+        return slot_index.index.free_slots(doc_id, available_date)
     except Exception as e:
         # ✅ Log errors but don’t crash the program
-        if conn:
-            print(f"[X] Error Fetching Availability Info: {e}")
+        print(f"[X] Error Fetching Availability Info: {e}")
         return []  #  Return empty list instead of None for consistency
-    finally:
-        # ✅ Always close resources (best practice in DB code)
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 def view_booked_slots(doc_id, available_date):
-    conn = None
-    cursor = None
     try:
-        # ✅ Establish DB connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        # ✅ Fetch all doctors_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
-        cursor.execute(
-            """
-                SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
-                FROM doctor_availability
-                WHERE doctor_id = %s AND available_date = %s AND is_booked = TRUE
-                
-            """,(doc_id, available_date)
-        )
-        rows = cursor.fetchall()
-        # ✅ Convert rows into a list of dicts for readability
-        return [
-            {
-            "id" : id,
-            "doctor_id" :doctor_id ,
-            "available_date" : available_date,
-            "available_time" : available_time,
-            "day_of_week" : day_of_week,
-            "is_booked" : is_booked
-            }
-            for id, doctor_id, available_date, available_time, day_of_week, is_booked in rows
-        ]
+        # ✅ Served from the in-memory slot index; it loads the day from the DB on a miss
+        return slot_index.index.booked_slots(doc_id, available_date)
     except Exception as e:
         # ✅ Log errors but don’t crash the program
-        if conn:
-            print(f"[X] Error Fetching Availability Info: {e}")
+        print(f"[X] Error Fetching Availability Info: {e}")
         return []  #  Return empty list instead of None for consistency
-    finally:
-        # ✅ Always close resources (best practice in DB code)
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
-def view_all_availability():
+def view_all_availability(limit = 100, after = None):
+    # ✅ One page ordered by id; returns (slots, next_cursor)
     conn = None
     cursor = None
     try:
@@ -341,13 +398,14 @@ def view_all_availability():
         conn = get_connection()
         cursor = conn.cursor()
         # ✅ Fetch all doctors_availability (id, doctor_id, available_date, available_time, day_of_week, is_booked)
-        cursor.execute(
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
                 FROM doctor_availability
-            """
+            """,
+            ["id"], "availability", key=lambda row: row[:1], limit=limit, after=after
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
@@ -359,12 +417,14 @@ def view_all_availability():
             "is_booked" : is_booked
             }
             for id, doctor_id, available_date, available_time, day_of_week, is_booked in rows
-        ]
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Availability Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -379,7 +439,7 @@ def availability_exists(id):
         conn = get_connection()   # ✅ Establish DB connection
         cursor = conn.cursor()    # ✅ Create cursor to run SQL queries
         # ✅ Check if any patient exists with the given contact
-        cursor.execute("SELECT id FROM availability WHERE id = %s", (id,))
+        cursor.execute("SELECT id FROM doctor_availability WHERE id = %s", (id,))
         # ✅ fetchone() returns a row if found, otherwise None
         print(f"Availability Exists With Id: {id}")
         return cursor.fetchone() is not None
@@ -403,7 +463,7 @@ def availability_exists_doc(id, date, start_time):
         cursor.execute("""
                             SELECT id 
                             FROM doctor_availability
-                            WHERE patient_id = %s 
+                            WHERE doctor_id = %s 
                                 AND available_date = %s 
                                 AND available_time = %s 
                        """, (id, date, start_time))
@@ -0,0 +1,80 @@
+import database.db_connection as db
+
+
+# --------------------------------
+# Export Queries
+# --------------------------------
+
+
+# table -> (columns, base query, column for the optional date range, ORDER BY)
+EXPORTS = {
+    "patients": (
+        ["id", "name", "gender", "age", "blood_group", "contact"],
+        "SELECT id, name, gender, age, blood_group, contact FROM patient",
+        None,
+        "id"
+    ),
+    "appointments": (
+        ["id", "patient_id", "doctor_id", "appointment_date", "appointment_time", "reason", "status"],
+        "SELECT id, patient_id, doctor_id, appointment_date, appointment_time, reason, status FROM appointment",
+        "appointment_date",
+        "appointment_date, appointment_time, id"
+    ),
+    "visits": (
+        ["visit_id", "patient_id", "doctor_id", "department_id", "service_id", "scan_time", "status"],
+        "SELECT visit_id, patient_id, doctor_id, department_id, service_id, scan_time, status FROM visit_log",
+        "scan_time",
+        "scan_time, visit_id"
+    ),
+}
+
+
+def export_columns(table):
+    return EXPORTS[table][0]
+
+def export_rows(table, since=None, until=None, batch_size=1000):
+    """
+    Yields raw row tuples for an export table. `since` is inclusive and
+    `until` exclusive, both on the table's date column.
+    """
+    columns, query, date_column, order = EXPORTS[table]
+    conditions, params = [], []
+    if date_column and since:
+        conditions.append(f"{date_column} >= %s")
+        params.append(since)
+    if date_column and until:
+        conditions.append(f"{date_column} < %s")
+        params.append(until)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {order}"
+    return stream_rows(query, params, batch_size)
+
+
+# --------------------------------
+# Streaming Reads
+# --------------------------------
+
+
+def stream_rows(query, params=(), batch_size=1000):
+    """
+    Generator over a query's rows through a server-side cursor, so only
+    batch_size rows are held in memory at a time.
+    """
+    # ✅ Own checkout, not the request's: a streamed body outlives teardown_request
+    conn = db.get_pool().checkout()
+    cursor = None
+    try:
+        cursor = db.dialect().server_cursor(conn, batch_size)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    except Exception as e:
+        print(f"[X] Error Streaming Export. Try Again Later \n error: {e}")
+        raise
+    finally:
+        if cursor: cursor.close()
+        conn.close()
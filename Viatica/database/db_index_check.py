@@ -0,0 +1,128 @@
+import sys
+from contextlib import redirect_stdout
+from datetime import date, datetime, time
+from io import StringIO
+import database.db_connection as db
+import database.db_appointment as appointments
+import database.db_doc as doctors
+import database.db_doc_schedule as schedules
+import database.db_patients as patients
+import database.db_qr as qr
+import database.db_visit as visits
+import database.slot_index as slot_index
+from database.query_log import profiler
+
+
+# --------------------------------
+# Hot Queries
+# --------------------------------
+
+
+# (label, call) for every lookup the database modules run per request. The
+# calls go through the real functions and the profiler captures what they
+# send, so the check always EXPLAINs the SQL the app actually runs
+DAY = date(2026, 1, 1)
+HOT_QUERIES = [
+    ("db_patients.patient_exists_contact", lambda cursor: patients.patient_exists_contact(9999999999)),
+    ("db_patients.search_patient_by_contact", lambda cursor: patients.search_patient_by_contact(9999999999)),
+    ("db_doc.doctor_exists_contact", lambda cursor: doctors.doctor_exists_contact(9999999999)),
+    ("db_doc.view_all_doctors_by_department", lambda cursor: doctors.view_all_doctors_by_department("DEPT1")),
+    ("db_appointment.appointment_exists_patient_id",
+     lambda cursor: appointments.appointment_exists_patient_id("PAT1", DAY, time(9, 0))),
+    ("db_appointment.view_patient_appointments", lambda cursor: appointments.view_patient_appointments("PAT1")),
+    ("db_appointment.view_doctor_appointments", lambda cursor: appointments.view_doctor_appointments("DOCT1")),
+    ("db_appointment.search_appointment_by_date", lambda cursor: appointments.search_appointment_by_date(DAY)),
+    ("db_appointment.search_appointment_by_status", lambda cursor: appointments.search_appointment_by_status("Scheduled")),
+    # A fresh index, so the range load is not answered from another caller's cache
+    ("slot_index.next_free", lambda cursor: slot_index.SlotIndex().next_free(["DOCT1", "DOCT2"], datetime(2026, 1, 1))),
+    # Runs in the check's own transaction, which is rolled back
+    ("db_doc_schedule.claim_slot", lambda cursor: schedules.claim_slot(cursor, "DOCT1", DAY, "APPO1")),
+    ("db_doc_schedule.release_slot", lambda cursor: schedules.release_slot("APPO1")),
+    ("db_qr.get_patient_by_qr", lambda cursor: qr.get_patient_by_qr("QR1")),
+    ("db_qr.qr_exists", lambda cursor: qr.qr_exists("PAT1")),
+    ("db_visit.get_visits_by_patient", lambda cursor: visits.get_visits_by_patient("PAT1")),
+]
+EXPLAINED = ("SELECT", "UPDATE", "DELETE")
+
+
+# --------------------------------
+# Plan Readers
+# --------------------------------
+
+
+def _sqlite_full_scans(cursor, query, params):
+    cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+    # SEARCH seeks into an index; SCAN walks a whole table or index, even "SCAN t USING INDEX"
+    details = [row[-1] for row in cursor.fetchall()]
+    return [detail for detail in details if detail.startswith("SCAN ")]
+
+def _mysql_full_scans(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    columns = [column[0].lower() for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [f"{row['table']}: type=ALL" for row in rows if row.get("type") == "ALL"]
+
+def _postgres_full_scans(cursor, query, params):
+    # Tiny tables are always seq-scanned; with seqscan disabled the planner only falls back if no index fits
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    cursor.execute("EXPLAIN " + query, params)
+    return [row[0].strip() for row in cursor.fetchall() if "Seq Scan" in row[0]]
+
+PLAN_READERS = {
+    "sqlite": _sqlite_full_scans,
+    "mysql": _mysql_full_scans,
+    "postgres": _postgres_full_scans,
+}
+
+
+# --------------------------------
+# Check
+# --------------------------------
+
+
+def captured_statements(cursor, call):
+    # The functions print their own progress; only the statements matter here
+    with profiler.capture() as statements, redirect_stdout(StringIO()):
+        call(cursor)
+    seen = {}
+    for query, params in statements:
+        if query.lstrip().upper().startswith(EXPLAINED):
+            seen.setdefault(" ".join(query.split()), (query, params))
+    return list(seen.values())
+
+def check_indexes(queries=None):
+    """
+    Runs every hot call, EXPLAINs the statements it sent and returns
+    {label: [full scans]} for the ones that read a whole table. A call that
+    sent nothing is reported too, since then nothing was checked. An empty
+    dict means every query uses an index.
+    """
+    conn = None
+    cursor = None
+    read_plan = PLAN_READERS[db.dialect().name]
+    failures = {}
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        for label, call in queries or HOT_QUERIES:
+            statements = captured_statements(cursor, call)
+            if not statements:
+                failures[label] = ["no statement captured"]
+            scans = [scan for query, params in statements for scan in read_plan(cursor, query, params)]
+            if scans:
+                failures[label] = scans
+        return failures
+    finally:
+        if conn:
+            conn.rollback()
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+if __name__ == "__main__":
+    failures = check_indexes()
+    for label, scans in failures.items():
+        print(f"[X] {label} does a full scan: {'; '.join(scans)}")
+    if failures:
+        sys.exit(1)
+    print(f"[✓] All {len(HOT_QUERIES)} Hot Queries Use An Index.")
@@ -0,0 +1,256 @@
+import json
+import os
+import sys
+from datetime import datetime
+import database.db_connection as db
+import database.db_schema as schema
+
+
+# --------------------------------
+# Migrations
+# --------------------------------
+
+
+def base_schema(dialect, cursor):
+    return [ddl.format(pk=dialect.autoincrement_pk, timestamp=dialect.timestamp_type) for ddl in schema.TABLES]
+
+# (name, table, columns, unique) for every lookup the database modules run per request
+HOT_INDEXES = [
+    ("ux_patient_contact", "patient", ["contact"], True),
+    ("ix_doctor_contact", "doctor", ["contact"], False),
+    ("ix_doctor_dept", "doctor", ["dept_id"], False),
+    ("ix_appointment_patient", "appointment", ["patient_id", "appointment_date", "appointment_time"], False),
+    ("ix_appointment_doctor", "appointment", ["doctor_id", "appointment_date", "appointment_time"], False),
+    ("ix_appointment_date", "appointment", ["appointment_date", "appointment_time"], False),
+    ("ix_appointment_status", "appointment", ["status", "appointment_date", "appointment_time"], False),
+    ("ix_availability_appointment", "doctor_availability", ["appointment_id"], False),
+    ("ix_qr_patient", "patient_qr", ["patient_id", "status"], False),
+    ("ix_visit_patient", "visit_log", ["patient_id", "scan_time"], False),
+    ("ix_visit_scan_time", "visit_log", ["scan_time", "visit_id"], False),
+]
+MAX_LISTED_GROUPS = 50
+
+# Tables that point at a patient, with their key, for moving a duplicate's rows onto the kept patient
+PATIENT_REFERENCES = [("appointment", "id"), ("patient_qr", "qr_id"), ("visit_log", "visit_id")]
+PATIENT_COLUMNS = ["id", "name", "gender", "age", "blood_group", "contact"]
+
+# Set by migrate(merge_duplicate_contacts=True): path of the audit file, otherwise None
+merge_audit_path = None
+
+class DuplicateContacts(Exception):
+    pass
+
+def contact_groups(cursor):
+    # {contact: [patient ids, oldest first]} for every contact on more than one patient
+    cursor.execute(
+        """
+            SELECT contact, id FROM patient
+            WHERE contact IN (SELECT contact FROM patient GROUP BY contact HAVING COUNT(*) > 1)
+            ORDER BY contact, id
+        """
+    )
+    groups = {}
+    for contact, patient_id in cursor.fetchall():
+        groups.setdefault(contact, []).append(patient_id)
+    return groups
+
+def fold_duplicate_contacts(cursor, groups, audit_path):
+    """
+    Folds every patient in a group into its oldest record: their rows in
+    PATIENT_REFERENCES are repointed and the duplicate is deleted. Every
+    changed row is written to audit_path as one JSON line first, so a wrong
+    merge can be put back by hand.
+    """
+    with open(audit_path, "a", encoding="utf-8") as audit:
+        for contact, patient_ids in groups.items():
+            keep_id = patient_ids[0]
+            for duplicate_id in patient_ids[1:]:
+                cursor.execute(f"SELECT {', '.join(PATIENT_COLUMNS)} FROM patient WHERE id = %s", (duplicate_id,))
+                entry = {"contact": contact, "kept": keep_id, "deleted": dict(zip(PATIENT_COLUMNS, cursor.fetchone())), "moved": {}}
+                for table, key in PATIENT_REFERENCES:
+                    cursor.execute(f"SELECT {key} FROM {table} WHERE patient_id = %s", (duplicate_id,))
+                    entry["moved"][table] = [row[0] for row in cursor.fetchall()]
+                audit.write(json.dumps(entry, default=str) + "\n")
+                for table, _ in PATIENT_REFERENCES:
+                    cursor.execute(f"UPDATE {table} SET patient_id = %s WHERE patient_id = %s", (keep_id, duplicate_id))
+                cursor.execute("DELETE FROM patient WHERE id = %s", (duplicate_id,))
+        audit.flush()
+        os.fsync(audit.fileno())
+
+def hot_indexes(dialect, cursor):
+    # doctor_availability (doctor_id, available_date, available_time) is already UNIQUE in the base schema
+    if not dialect.index_exists(cursor, "patient", "ux_patient_contact"):
+        # ❌ Households share phones: two patients on one contact are only merged when asked to
+        groups = contact_groups(cursor)
+        if groups and merge_audit_path is None:
+            for contact, patient_ids in list(groups.items())[:MAX_LISTED_GROUPS]:
+                print(f"[!] Contact {contact} Is On {len(patient_ids)} Patients: {', '.join(patient_ids)}")
+            raise DuplicateContacts(
+                f"{len(groups)} contacts are on more than one patient, so ux_patient_contact cannot be built. "
+                f"Fix them by hand, or rerun with --merge-duplicate-contacts to fold each into its oldest patient"
+            )
+        if groups:
+            fold_duplicate_contacts(cursor, groups, merge_audit_path)
+            print(f"[!] Merged {sum(len(ids) - 1 for ids in groups.values())} Duplicate Patients; Audit In {merge_audit_path}")
+    return [
+        dialect.create_index(name, table, columns, unique)
+        for name, table, columns, unique in HOT_INDEXES
+        if not dialect.index_exists(cursor, table, name)
+    ]
+
+VERSIONED_TABLES = ["patient", "doctor", "appointment"]
+
+def row_versions(dialect, cursor):
+    # ✅ Row version for optimistic concurrency; existing rows start at 1
+    return [
+        f"ALTER TABLE {table} ADD COLUMN version INT NOT NULL DEFAULT 1"
+        for table in VERSIONED_TABLES
+        if not dialect.column_exists(cursor, table, "version")     # MySQL commits each ALTER, so a rerun finds some done
+    ]
+
+def visit_event_ids(dialect, cursor):
+    # ✅ Check-ins carry their own id, so replaying the spool cannot log a visit twice
+    statements = []
+    if not dialect.column_exists(cursor, "visit_log", "event_id"):
+        statements.append("ALTER TABLE visit_log ADD COLUMN event_id VARCHAR(40)")
+    if not dialect.index_exists(cursor, "visit_log", "ux_visit_event"):
+        statements.append(dialect.create_index("ux_visit_event", "visit_log", ["event_id"], True))
+    return statements
+
+ROLLUP_COLUMNS = """
+            department_id VARCHAR(50) NOT NULL DEFAULT '',
+            doctor_id VARCHAR(50) NOT NULL DEFAULT '',
+            visits INT NOT NULL DEFAULT 0,
+            waits INT NOT NULL DEFAULT 0,
+            wait_seconds BIGINT NOT NULL DEFAULT 0
+"""
+
+def visit_rollups(dialect, cursor):
+    # ✅ Dashboards read these; database/db_analytics.py folds new visit_log rows in past the watermark
+    return [
+        f"""
+            CREATE TABLE IF NOT EXISTS visit_rollup_hour (
+                bucket {dialect.timestamp_type} NOT NULL,{ROLLUP_COLUMNS},
+                PRIMARY KEY (bucket, department_id, doctor_id)
+            )
+        """,
+        f"""
+            CREATE TABLE IF NOT EXISTS visit_rollup_day (
+                day DATE NOT NULL,{ROLLUP_COLUMNS},
+                PRIMARY KEY (day, department_id, doctor_id)
+            )
+        """,
+        f"""
+            CREATE TABLE IF NOT EXISTS rollup_watermark (
+                name VARCHAR(50) PRIMARY KEY,
+                last_id BIGINT NOT NULL DEFAULT 0,
+                updated_at {dialect.timestamp_type}
+            )
+        """,
+        "INSERT INTO rollup_watermark (name, last_id) VALUES ('visit_rollups', 0)",
+    ]
+
+def rollup_gaps(dialect, cursor):
+    # ✅ visit_ids skipped by a refresh because they had not committed yet; folded in when they appear
+    return [
+        f"""
+            CREATE TABLE IF NOT EXISTS rollup_gap (
+                visit_id BIGINT PRIMARY KEY,
+                noted_at {dialect.timestamp_type} NOT NULL
+            )
+        """,
+    ]
+
+# ✅ Append only: applied versions are recorded and never run again
+MIGRATIONS = [
+    (1, "base schema", base_schema),
+    (2, "hot lookup indexes", hot_indexes),
+    (3, "row versions", row_versions),
+    (4, "visit event ids", visit_event_ids),
+    (5, "visit rollups", visit_rollups),
+    (6, "rollup gaps", rollup_gaps),
+]
+
+
+# --------------------------------
+# Runner
+# --------------------------------
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(target=None, merge_duplicate_contacts=False):
+    """
+    Applies every migration newer than the database, up to `target`.
+    Each version commits on its own, so a failure leaves earlier versions
+    in place and the run can be retried. Returns True when up to date.
+    Patients sharing a contact stop migration 0002 unless
+    merge_duplicate_contacts is set (see hot_indexes).
+    """
+    global merge_audit_path
+    merge_audit_path = f"contact_merge_{datetime.now():%Y%m%d%H%M%S}.jsonl" if merge_duplicate_contacts else None
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    applied_at {dialect.timestamp_type}
+                )
+            """
+        )
+        conn.commit()
+        done = applied_versions(cursor)
+
+        for version, name, statements in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            try:
+                for statement in statements(dialect, cursor):
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+                    (version, name, datetime.now())
+                )
+                conn.commit()
+                print(f"[✓] Migration {version:04d} Applied: {name}")
+            except Exception as e:
+                conn.rollback()   # ❌ MySQL DDL autocommits; the rerun skips what already exists
+                print(f"[X] Migration {version:04d} ({name}) Failed On {dialect.name}. Fix And Rerun \n error: {e}")
+                return False
+        print(f"[✓] Schema Up To Date On {dialect.name}.")
+        return True
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Running Migrations. Try Again Later \n error: {e}")
+        return False
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def current_version():
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        return max(applied_versions(cursor), default=0)
+    except Exception as e:
+        print(f"[X] Error Reading Schema Version: {e}")
+        return 0
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+if __name__ == "__main__":
+    # python -m database.db_migrate [--merge-duplicate-contacts]
+    sys.exit(0 if migrate(merge_duplicate_contacts="--merge-duplicate-contacts" in sys.argv) else 1)
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+
+
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# --------------------------------
+# Cursor Tokens
+# --------------------------------
+
+
+def _plain(value):
+    # Cursor values must survive JSON and compare correctly against the column again
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # MySQL hands TIME columns back as timedelta
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return value
+
+def encode_cursor(scope, values):
+    """
+    Opaque next-page token: the sort key of the last row on the page, tagged
+    with the listing it belongs to so it cannot be replayed on another one.
+    """
+    payload = json.dumps([scope, [_plain(value) for value in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(scope, token):
+    # Raises InvalidCursor for a token that is malformed or from another listing
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        token_scope, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursor("Invalid page cursor")
+    if token_scope != scope or not isinstance(values, list):
+        raise InvalidCursor("Invalid page cursor")
+    return values
+
+def clamp_limit(limit, default=100):
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+# --------------------------------
+# Keyset Queries
+# --------------------------------
+
+
+def keyset_clause(columns, values, descending=False):
+    """
+    WHERE fragment selecting rows strictly after `values` in ORDER BY `columns`.
+    Expanded to (a > x) OR (a = x AND b > y) so every engine can use the index.
+    """
+    op = "<" if descending else ">"
+    terms = []
+    params = []
+    for i, column in enumerate(columns):
+        parts = [f"{prior} = %s" for prior in columns[:i]] + [f"{column} {op} %s"]
+        terms.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(terms) + ")", params
+
+def order_clause(columns, descending=False):
+    direction = " DESC" if descending else ""
+    return ", ".join(f"{column}{direction}" for column in columns)
+
+def fetch_page(cursor, select, columns, scope, key, limit=100, after=None, where=None, params=(), descending=False):
+    """
+    Runs `select` (everything up to WHERE) for one page ordered by `columns`.
+    `key(row)` returns that row's values for `columns`. Returns
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = clamp_limit(limit)
+    conditions = [where] if where else []
+    params = list(params)
+    if after:
+        values = decode_cursor(scope, after)
+        if len(values) != len(columns):
+            raise InvalidCursor("Invalid page cursor")
+        clause, key_params = keyset_clause(columns, values, descending)
+        conditions.append(clause)
+        params.extend(key_params)
+    query = select
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # ✅ One extra row tells us whether another page exists without a COUNT(*)
+    query += f" ORDER BY {order_clause(columns, descending)} LIMIT %s"
+    params.append(limit + 1)
+
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(scope, key(rows[-1]))
+
+def iterate(view, **kwargs):
+    # ✅ Walks a paginated view page by page so callers never hold the whole table
+    after = None
+    while True:
+        rows, after = view(after=after, **kwargs)
+        yield from rows
+        if after is None:
+            return
@@ -0,0 +1,79 @@
+import database.db_connection as db
+
+
+# --------------------------------
+# Partial Updates
+# --------------------------------
+
+
+def patch_row(table, row_id, changes, allowed_fields, expected_version=None):
+    """
+    Applies every changed column of one row in a single UPDATE and bumps its
+    version. With expected_version the update only lands if nobody else has
+    changed the row since it was read (optimistic concurrency, no locks held).
+    Returns (outcome, version) where outcome is "updated", "conflict",
+    "not_found", "invalid" or "error".
+    """
+    unknown = set(changes) - set(allowed_fields)
+    if unknown or not changes:
+        print(f"[X] Invalid Fields For {table}: {sorted(unknown) or 'nothing to update'}")
+        return "invalid", None
+
+    conn = None
+    cursor = None
+    dialect = db.dialect()
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+        outcome, version = apply_patch(cursor, table, row_id, changes, expected_version)
+        if outcome == "updated":
+            conn.commit()
+        else:
+            conn.rollback()
+        return outcome, version
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error Updating {table} {row_id}. Try Again Later \n error: {e}")
+        return "error", None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def apply_patch(cursor, table, row_id, changes, expected_version=None):
+    """
+    The versioned UPDATE behind patch_row(), inside the caller's
+    transaction; the caller commits or rolls back. Column names must
+    already be checked against the table's updatable fields.
+    """
+    # ⚠️ Column names are interpolated, which is safe only because the caller checked them
+    columns = sorted(changes)
+    query = f"UPDATE {table} SET {', '.join(f'{column} = %s' for column in columns)}, version = version + 1 WHERE id = %s"
+    params = [changes[column] for column in columns] + [row_id]
+    if expected_version is not None:
+        query += " AND version = %s"
+        params.append(expected_version)
+
+    if db.dialect().supports_returning:
+        cursor.execute(query + " RETURNING version", params)
+        row = cursor.fetchone()
+    else:
+        cursor.execute(query, params)
+        row = None
+        if cursor.rowcount > 0:
+            # ✅ Same transaction, so this reads our own write
+            cursor.execute(f"SELECT version FROM {table} WHERE id = %s", (row_id,))
+            row = cursor.fetchone()
+
+    if row is None:
+        # Nothing matched: either the row is gone or its version moved on
+        cursor.execute(f"SELECT version FROM {table} WHERE id = %s", (row_id,))
+        current = cursor.fetchone()
+        if current is None:
+            return "not_found", None
+        print(f"[!] {table} {row_id} Changed Since Version {expected_version}; Now At {current[0]}.")
+        return "conflict", current[0]
+
+    print(f"[✓] Updated {', '.join(columns)} For {table} {row_id} (Version {row[0]}).")
+    return "updated", row[0]
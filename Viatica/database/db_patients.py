@@ -1,8 +1,7 @@
-import os
-import psycopg2
+import database.db_connection as db
+import database.db_pagination as pg
+import database.db_patch as patch
 from dotenv import load_dotenv
-from config import mydb
-import pymysql
 
 
 
@@ -20,7 +19,7 @@ load_dotenv()
 #     return conn
 
 def get_connection():
-    return pymysql.connect(**mydb)
+    return db.get_connection()
 
 # -------------------
 # INSERT
@@ -51,6 +50,43 @@ def insert_patient(id, name, gender, age, blood_group, contact):
         if cursor: cursor.close()
         if conn: conn.close()
 
+PATIENT_COLUMNS = ["id", "name", "gender", "age", "blood_group", "contact"]
+
+def insert_patient_batch(rows):
+    """
+    Inserts already validated patients in one transaction.
+    rows: list of (id, name, gender, age, blood_group, contact).
+    Contacts already on file are skipped with one IN lookup for the whole
+    batch. Returns (inserted, contacts already on file), or None on error.
+    """
+    if not rows:
+        return 0, set()
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        placeholders = ", ".join(["%s"] * len(rows))
+        cursor.execute(f"SELECT contact FROM patient WHERE contact IN ({placeholders})", [row[5] for row in rows])
+        existing = {int(row[0]) for row in cursor.fetchall()}
+        fresh = [row for row in rows if row[5] not in existing]
+        inserted = 0
+        if fresh:
+            # ✅ INSERT-ignore as well: ux_patient_contact drops a contact added since the lookup
+            query = db.dialect().insert_ignore("patient", PATIENT_COLUMNS, rows=len(fresh))
+            cursor.execute(query, [value for row in fresh for value in row])
+            inserted = max(cursor.rowcount, 0)
+        conn.commit()
+        return inserted, existing
+    except Exception as e:
+        if conn:
+            conn.rollback()  # ❌ Only this batch is lost; earlier ones are committed
+        print(f"[X] Error Inserting {len(rows)} Patients. Try Again Later \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
 
 # -------------------
 # DELETE
@@ -107,10 +143,16 @@ def update_patient_blood_group(patient_id, new_bg):
     # Calls helper function to update only the "blood_group" field
     update_field(patient_id, "blood_group", new_bg)
 
+UPDATABLE_FIELDS = {"name", "gender", "age", "blood_group", "contact"}
+
+def update_patient(patient_id, changes, expected_version=None):
+    # ✅ All changed fields in one UPDATE; see db_patch.patch_row for outcomes
+    return patch.patch_row("patient", patient_id, changes, UPDATABLE_FIELDS, expected_version)
+
 # ✅ Generic helper function to update any allowed field
 def update_field(patient_id, field, value):
     # Define which fields are allowed to be updated (safety check)
-    allowed_fields = {"name", "gender", "age", "blood_group", "contact"}
+    allowed_fields = UPDATABLE_FIELDS
     if field not in allowed_fields:
         raise ValueError("Invalid Field Name")  # Prevents SQL injection
     conn = None
@@ -120,7 +162,7 @@ def update_field(patient_id, field, value):
         cursor = conn.cursor()
         # ⚠️ Using f-string for column name is okay here since it's validated
         # But values (field value + patient_id) must use parameter binding (%s)
-        query = f"UPDATE patient SET {field} = %s WHERE id = %s"
+        query = f"UPDATE patient SET {field} = %s, version = version + 1 WHERE id = %s"
         cursor.execute(query, (value, patient_id))  # Safe against SQL injection
         conn.commit()  # Save changes
         print(f"[✓] Updated {field} for patient {patient_id}")
@@ -148,7 +190,7 @@ def view_patient(patient_id):
         # ✅ Fetch the patient details by ID using parameter binding (%s)
         cursor.execute(
             """
-                SELECT id, name, gender, age, blood_group, contact 
+                SELECT id, name, gender, age, blood_group, contact, version
                 FROM patient
                 WHERE id = %s
             """, (patient_id,)   # tuple required: (patient_id,)
@@ -157,7 +199,7 @@ def view_patient(patient_id):
         if result is None:
             return None  # No patient found with given ID
         # ✅ Unpack tuple directly into variables
-        id, name, gender, age, blood_group, contact = result
+        id, name, gender, age, blood_group, contact, version = result
         # ✅ Ensure 'age' is stored as integer, fallback to None if invalid
         try:
             age = int(age)
@@ -177,7 +219,8 @@ def view_patient(patient_id):
             "gender": gender,
             "age": age,
             "blood_group": blood_group,
-            "contact": contact
+            "contact": contact,
+            "version": version
         }
         return patient_details
     except Exception as e:
@@ -197,22 +240,26 @@ def view_patient(patient_id):
 
 
 
-def view_all_patients():
+def view_all_patients(limit = 100, after = None):
+    """
+    One page of patients ordered by id. `after` is the cursor returned with
+    the previous page. Returns (patients, next_cursor).
+    """
     conn = None
     cursor = None
     try:
         # ✅ Establish DB connection
         conn = get_connection()
         cursor = conn.cursor()
-        # ✅ Fetch all patients (id, name, gender, age, contact)
-        cursor.execute(
+        # ✅ Keyset page: seeks straight to the cursor instead of skipping OFFSET rows
+        rows, next_cursor = pg.fetch_page(
+            cursor,
             """
                 SELECT id, name, gender, age, blood_group, contact
                 FROM patient
-                ORDER BY id LIMIT 100 OFFSET 0
-            """
+            """,
+            ["id"], "patient", key=lambda row: row[:1], limit=limit, after=after
         )
-        rows = cursor.fetchall()
         # ✅ Convert rows into a list of dicts for readability
         return [
             {
@@ -224,12 +271,14 @@ def view_all_patients():
                 "contact": contact
             }
             for id, name, gender, age, blood_group, contact in rows
-        ]
+        ], next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         # ✅ Log errors but don’t crash the program
         if conn:
             print(f"[X] Error Fetching Info: {e}")
-        return []  #  Return empty list instead of None for consistency
+        return [], None  #  Return empty page instead of None for consistency
     finally:
         # ✅ Always close resources (best practice in DB code)
         if cursor:
@@ -1,12 +1,19 @@
-import qrcode
+import time
 import uuid
-import os
-import psycopg2
+import database.db_connection as db
+from database.cache import TTLCache
+from config import checkin_config
 from dotenv import load_dotenv
 from datetime import datetime
 
 load_dotenv()
 
+# ✅ patient_id -> active qr_id; the image endpoint looks this up on every request
+qr_id_cache = TTLCache("patient_qr_id")
+# ✅ qr_id -> (patient, last checked) for active QRs; reception scanners look this up on every check-in.
+# The map is per process, so entries older than active_qr_recheck re-read the QR's status before use
+active_qr_cache = TTLCache("active_qr", max_size=checkin_config["active_qr_items"])
+
 
 # --------------------------------
 # DB Connection
@@ -15,14 +22,9 @@ load_dotenv()
 
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
 
 # --------------------------------
@@ -39,7 +41,8 @@ def generate_qr_id():
 # --------------------------------
 
 
-def create_patient_qr(patient_id, save_path="qrcodes"):
+def create_patient_qr(patient_id):
+    # ✅ Only the record; the image is rendered on first request by database/qr_store.py
     conn, cursor = None, None
     try:
         qr_id = generate_qr_id()
@@ -52,20 +55,13 @@ def create_patient_qr(patient_id, save_path="qrcodes"):
             VALUES (%s, %s, %s, %s)
         """, (qr_id, patient_id, datetime.now(), "Active"))
         conn.commit()
+        qr_id_cache.invalidate(patient_id)
 
-        # Make folder if not exists
-        if not os.path.exists(save_path):
-            os.makedirs(save_path)
-        # Generate QR image
-        qr = qrcode.make(qr_id)
-        file_path = os.path.join(save_path, f"patient_{patient_id}.png")
-        qr.save(file_path)
-
-        print(f"[✔] QR Code generated for Patient {patient_id}: {file_path}")
-        return qr_id, file_path
+        print(f"[✔] QR Code issued for Patient {patient_id}: {qr_id}")
+        return qr_id
     except Exception as e:
         print(f"[X] Error generating QR. Try Again Later \n error: {e}")
-        return None, None
+        return None
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
@@ -82,9 +78,9 @@ def get_patient_by_qr(qr_id):
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT p.patient_id, p.name, p.gender, p.DOB, p.contact, p.address
+            SELECT p.id, p.name, p.gender, p.age, p.contact, p.blood_group
             FROM patient_qr pq
-            JOIN patient p ON pq.patient_id = p.patient_id
+            JOIN patient p ON pq.patient_id = p.id
             WHERE pq.qr_id = %s AND pq.status = 'Active'
         """, (qr_id,))
         result = cursor.fetchone()
@@ -93,9 +89,9 @@ def get_patient_by_qr(qr_id):
                 "patient_id": result[0],
                 "name": result[1],
                 "gender": result[2],
-                "DOB": str(result[3]),
+                "age": result[3],
                 "contact": result[4],
-                "address": result[5]
+                "blood_group": result[5]
             }
         else:
             return None
@@ -107,6 +103,49 @@ def get_patient_by_qr(qr_id):
         if conn: conn.close()
 
 
+def qr_is_active(qr_id):
+    # ✅ Primary-key probe of the status alone; None when the database cannot answer
+    conn, cursor = None, None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM patient_qr WHERE qr_id = %s AND status = 'Active'", (qr_id,))
+        return cursor.fetchone() is not None
+    except Exception as e:
+        print(f"[X] Error checking QR status. \n error: {e}")
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+def resolve_qr(qr_id):
+    """
+    Same result as get_patient_by_qr, served from memory after the first scan.
+    Another worker's deactivate_qr only clears its own map, so a cached entry
+    older than checkin_config["active_qr_recheck"] seconds re-reads the QR's
+    status first; a lost card is refused everywhere within that bound. If the
+    status cannot be read the cached patient is still served.
+    """
+    now = time.monotonic()
+    entry = active_qr_cache.get(qr_id)
+    if entry is not None:
+        patient, checked_at = entry
+        if now - checked_at >= checkin_config["active_qr_recheck"]:
+            active = qr_is_active(qr_id)
+            if active is False:
+                active_qr_cache.invalidate(qr_id)
+                return None
+            if active:
+                active_qr_cache.set(qr_id, (patient, now))
+        return dict(patient)
+
+    patient = get_patient_by_qr(qr_id)
+    if patient:
+        active_qr_cache.set(qr_id, (patient, now))
+    return dict(patient) if patient else None
+
+
 # --------------------------------
 # Deactivate QR (if lost card)
 # --------------------------------
@@ -119,9 +158,75 @@ def deactivate_qr(qr_id):
         cursor = conn.cursor()
         cursor.execute("UPDATE patient_qr SET status = 'Inactive' WHERE qr_id = %s", (qr_id,))
         conn.commit()
+        qr_id_cache.clear()     # keyed by patient, and deactivation is rare
+        active_qr_cache.invalidate(qr_id)
         print(f"[✔] QR {qr_id} deactivated.")
     except Exception as e:
         print(f"[X] Error deactivating QR. Try Again Later \n error: {e}")
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
+
+
+# --------------------------------
+# QR Existence Checks
+# --------------------------------
+
+
+def qr_exists(patient_id):
+    conn, cursor = None, None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT qr_id FROM patient_qr WHERE patient_id = %s AND status = 'Active'", (patient_id,))
+        return cursor.fetchone() is not None
+    except Exception as e:
+        print(f"[X] Error Checking QR. Try Again Later \n error: {e}")
+        return False
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def active_qr_id(patient_id):
+    cached = qr_id_cache.get(patient_id)
+    if cached is not None:
+        return cached
+    conn, cursor = None, None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT qr_id FROM patient_qr WHERE patient_id = %s AND status = 'Active'", (patient_id,))
+        row = cursor.fetchone()
+        if row:
+            qr_id_cache.set(patient_id, row[0])
+        return row[0] if row else None
+    # ❌ No except: the QR worker needs the error to schedule a retry
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+# --------------------------------
+# Delete QR (before regenerating)
+# --------------------------------
+
+
+def delete_qr(patient_id):
+    conn, cursor = None, None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM patient_qr WHERE patient_id = %s", (patient_id,))
+        conn.commit()
+        qr_id_cache.invalidate(patient_id)
+        active_qr_cache.clear()     # keyed by qr_id; deleting QRs is rare
+        print(f"[✔] QR records for Patient {patient_id} deleted.")
+        return True
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"[X] Error deleting QR. Try Again Later \n error: {e}")
+        return False
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
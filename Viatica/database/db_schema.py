@@ -0,0 +1,104 @@
+# --------------------------------
+# Tables
+# --------------------------------
+
+
+# Baseline for migration 0001; later schema changes live in db_migrate.MIGRATIONS.
+# {pk} and {timestamp} are filled in per engine, everything else is portable SQL
+TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS patient (
+            id VARCHAR(50) PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            gender VARCHAR(50) NOT NULL,
+            age INT NOT NULL,
+            blood_group VARCHAR(3) NOT NULL,
+            contact BIGINT NOT NULL
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS department (
+            id VARCHAR(50) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            description VARCHAR(255)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS doctor (
+            id VARCHAR(50) PRIMARY KEY,
+            first_name VARCHAR(50),
+            last_name VARCHAR(50),
+            gender VARCHAR(20),
+            dob DATE,
+            specialization VARCHAR(50),
+            experience INT,
+            contact BIGINT,
+            email VARCHAR(100),
+            consultation_fee INT,
+            dept_id VARCHAR(50)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS appointment (
+            id VARCHAR(50) PRIMARY KEY,
+            patient_id VARCHAR(50) NOT NULL,
+            doctor_id VARCHAR(50) NOT NULL,
+            appointment_date DATE,
+            appointment_time TIME,
+            reason VARCHAR(255),
+            status VARCHAR(20)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS doctor_availability (
+            id VARCHAR(50) PRIMARY KEY,
+            doctor_id VARCHAR(50) NOT NULL,
+            available_date DATE NOT NULL,
+            available_time TIME NOT NULL,
+            day_of_week VARCHAR(10),
+            is_booked BOOLEAN NOT NULL DEFAULT FALSE,
+            appointment_id VARCHAR(50),
+            UNIQUE (doctor_id, available_date, available_time)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS patient_qr (
+            qr_id VARCHAR(64) PRIMARY KEY,
+            patient_id VARCHAR(50) NOT NULL,
+            issued_date {timestamp},
+            status VARCHAR(20)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS services (
+            service_id VARCHAR(50) PRIMARY KEY,
+            service_name VARCHAR(100)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS visit_log (
+            visit_id {pk},
+            patient_id VARCHAR(50) NOT NULL,
+            doctor_id VARCHAR(50),
+            department_id VARCHAR(50),
+            service_id VARCHAR(50),
+            scan_time {timestamp},
+            status VARCHAR(20)
+        )
+    """,
+]
+
+
+# --------------------------------
+# Create Schema
+# --------------------------------
+
+
+def create_schema():
+    # ✅ The baseline plus every migration, so callers always get the current schema
+    import database.db_migrate as migrations
+    return migrations.migrate()
+
+
+if __name__ == "__main__":
+    create_schema()
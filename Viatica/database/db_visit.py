@@ -1,21 +1,21 @@
 import os
-import psycopg2
+import threading
+import database.db_connection as db
+import database.db_pagination as pg
 from dotenv import load_dotenv
 from datetime import datetime
 import database.db_qr as qr
+from database.batch_writer import BatchWriter
+from database.spool import Spool, DeadLetter
+from config import checkin_config
 
 load_dotenv()
 
 def get_connection():
     """
-    Returns a connection to the PostgreSQL database on Render.
+    Returns a pooled connection to the configured database engine.
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in environment variables.")
-    
-    conn = psycopg2.connect(database_url)
-    return conn
+    return db.get_connection()
 
 
 # -------------------------------
@@ -26,8 +26,8 @@ def get_connection():
 def log_visit(qr_id, doctor_id=None, department_id=None, service_id=None, status="Checked-In"):
     conn, cursor = None, None
     try:
-        # ✅ Step 1: Fetch patient via QR
-        patient = qr.get_patient_by_qr(qr_id)
+        # ✅ Step 1: Fetch patient via QR (cached active-QR map)
+        patient = qr.resolve_qr(qr_id)
         if not patient:
             print("[X] Invalid or inactive QR code.")
             return False
@@ -50,26 +50,118 @@ def log_visit(qr_id, doctor_id=None, department_id=None, service_id=None, status
         if conn: conn.close()
 
 
+# -------------------------------
+# Batched Visit Writes
+# -------------------------------
+
+
+VISIT_COLUMNS = ["event_id", "patient_id", "doctor_id", "department_id", "service_id", "scan_time", "status"]
+INSERT_CHUNK = 100      # rows per multi-row INSERT; keeps the statement under every driver's parameter limit
+
+def insert_visits(rows):
+    """
+    Multi-row inserts in one transaction. Rows whose event_id is already in
+    visit_log are skipped, so a batch replayed from the spool after a crash
+    is written once. Returns the number of rows given.
+    """
+    conn, cursor = None, None
+    dialect = db.dialect()
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        dialect.begin(conn)
+        for start in range(0, len(rows), INSERT_CHUNK):
+            chunk = rows[start:start + INSERT_CHUNK]
+            cursor.execute(
+                dialect.insert_ignore("visit_log", VISIT_COLUMNS, len(chunk)),
+                [value for row in chunk for value in row]
+            )
+        conn.commit()
+        return len(rows)
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise       # ❌ The batch writer keeps the rows and retries
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+def encode_visit(row):
+    return [*row[:5], row[5].isoformat(), row[6]]
+
+def decode_visit(values):
+    return (*values[:5], datetime.fromisoformat(values[5]), values[6])
+
+_writer = None
+_writer_lock = threading.Lock()
+_orphans = []       # writers inherited through fork(); kept alive so their files are never flushed or closed here
+
+def visit_writer():
+    """
+    The shared check-in writer, built on first use. Rows go through the
+    local spool when VISIT_SPOOL_PATH is set, so queued check-ins survive a
+    crash and are written on the next start. Rows the database refuses go
+    to VISIT_DEAD_LETTER_PATH instead of holding up the rows behind them.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            buffer = None
+            if checkin_config["spool_path"]:
+                buffer = Spool(
+                    checkin_config["spool_path"], encode_visit, decode_visit,
+                    max_pending=checkin_config["max_pending"],
+                    fsync_interval=checkin_config["spool_fsync_interval"]
+                )
+            dead_letter = None
+            if checkin_config["dead_letter_path"]:
+                dead_letter = DeadLetter(checkin_config["dead_letter_path"], encode_visit)
+            _writer = BatchWriter(
+                "visit_log", insert_visits,
+                batch_size=checkin_config["batch_size"],
+                flush_interval=checkin_config["flush_interval"],
+                max_pending=checkin_config["max_pending"],
+                buffer=buffer,
+                permanent=db.is_permanent_error,
+                dead_letter=dead_letter
+            )
+    return _writer
+
+def _reset_after_fork():
+    # Called in a forked child: the parent's writer thread did not survive and its spool is still the parent's
+    global _writer, _writer_lock
+    if _writer is not None:
+        _orphans.append(_writer)
+    _writer, _writer_lock = None, threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 # -------------------------------
 # View All Visits (Admin)
 # -------------------------------
 
 
-def view_all_visits():
+def view_all_visits(limit=100, after=None):
+    # ✅ Newest first, keyed on (scan_time, visit_id); returns (visits, next_cursor)
     conn, cursor = None, None
     try:
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT v.visit_id, p.name, d.name AS dept, doc.first_name AS fname, doc.last_name AS lname, s.service_name, v.scan_time, v.status
-            FROM visit_log v
-            LEFT JOIN patient p ON v.patient_id = p.patient_id
-            LEFT JOIN department d ON v.department_id = d.department_id
-            LEFT JOIN doctor doc ON v.doctor_id = doc.doctor_id
-            LEFT JOIN services s ON v.service_id = s.service_id
-            ORDER BY v.scan_time DESC
-        """)
-        results = cursor.fetchall()
+        results, next_cursor = pg.fetch_page(
+            cursor,
+            """
+                SELECT v.visit_id, p.name, d.name AS dept, doc.first_name AS fname, doc.last_name AS lname, s.service_name, v.scan_time, v.status
+                FROM visit_log v
+                LEFT JOIN patient p ON v.patient_id = p.id
+                LEFT JOIN department d ON v.department_id = d.id
+                LEFT JOIN doctor doc ON v.doctor_id = doc.id
+                LEFT JOIN services s ON v.service_id = s.service_id
+            """,
+            ["v.scan_time", "v.visit_id"], "visit", key=lambda row: (row[6], row[0]),
+            limit=limit, after=after, descending=True
+        )
         visits = []
         for row in results:
             visits.append({
@@ -81,10 +173,12 @@ def view_all_visits():
                 "scan_time": str(row[6]),
                 "status": row[7]
             })
-        return visits
+        return visits, next_cursor
+    except pg.InvalidCursor:
+        raise
     except Exception as e:
         print(f"[X] Error Viewing Visits. Try Again Later \n error: {e}", )
-        return []
+        return [], None
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
@@ -103,8 +197,8 @@ def get_visits_by_patient(patient_id):
         cursor.execute("""
             SELECT v.visit_id, v.scan_time, v.status, d.name AS dept, doc.first_name AS fname, doc.last_name AS lname, s.service_name
             FROM visit_log v
-            LEFT JOIN department d ON v.department_id = d.department_id
-            LEFT JOIN doctor doc ON v.doctor_id = doc.doctor_id
+            LEFT JOIN department d ON v.department_id = d.id
+            LEFT JOIN doctor doc ON v.doctor_id = doc.id
             LEFT JOIN services s ON v.service_id = s.service_id
             WHERE v.patient_id = %s
             ORDER BY v.scan_time DESC
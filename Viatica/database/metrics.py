@@ -0,0 +1,211 @@
+import threading
+import time
+from database.query_log import profiler
+
+
+# --------------------------------
+# Metric Types
+# --------------------------------
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+_lock = threading.Lock()    # one lock for every series; a request's observations land together
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, values=(), amount=1):
+        # caller holds _lock
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for values, total in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labels, values)} {_number(total)}"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus text format: a count per
+    upper bound plus _sum and _count, one series per label combination.
+    """
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}       # label values -> [bucket counts, sum, count]
+
+    def observe(self, values, amount):
+        # caller holds _lock
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if amount <= bound:
+                series[0][i] += 1
+                break
+        series[1] += amount
+        series[2] += 1
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for values, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), values + (_number(bound),))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labels + ('le',), values + ('+Inf',))} {count}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {count}"
+
+
+# --------------------------------
+# Series
+# --------------------------------
+
+
+requests_total = Counter("http_requests_total", "Requests handled.", ("endpoint", "method", "status"))
+request_seconds = Histogram("http_request_duration_seconds", "Handler time per request.", LATENCY_BUCKETS, ("endpoint",))
+request_db_seconds = Histogram("db_time_per_request_seconds", "Time spent in database calls per request.", LATENCY_BUCKETS, ("endpoint",))
+request_queries = Histogram("db_queries_per_request", "Statements executed per request.", COUNT_BUCKETS, ("endpoint",))
+queries_total = Counter("db_queries_total", "Statements executed; endpoint is 'background' outside requests.", ("endpoint",))
+query_seconds_total = Counter("db_query_seconds_total", "Time spent executing statements.", ("endpoint",))
+checkouts_total = Counter("db_connection_checkouts_total", "Connections taken from the pool.", ("endpoint",))
+connects_total = Counter("db_connections_opened_total", "New database connections opened.", ("endpoint",))
+
+SERIES = [
+    requests_total, request_seconds, request_db_seconds, request_queries,
+    queries_total, query_seconds_total, checkouts_total, connects_total,
+]
+
+
+# --------------------------------
+# Per-Request Recording
+# --------------------------------
+
+
+BACKGROUND = "background"
+_request = threading.local()
+
+def begin_request(endpoint):
+    _request.endpoint = endpoint
+    _request.started = time.perf_counter()
+    _request.queries = 0
+    _request.db_time = 0.0
+
+def end_request(method, status):
+    endpoint = getattr(_request, "endpoint", None)
+    if endpoint is None:
+        return
+    elapsed = time.perf_counter() - _request.started
+    _request.endpoint = None
+    with _lock:
+        requests_total.inc((endpoint, method, str(status)))
+        request_seconds.observe((endpoint,), elapsed)
+        request_db_seconds.observe((endpoint,), _request.db_time)
+        request_queries.observe((endpoint,), _request.queries)
+
+def _endpoint():
+    return getattr(_request, "endpoint", None) or BACKGROUND
+
+def record_query(seconds):
+    endpoint = _endpoint()
+    if endpoint != BACKGROUND:
+        _request.queries += 1
+        _request.db_time += seconds
+    with _lock:
+        queries_total.inc((endpoint,))
+        query_seconds_total.inc((endpoint,), seconds)
+
+def record_checkout(opened):
+    endpoint = _endpoint()
+    with _lock:
+        checkouts_total.inc((endpoint,))
+        if opened:
+            connects_total.inc((endpoint,))
+
+
+# --------------------------------
+# Instrumented Cursor
+# --------------------------------
+
+
+class TimedCursor:
+    """
+    Wraps a DB-API cursor so every execute()/executemany() is counted and
+    timed against the current request, and handed to the query profiler
+    (database/query_log.py). Everything else passes through, attribute
+    writes included (psycopg2 named cursors take itersize).
+    """
+
+    def __init__(self, raw):
+        object.__setattr__(self, "_raw", raw)
+
+    def execute(self, query, params=None, **kwargs):
+        return self._timed(self._raw.execute, query, params, False, kwargs)
+
+    def executemany(self, query, params, **kwargs):
+        return self._timed(self._raw.executemany, query, params, True, kwargs)
+
+    def _timed(self, run, query, params, many, kwargs):
+        started = time.perf_counter()
+        try:
+            return run(query, params, **kwargs) if params is not None else run(query, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            record_query(elapsed)
+            profiler.record(query, params, elapsed, getattr(self._raw, "rowcount", -1), _endpoint(), many)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+
+
+# --------------------------------
+# Exposition
+# --------------------------------
+
+
+def sample_lines(name, help, kind, labels, values):
+    # values: {label values tuple: number}; for state read at scrape time, e.g. pool stats
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    for key, value in sorted(values.items()):
+        yield f"{name}{_labels(labels, key)} {_number(value)}"
+
+def render(extra=()):
+    # ✅ Prometheus text format 0.0.4
+    with _lock:
+        lines = [line for series in SERIES for line in series.lines()]
+    for group in extra:
+        lines.extend(group)
+    return "\n".join(lines) + "\n"
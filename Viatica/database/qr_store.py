@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+import threading
+import qrcode
+import qrcode.image.svg
+from config import qr_store_config
+from database.cache import TTLCache
+
+
+# --------------------------------
+# Content-Addressed QR Image Store
+# --------------------------------
+
+
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+RENDER_VERSION = 1      # bump when rendering changes; images get new addresses and old files are just unused
+
+
+class QRImageStore:
+    """
+    Rendered QR images keyed by a hash of what they encode, so an address
+    never goes stale and doubles as the HTTP ETag. Lookups go memory LRU,
+    then disk, then render. Files live under root/ab/cd/<hash>.<fmt>, so no
+    directory holds more than a few thousand of them.
+    """
+
+    def __init__(self, root, memory_items):
+        self.root = root
+        # ✅ Content never changes under an address, so entries only leave by LRU eviction
+        self.memory = TTLCache("qr_image", max_size=memory_items, ttl=float("inf"))
+        self._lock = threading.Lock()
+        self._stats = {"disk_hits": 0, "renders": 0, "write_errors": 0}
+
+    def address(self, qr_id, fmt):
+        return hashlib.sha256(f"v{RENDER_VERSION}:{fmt}:{qr_id}".encode()).hexdigest()
+
+    def path(self, address, fmt):
+        return os.path.join(self.root, address[:2], address[2:4], f"{address}.{fmt}")
+
+    def exists(self, qr_id, fmt = "png"):
+        return os.path.exists(self.path(self.address(qr_id, fmt), fmt))
+
+    def get(self, qr_id, fmt = "png", rerender = False):
+        """
+        Returns (image bytes, address), rendering and storing the image on
+        first use. rerender ignores any stored copy.
+        """
+        address = self.address(qr_id, fmt)
+        path = self.path(address, fmt)
+        if not rerender:
+            data = self.memory.get(address)
+            if data is not None:
+                return data, address
+            try:
+                with open(path, "rb") as stored:
+                    data = stored.read()
+                self._count("disk_hits")
+                self.memory.set(address, data)
+                return data, address
+            except FileNotFoundError:
+                pass
+
+        data = render(qr_id, fmt)
+        self._count("renders")
+        try:
+            write_atomic(path, data)
+        except OSError as e:
+            # The image is still served from memory; the next miss renders it again
+            self._count("write_errors")
+            print(f"[X] Could Not Store QR Image {path} \n error: {e}")
+        self.memory.set(address, data)
+        return data, address
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, "memory": self.memory.stats(), "root": self.root}
+
+
+def render(qr_id, fmt = "png"):
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        qrcode.make(qr_id, image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qrcode.make(qr_id).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def write_atomic(path, data):
+    # ✅ Temp name then rename, so a concurrent reader never sees half an image
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as out:
+        out.write(data)
+    os.replace(temp_path, path)
+
+
+store = QRImageStore(qr_store_config["path"], qr_store_config["memory_items"])
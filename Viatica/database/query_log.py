@@ -0,0 +1,210 @@
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from config import slow_query_config
+
+
+# --------------------------------
+# Fingerprints
+# --------------------------------
+
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%s|\?")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.I)
+_SPACE = re.compile(r"\s+")
+MAX_SHAPE = 20      # longer parameter lists are summarised in the slow log
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """
+    The statement with literals and placeholders replaced by ?, lists and
+    multi-row VALUES collapsed and whitespace squeezed, so every call of
+    the same query shape lands on one entry however many rows it carries.
+    """
+    text = _COMMENTS.sub(" ", sql)
+    text = _STRINGS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _LISTS.sub("(...)", text)
+    text = _ROWS.sub(r"\1", text)
+    return _SPACE.sub(" ", text).strip()
+
+def param_shape(params, many=False):
+    # Types only, never values: the slow log must not copy patient data to disk
+    if many:
+        params = list(params) if not isinstance(params, (list, tuple)) else params
+        return {"rows": len(params), "each": param_shape(params[0]) if params else None}
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if len(params) > MAX_SHAPE:
+            # Multi-row statements: a type census instead of thousands of names
+            return {"count": len(params), "types": sorted({type(value).__name__ for value in params})}
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+
+# --------------------------------
+# Profiler
+# --------------------------------
+
+
+class QueryProfiler:
+    """
+    Count, total and max time per fingerprint, plus the most recent
+    `window` durations for percentiles. Statements slower than threshold_ms
+    also go to a rotating slow-query log as one JSON line each. Past
+    max_fingerprints new shapes are pooled under "(other)".
+    """
+
+    OTHER = "(other)"
+
+    def __init__(self, threshold_ms, log_path, max_bytes, backups, max_fingerprints=1000, window=512):
+        self.threshold = threshold_ms / 1000
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.max_fingerprints = max_fingerprints
+        self.window = window
+        self._stats = {}        # fingerprint -> entry dict
+        self._lock = threading.Lock()
+        self._capture = threading.local()
+        self._logger = None
+        self._since = time.time()
+
+    def record(self, sql, params, seconds, rows, endpoint=None, many=False):
+        captured = getattr(self._capture, "statements", None)
+        if captured is not None:
+            captured.append((sql, params))
+        try:
+            key = fingerprint(sql) if isinstance(sql, str) else str(sql)
+        except Exception:
+            key = self.OTHER
+        slow = seconds >= self.threshold
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = self.OTHER
+                    entry = self._stats.get(key)
+                if entry is None:
+                    entry = self._stats[key] = {
+                        "count": 0, "total": 0.0, "max": 0.0, "rows": 0, "slow": 0,
+                        "recent": deque(maxlen=self.window)
+                    }
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["rows"] += max(rows, 0) if isinstance(rows, int) else 0
+            entry["recent"].append(seconds)
+            if slow:
+                entry["slow"] += 1
+        if slow:
+            self._log_slow(key, params, seconds, rows, endpoint, many)
+
+    def _log_slow(self, key, params, seconds, rows, endpoint, many):
+        try:
+            logger = self._slow_logger()
+            logger.info(json.dumps({
+                "at": datetime.now().isoformat(timespec="milliseconds"),
+                "ms": round(seconds * 1000, 3),
+                "endpoint": endpoint,
+                "rows": rows if isinstance(rows, int) and rows >= 0 else None,
+                "params": param_shape(params, many),
+                "fingerprint": key,
+            }, default=str))
+        except Exception as e:
+            # ❌ A broken log file must never fail the query that was being timed
+            print(f"[X] Could Not Write Slow-Query Log {self.log_path} \n error: {e}")
+
+    def _slow_logger(self):
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    directory = os.path.dirname(self.log_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    handler = logging.handlers.RotatingFileHandler(
+                        self.log_path, maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8"
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    logger = logging.getLogger("viatica.slow_query")
+                    logger.setLevel(logging.INFO)
+                    logger.propagate = False
+                    logger.addHandler(handler)
+                    self._logger = logger
+        return self._logger
+
+    def top(self, n=20, sort="total"):
+        """
+        The n heaviest fingerprints by total, count, mean, p95 or max time,
+        with times in milliseconds. p95 is over the last `window` calls.
+        """
+        with self._lock:
+            snapshot = [(key, dict(entry, recent=sorted(entry["recent"]))) for key, entry in self._stats.items()]
+        results = []
+        for key, entry in snapshot:
+            recent = entry["recent"]
+            results.append({
+                "fingerprint": key,
+                "count": entry["count"],
+                "total_ms": round(entry["total"] * 1000, 3),
+                "mean_ms": round(entry["total"] / entry["count"] * 1000, 3),
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3) if recent else 0.0,
+                "max_ms": round(entry["max"] * 1000, 3),
+                "rows": entry["rows"],
+                "slow": entry["slow"],
+            })
+        results.sort(key=lambda item: item[f"{sort}_ms"] if sort != "count" else item["count"], reverse=True)
+        return results[:n]
+
+    @contextmanager
+    def capture(self):
+        """
+        Collects (sql, params) for every statement this thread runs inside
+        the block, so tools can inspect what the real code path sends.
+        """
+        statements = self._capture.statements = []
+        try:
+            yield statements
+        finally:
+            self._capture.statements = None
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._since = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fingerprints": len(self._stats),
+                "threshold_ms": round(self.threshold * 1000, 3),
+                "log_path": self.log_path,
+                "since": datetime.fromtimestamp(self._since).isoformat(timespec="seconds"),
+            }
+
+
+SORTS = ("total", "count", "mean", "p95", "max")
+
+profiler = QueryProfiler(
+    slow_query_config["threshold_ms"],
+    slow_query_config["log_path"],
+    slow_query_config["max_bytes"],
+    slow_query_config["backups"],
+    slow_query_config["max_fingerprints"]
+)
@@ -0,0 +1,368 @@
+import bisect
+import heapq
+import threading
+import time as clock
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+import database.db_connection as db
+from config import slot_index_ttl, slot_index_max_days
+
+
+# --------------------------------
+# Value Normalisation
+# --------------------------------
+
+
+def as_date(value):
+    # Drivers hand back date objects or ISO strings; the backend uses dd/mm/YYYY
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value}")
+
+def as_time(value):
+    # MySQL returns TIME columns as timedelta, SQLite as text, PostgreSQL as time
+    if isinstance(value, time):
+        return value.replace(microsecond=0)
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            return datetime.strptime(str(value), fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value}")
+
+
+# --------------------------------
+# Free-Slot Index
+# --------------------------------
+
+
+class DaySlots:
+    """
+    One doctor's slots for one day, sorted by time. Bit i of `booked` is set
+    when slot i is booked.
+    """
+    __slots__ = ("ids", "times", "day_of_week", "booked", "loaded_at")
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[1])
+        self.ids = [row[0] for row in rows]
+        self.times = [row[1] for row in rows]
+        self.day_of_week = rows[0][3] if rows else None
+        self.booked = 0
+        for i, row in enumerate(rows):
+            if row[2]:
+                self.booked |= 1 << i
+        self.loaded_at = clock.monotonic()
+
+    def is_booked(self, i):
+        return bool(self.booked >> i & 1)
+
+    def set_booked(self, i, booked):
+        if booked:
+            self.booked |= 1 << i
+        else:
+            self.booked &= ~(1 << i)
+
+    def remove(self, i):
+        low = self.booked & ((1 << i) - 1)
+        self.booked = low | ((self.booked >> (i + 1)) << i)
+        del self.ids[i]
+        del self.times[i]
+
+
+class SlotIndex:
+    """
+    In-process view of doctor_availability, per doctor and day. Kept in sync
+    by the write paths in this process and refreshed from the database when a
+    day is older than `ttl` seconds, which covers writes from other workers.
+    Past `max_days` doctor-days the least recently used are dropped, never
+    the ones the current lookup asked for. Loads query without the lock, so
+    a write hook that lands meanwhile marks what it touched and the load
+    does not overwrite it with its older snapshot. The database stays the
+    source of truth for claiming slots.
+    """
+
+    def __init__(self, ttl=30.0, max_days=20000):
+        self.ttl = ttl
+        self.max_days = max_days
+        self._days = OrderedDict()  # (doctor_id, date) -> DaySlots, least recently used first
+        self._slot_keys = {}        # slot id -> (doctor_id, date)
+        self._directory = None      # doctor_id -> (dept_id, specialization)
+        self._directory_loaded_at = 0.0
+        self._directory_epoch = 0   # bumped by clear(), so a directory read before it is not stored
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "rows_loaded": 0, "evictions": 0}
+        self._seq = 0               # bumped by every write hook
+        self._loads = 0             # loads between their query and their store
+        self._touched = {}          # ("day", doc, date) / ("slot", id) / ("doctor", id) / ("all",) -> seq, while loads run
+
+    # ✅ Reads
+
+    def day_schedule(self, doc_id, day):
+        return self._rows(doc_id, as_date(day), lambda slots, i: True)
+
+    def free_slots(self, doc_id, day):
+        return self._rows(doc_id, as_date(day), lambda slots, i: not slots.is_booked(i))
+
+    def booked_slots(self, doc_id, day):
+        return self._rows(doc_id, as_date(day), lambda slots, i: slots.is_booked(i))
+
+    def next_free(self, doc_ids, start=None, n=5, horizon_days=30):
+        """
+        Earliest n free slots across the given doctors, from `start`
+        (a datetime, default now) up to horizon_days ahead.
+        """
+        start = start or datetime.now()
+        first_day = start.date()
+        days = [first_day + timedelta(days=i) for i in range(horizon_days + 1)]
+        doc_ids = list(doc_ids)
+        self._ensure_loaded(doc_ids, days)
+
+        results = []
+        with self._lock:
+            for day in days:
+                candidates = []
+                for doc_id in doc_ids:
+                    slots = self._days.get((doc_id, day))
+                    if not slots:
+                        continue
+                    begin = bisect.bisect_left(slots.times, start.time()) if day == first_day else 0
+                    for i in range(begin, len(slots.times)):
+                        if not slots.is_booked(i):
+                            candidates.append((slots.times[i], doc_id, day, slots, i))
+                for slot_time, doc_id, day, slots, i in heapq.nsmallest(n - len(results), candidates, key=lambda c: (c[0], c[1])):
+                    results.append(self._row(doc_id, day, slots, i))
+                if len(results) >= n:
+                    break
+        return results
+
+    def doctors_for(self, dept_id=None, specialization=None):
+        with self._lock:
+            directory = self._directory
+            if directory is not None and clock.monotonic() - self._directory_loaded_at > self.ttl:
+                directory = None
+        if directory is None:
+            # ✅ Queried without the lock; a reader meanwhile may load it too, which is harmless
+            directory = self._load_directory()
+        return [
+            doc_id for doc_id, (doc_dept, doc_specialization) in directory.items()
+            if (dept_id is None or doc_dept == dept_id)
+            and (specialization is None or (doc_specialization or "").lower() == specialization.lower())
+        ]
+
+    # ✅ Write hooks, called by db_doc_schedule and db_booking after their commits
+
+    def set_booked(self, slot_id, booked):
+        with self._lock:
+            self._touch(("slot", slot_id))
+            key = self._slot_keys.get(slot_id)
+            slots = self._days.get(key) if key else None
+            if slots is None:
+                return
+            i = slots.ids.index(slot_id)
+            slots.set_booked(i, booked)
+
+    def set_booked_at(self, doc_id, day, slot_time, booked):
+        with self._lock:
+            self._touch(("day", doc_id, as_date(day)))
+            slots = self._days.get((doc_id, as_date(day)))
+            if slots is None:
+                return
+            slot_time = as_time(slot_time)
+            i = bisect.bisect_left(slots.times, slot_time)
+            if i < len(slots.times) and slots.times[i] == slot_time:
+                slots.set_booked(i, booked)
+
+    def remove(self, slot_id):
+        with self._lock:
+            self._touch(("slot", slot_id))
+            key = self._slot_keys.pop(slot_id, None)
+            slots = self._days.get(key) if key else None
+            if slots is not None:
+                slots.remove(slots.ids.index(slot_id))
+
+    def invalidate(self, doc_id, day=None):
+        with self._lock:
+            self._touch(("doctor", doc_id) if day is None else ("day", doc_id, as_date(day)))
+            keys = [key for key in self._days if key[0] == doc_id and (day is None or key[1] == as_date(day))]
+            for key in keys:
+                self._drop(key)
+
+    def invalidate_doctors(self, doc_ids):
+        doc_ids = set(doc_ids)
+        with self._lock:
+            self._touch(*[("doctor", doc_id) for doc_id in doc_ids])
+            for key in [key for key in self._days if key[0] in doc_ids]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._touch(("all",))
+            self._directory_epoch += 1
+            self._days.clear()
+            self._slot_keys.clear()
+            self._directory = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["days_cached"] = len(self._days)
+            stats["slots_cached"] = len(self._slot_keys)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    # ✅ Internals
+
+    def _rows(self, doc_id, day, keep):
+        self._ensure_loaded([doc_id], [day])
+        with self._lock:
+            slots = self._days.get((doc_id, day))
+            if not slots:
+                return []
+            return [self._row(doc_id, day, slots, i) for i in range(len(slots.ids)) if keep(slots, i)]
+
+    @staticmethod
+    def _row(doc_id, day, slots, i):
+        return {
+            "id": slots.ids[i],
+            "doctor_id": doc_id,
+            "available_date": day.isoformat(),
+            "available_time": slots.times[i].strftime("%H:%M"),
+            "day_of_week": slots.day_of_week,
+            "is_booked": slots.is_booked(i)
+        }
+
+    def _ensure_loaded(self, doc_ids, days):
+        now = clock.monotonic()
+        wanted = [(doc_id, day) for doc_id in doc_ids for day in days]
+        with self._lock:
+            missing = []
+            for key in wanted:
+                slots = self._days.get(key)
+                if slots is None or now - slots.loaded_at > self.ttl:
+                    missing.append(key)
+                else:
+                    self._days.move_to_end(key)
+            self._stats["hits"] += len(wanted) - len(missing)
+            self._stats["misses"] += len(missing)
+        if missing:
+            # ✅ One range query covers every missing doctor-day
+            self._load(sorted({doc_id for doc_id, _ in missing}), min(day for _, day in missing), max(day for _, day in missing))
+        with self._lock:
+            # The keys just asked for are the most recent, so they survive even past max_days
+            self._evict(keep=len(wanted))
+
+    def _load(self, doc_ids, first_day, last_day):
+        conn = None
+        cursor = None
+        with self._lock:
+            self._loads += 1
+            started = self._seq
+        try:
+            conn = db.get_connection()
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(doc_ids))
+            cursor.execute(
+                f"""
+                    SELECT id, doctor_id, available_date, available_time, day_of_week, is_booked
+                    FROM doctor_availability
+                    WHERE doctor_id IN ({placeholders}) AND available_date BETWEEN %s AND %s
+                """, (*doc_ids, first_day, last_day)
+            )
+            rows = cursor.fetchall()
+        except Exception:
+            with self._lock:
+                self._load_done()
+            raise
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
+
+        grouped = {}
+        for slot_id, doc_id, available_date, available_time, day_of_week, is_booked in rows:
+            grouped.setdefault((doc_id, as_date(available_date)), []).append(
+                (slot_id, as_time(available_time), bool(is_booked), day_of_week)
+            )
+        with self._lock:
+            day = first_day
+            while day <= last_day:
+                for doc_id in doc_ids:
+                    key = (doc_id, day)
+                    slots = DaySlots(grouped.get(key, []))
+                    if self._touched_since(started, key, slots):
+                        if key in self._days:
+                            continue        # the cached day already has the newer write
+                        slots.loaded_at = float("-inf")     # serve this read, reload on the next
+                    self._drop(key)
+                    self._days[key] = slots
+                    for slot_id in slots.ids:
+                        self._slot_keys[slot_id] = key
+                day += timedelta(days=1)
+            self._stats["loads"] += 1
+            self._stats["rows_loaded"] += len(rows)
+            self._load_done()
+
+    def _touch(self, *marks):
+        # caller holds _lock
+        self._seq += 1
+        if self._loads:
+            for mark in marks:
+                self._touched[mark] = self._seq
+
+    def _touched_since(self, started, key, slots):
+        # caller holds _lock
+        touched = self._touched
+        marks = [("all",), ("doctor", key[0]), ("day",) + key] + [("slot", slot_id) for slot_id in slots.ids]
+        return any(touched.get(mark, 0) > started for mark in marks)
+
+    def _load_done(self):
+        # caller holds _lock
+        self._loads -= 1
+        if not self._loads:
+            self._touched.clear()
+
+    def _load_directory(self):
+        conn = None
+        cursor = None
+        with self._lock:
+            epoch = self._directory_epoch
+        try:
+            conn = db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, dept_id, specialization FROM doctor")
+            directory = {doc_id: (dept_id, specialization) for doc_id, dept_id, specialization in cursor.fetchall()}
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
+        with self._lock:
+            # A clear() during the query means doctors changed; keep the answer for this caller only
+            if self._directory_epoch == epoch:
+                self._directory = directory
+                self._directory_loaded_at = clock.monotonic()
+        return directory
+
+    def _evict(self, keep=0):
+        # caller holds _lock
+        while len(self._days) > max(self.max_days, keep):
+            key = next(iter(self._days))
+            self._drop(key)
+            self._stats["evictions"] += 1
+
+    def _drop(self, key):
+        slots = self._days.pop(key, None)
+        if slots is not None:
+            for slot_id in slots.ids:
+                self._slot_keys.pop(slot_id, None)
+
+
+index = SlotIndex(ttl=slot_index_ttl, max_days=slot_index_max_days)
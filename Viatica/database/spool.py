@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:     # ❌ Windows: no advisory locks, so one process per spool directory
+    fcntl = None
+
+
+# --------------------------------
+# Append-Only Spool
+# --------------------------------
+
+
+class Spool:
+    """
+    A BatchWriter buffer that survives a crash. Every row is appended as one
+    JSON line to a segment file before put() returns, and fsynced at most
+    every fsync_interval seconds (the writer also syncs before each batch).
+    ack() records how far the database has caught up in a checkpoint file
+    and deletes segments that are fully written. On start the rows after the
+    checkpoint are loaded again, so a restart replays whatever the last
+    process had not written; the consumer must tolerate seeing a row twice.
+    """
+
+    def __init__(self, directory, encode=None, decode=None, max_pending=50000, segment_rows=10000, fsync_interval=0.05):
+        self.encode = encode or (lambda row: row)
+        self.decode = decode or (lambda values: values)
+        self.max_pending = max_pending
+        self.segment_rows = segment_rows
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self.directory = self._claim(directory)
+        self._rows = deque()            # (row, submitted_at, segment, end offset)
+        self._replayed = self._load()
+        self._segment = self._next_segment()
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._segment_count = 0
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        _open_spools.add(self)
+        if self._replayed:
+            print(f"[!] Spool {self.directory} Has {self._replayed} Unwritten Rows From A Previous Run; Replaying.")
+
+    # ---- setup ----
+
+    def _claim(self, directory):
+        # ✅ One process per directory; other processes on the host take directory.1, .2, ...
+        for n in range(64):
+            path = directory if n == 0 else f"{directory}.{n}"
+            os.makedirs(path, exist_ok=True)
+            if fcntl is None:
+                return path
+            lock_file = open(os.path.join(path, "lock"), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self._lock_file = lock_file
+            return path
+        raise RuntimeError(f"No free spool directory under {directory}")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{segment:08d}.log")
+
+    def _segments(self):
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".log") and name[:-4].isdigit())
+
+    def _next_segment(self):
+        return max(self._segments(), default=0) + 1
+
+    def _read_checkpoint(self):
+        try:
+            with open(os.path.join(self.directory, "checkpoint")) as checkpoint:
+                position = json.load(checkpoint)
+            return position["segment"], position["offset"]
+        except FileNotFoundError:
+            return 0, 0
+        except (ValueError, KeyError) as e:
+            # ❌ Replaying from the start may repeat rows, but never loses any
+            print(f"[X] Spool Checkpoint Unreadable; Replaying Everything \n error: {e}")
+            return 0, 0
+
+    def _load(self):
+        done_segment, done_offset = self._read_checkpoint()
+        loaded = time.monotonic()
+        count = 0
+        for segment in self._segments():
+            if segment < done_segment:
+                os.remove(self._segment_path(segment))
+                continue
+            offset = done_offset if segment == done_segment else 0
+            with open(self._segment_path(segment), "r+b") as log:
+                log.seek(offset)
+                for line in log:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete line")
+                        row = self.decode(json.loads(line))
+                    except ValueError:
+                        # ✅ A torn append from a crash: keep everything before it
+                        print(f"[!] Truncating Torn Spool Record In Segment {segment} At Byte {offset}.")
+                        log.truncate(offset)
+                        break
+                    offset += len(line)
+                    self._rows.append((row, loaded, segment, offset))
+                    count += 1
+        return count
+
+    # ---- buffer interface ----
+
+    def put(self, row):
+        line = (json.dumps(self.encode(row), separators=(",", ":"), default=str) + "\n").encode()
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                return False
+            if self._segment_count >= self.segment_rows:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()      # in the OS page cache now: survives the process dying
+            self._segment_count += 1
+            self._dirty = True
+            self._rows.append((row, time.monotonic(), self._segment, self._file.tell()))
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_locked()
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def oldest(self):
+        with self._lock:
+            return self._rows[0][1] if self._rows else None
+
+    def peek(self, limit):
+        with self._lock:
+            entries = list(islice(self._rows, limit))
+        if not entries:
+            return [], None
+        return [entry[0] for entry in entries], (len(entries), entries[-1][2], entries[-1][3])
+
+    def ack(self, marker):
+        if marker is None:
+            return
+        count, segment, offset = marker
+        with self._lock:
+            for _ in range(count):
+                self._rows.popleft()
+        self._write_checkpoint(segment, offset)
+        for old in self._segments():
+            if old < segment:
+                try:
+                    os.remove(self._segment_path(old))
+                except FileNotFoundError:
+                    pass
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    # ---- internals ----
+
+    def _sync_locked(self):
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _rotate(self):
+        self._sync_locked()
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._segment_count = 0
+
+    def _write_checkpoint(self, segment, offset):
+        # ✅ Temp file then rename, so a crash leaves the old checkpoint or the new one
+        path = os.path.join(self.directory, "checkpoint")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as out:
+            json.dump({"segment": segment, "offset": offset}, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+
+    def close(self):
+        _open_spools.discard(self)
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+        if self._lock_file:
+            self._lock_file.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "segment": self._segment,
+                "replayed": self._replayed,
+                "durable": not self._dirty,
+            }
+
+
+# --------------------------------
+# Fork Safety
+# --------------------------------
+
+
+# ✅ Hold every spool still across fork(), so a child never inherits a half-written line to flush again
+_open_spools = weakref.WeakSet()
+_held = []
+
+def _before_fork():
+    for spool in list(_open_spools):
+        spool._lock.acquire()
+        _held.append(spool)
+
+def _after_fork():
+    while _held:
+        _held.pop()._lock.release()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork, after_in_child=_after_fork)
+
+
+# --------------------------------
+# Dead Letters
+# --------------------------------
+
+
+class DeadLetter:
+    """
+    Rows the database refused for good (bad values, not a lost connection),
+    appended as one JSON line each with the error so they can be inspected
+    and replayed by hand. Appends are fsynced before the caller acks the
+    batch, so a refused row is in this file or still pending, never lost.
+    """
+
+    def __init__(self, path, encode=None):
+        self.path = path
+        self.encode = encode or (lambda row: row)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, row, error):
+        line = json.dumps({
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "error": f"{type(error).__name__}: {error}",
+            "row": self.encode(row),
+        }, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as out:
+                out.write(line + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            self.count += 1